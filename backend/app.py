@@ -5,7 +5,13 @@ from fastapi.staticfiles import StaticFiles
 import uvicorn
 from contextlib import asynccontextmanager
 from pathlib import Path
-from database.connection import connect_db, disconnect_db
+from database.connection import connect_db, disconnect_db, get_pool_stats
+from database.operations import db_ops
+from database.session import DatabaseSessionMiddleware
+from database.token_versions import token_versions
+from responses import FastJSONResponse
+from report_jobs import report_jobs
+from password_hasher import password_hasher
 
 # Import routers
 from routes.auth import router as auth_router
@@ -30,9 +36,15 @@ from security import SecurityHeadersMiddleware, RateLimitMiddleware, InputValida
 async def lifespan(app: FastAPI):
     # Startup
     await connect_db()
+    await db_ops.course_catalog.warm()
+    await token_versions.start(db_ops.sync_token_versions)
+    await report_jobs.start()
     yield
     # Shutdown
+    await report_jobs.stop()
+    await token_versions.stop()
     await disconnect_db()
+    password_hasher.shutdown()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -41,6 +53,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=FastJSONResponse,
     lifespan=lifespan
 )
 
@@ -49,6 +62,9 @@ app.add_middleware(SecurityHeadersMiddleware)
 app.add_middleware(InputValidationMiddleware)
 app.add_middleware(RateLimitMiddleware)
 
+# One database session per request, committed once before the response is sent
+app.add_middleware(DatabaseSessionMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -67,6 +83,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor"],
 )
 
 # Register error handlers
@@ -105,7 +122,9 @@ async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "message": "API is running successfully"
+        "message": "API is running successfully",
+        "database_pool": get_pool_stats(),
+        "password_hasher": password_hasher.stats()
     }
 
 # Note: Global exception handler is now registered via error_handlers.py
@@ -4,8 +4,15 @@ from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from passlib.context import CryptContext
 import hashlib
+import logging
 import jwt
 from database.operations import db_ops
+from jwt_cache import decode_token
+from database.principals import ADMIN_FIELDS, USER_FIELDS, principal_cache, project
+from database.token_versions import token_versions
+from password_hasher import password_hasher
+
+logger = logging.getLogger(__name__)
 
 # Security configuration
 SECRET_KEY = "your-secret-key-change-in-production"  # Change this in production
@@ -37,6 +44,22 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+async def _load_principal(lookup, email: str, fields) -> Optional[dict]:
+    row = await lookup(email)
+    return project(row, fields) if row else None
+
+async def get_admin_principal(email: str) -> Optional[dict]:
+    """Active admin account for an email, served from the principal cache"""
+    return await principal_cache.get_or_load(
+        "admin", email, lambda: _load_principal(db_ops.get_admin_by_email, email, ADMIN_FIELDS)
+    )
+
+async def get_user_principal(email: str) -> Optional[dict]:
+    """User account for an email without the password hash, served from the principal cache"""
+    return await principal_cache.get_or_load(
+        "user", email, lambda: _load_principal(db_ops.get_user_by_email, email, USER_FIELDS)
+    )
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     """Get the current authenticated user from JWT token"""
     credentials_exception = HTTPException(
@@ -46,17 +69,20 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     )
     
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(credentials.credentials, SECRET_KEY, [ALGORITHM])
         email: str = payload.get("sub")
         role: str = payload.get("role", "student")
         if email is None:
             raise credentials_exception
+        # Tokens issued before the user's last revocation are rejected
+        if not token_versions.is_current(payload.get("user_id"), payload.get("ver")):
+            raise credentials_exception
     except jwt.PyJWTError:
         raise credentials_exception
     
     # Check if it's an admin user
     if role in ["admin", "super_admin"]:
-        admin = await db_ops.get_admin_by_email(email)
+        admin = await get_admin_principal(email)
         if admin:
             return {
                 "id": admin["id"],
@@ -68,24 +94,35 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             }
     
     # Regular user
-    user = await db_ops.get_user_by_email(email)
+    user = await get_user_principal(email)
     if user is None:
         raise credentials_exception
     
     return user
 
+async def verify_account_password(table: str, account: dict, password: str) -> bool:
+    """
+    Check a password on the hashing pool, upgrading a legacy hash on success
+    Raises a 503 if the pool is saturated.
+    """
+    valid, needs_rehash = await password_hasher.verify(password, account["password"])
+    if valid and needs_rehash:
+        try:
+            new_hash = await password_hasher.hash(password)
+            await db_ops.rehash_password(table, account["id"], account["password"], new_hash)
+        except Exception as e:
+            # The login itself succeeded; the upgrade is retried next time
+            logger.warning(f"Password rehash failed for {table} {account['id']}: {str(e)}")
+    return valid
+
 async def authenticate_user(email: str, password: str) -> Optional[dict]:
     """Authenticate a user with email and password"""
-    user = await db_ops.get_user_by_email(email)
+    user = await db_ops.get_user_credentials(email)
     if not user:
         return None
     
-    # Try both old SHA256 and new bcrypt verification
-    if not verify_password(password, user["password"]):
-        # Try bcrypt verification for new passwords
-        from secure_auth import secure_auth
-        if not secure_auth.verify_password(password, user["password"]):
-            return None
+    if not await verify_account_password("users", user, password):
+        return None
     
     return user
 
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark access-token verification with and without the verified-JWT cache
+Simulates --clients concurrent clients, each sending --requests requests with
+its own long-lived token, and reports throughput and per-decode latency for
+plain jwt.decode and for VerifiedTokenCache.decode.
+
+Usage: python benchmark_jwt_cache.py [--clients N] [--requests N]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import jwt
+
+from jwt_cache import VerifiedTokenCache
+
+KEY = "benchmark-secret"
+ALGORITHMS = ["HS256"]
+
+
+def make_tokens(clients):
+    expire = datetime.utcnow() + timedelta(days=30)
+    return [
+        jwt.encode(
+            {"sub": f"user{i}@example.com", "user_id": str(i), "role": "student", "type": "access", "exp": expire},
+            KEY,
+            algorithm=ALGORITHMS[0],
+        )
+        for i in range(clients)
+    ]
+
+
+async def run(decode, tokens, requests):
+    latencies = []
+
+    async def client(token):
+        for _ in range(requests):
+            started = time.perf_counter()
+            decode(token)
+            latencies.append(time.perf_counter() - started)
+            # Yield like a request handler would between calls
+            await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(token) for token in tokens))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "decodes": len(latencies),
+        "seconds": elapsed,
+        "per_second": len(latencies) / elapsed,
+        "mean_us": statistics.fmean(latencies) * 1e6,
+        "p99_us": latencies[int(len(latencies) * 0.99) - 1] * 1e6,
+    }
+
+
+def report(name, result):
+    print(
+        f"{name:<10} {result['decodes']:>8} decodes in {result['seconds']:.3f}s  "
+        f"{result['per_second']:>10,.0f}/s  mean {result['mean_us']:.1f}µs  p99 {result['p99_us']:.1f}µs"
+    )
+
+
+async def main(clients, requests):
+    tokens = make_tokens(clients)
+    cache = VerifiedTokenCache(max_entries=clients * 2)
+
+    uncached = await run(lambda token: jwt.decode(token, KEY, algorithms=ALGORITHMS), tokens, requests)
+    cached = await run(lambda token: cache.decode(token, KEY, ALGORITHMS), tokens, requests)
+
+    print(f"{clients} concurrent clients x {requests} requests")
+    report("jwt.decode", uncached)
+    report("cached", cached)
+    print(f"speedup    {uncached['mean_us'] / cached['mean_us']:.1f}x per decode; cache {cache.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200, help="concurrent clients, one token each (default 200)")
+    parser.add_argument("--requests", type=int, default=500, help="requests per client (default 500)")
+    args = parser.parse_args()
+    asyncio.run(main(args.clients, args.requests))
@@ -0,0 +1,91 @@
+"""
+In-process course catalog
+The catalog is small and rarely written, so the whole table is held in
+memory as a dict by ID plus the list in catalog order (newest first), and
+course reads never touch the database. Writes call invalidate() once they
+commit. Each invalidation bumps a version counter, and a load that raced an
+invalidation is returned to its caller but never installed. Snapshots also
+expire after COURSE_CATALOG_TTL_SECONDS, so workers in other processes pick
+up writes they did not see.
+"""
+
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+COURSE_CATALOG_TTL_SECONDS = float(os.getenv("COURSE_CATALOG_TTL_SECONDS", "300"))
+
+LoadFn = Callable[[], Awaitable[List[dict]]]
+
+
+class _Snapshot:
+    __slots__ = ("by_id", "ordered", "version", "loaded_at")
+
+    def __init__(self, courses: List[dict], version: int):
+        self.ordered: Tuple[dict, ...] = tuple(courses)
+        self.by_id: Dict[str, dict] = {course["id"]: course for course in courses}
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+
+class CourseCatalog:
+    """Versioned in-memory copy of the courses table"""
+
+    def __init__(self, load: LoadFn, ttl: float = COURSE_CATALOG_TTL_SECONDS):
+        self._load = load
+        self.ttl = ttl
+        self.version = 0
+        self._snapshot: Optional[_Snapshot] = None
+        self._lock = asyncio.Lock()
+
+    async def warm(self) -> None:
+        """Load the catalog ahead of the first read"""
+        await self._current()
+
+    def invalidate(self) -> None:
+        """Drop the snapshot; the next read reloads it"""
+        self.version += 1
+        self._snapshot = None
+
+    async def all(self) -> List[dict]:
+        """Every course, newest first"""
+        snapshot = await self._current()
+        return [dict(course) for course in snapshot.ordered]
+
+    async def get(self, course_id: str) -> Optional[dict]:
+        snapshot = await self._current()
+        course = snapshot.by_id.get(str(course_id))
+        return dict(course) if course is not None else None
+
+    async def get_many(self, course_ids: Iterable[str]) -> Dict[str, dict]:
+        """Courses keyed by ID; missing IDs are left out"""
+        snapshot = await self._current()
+        found = {}
+        for course_id in course_ids:
+            course = snapshot.by_id.get(str(course_id))
+            if course is not None:
+                found[course_id] = dict(course)
+        return found
+
+    def _fresh(self, snapshot: Optional[_Snapshot]) -> bool:
+        return (
+            snapshot is not None
+            and snapshot.version == self.version
+            and time.monotonic() - snapshot.loaded_at < self.ttl
+        )
+
+    async def _current(self) -> _Snapshot:
+        snapshot = self._snapshot
+        if self._fresh(snapshot):
+            return snapshot
+        # One load at a time; readers queued behind it reuse its result
+        async with self._lock:
+            snapshot = self._snapshot
+            if self._fresh(snapshot):
+                return snapshot
+            version = self.version
+            snapshot = _Snapshot(await self._load(), version)
+            if version == self.version:
+                self._snapshot = snapshot
+            return snapshot
@@ -1,4 +1,7 @@
 import os
+import time
+import uuid
+import asyncio
 from dotenv import load_dotenv, find_dotenv
 from pathlib import Path
 from typing import Optional
@@ -6,6 +9,9 @@ from urllib.parse import quote, urlsplit, urlunsplit, parse_qsl, urlencode
 from supabase import create_client, Client
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, async_sessionmaker, AsyncSession
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util.queue import AsyncAdaptedQueue
 
 
 # Load environment variables from nearest .env up the tree
@@ -28,10 +34,53 @@ except Exception:
 
 # Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
 
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    try:
+        return int(value) if value not in (None, "") else default
+    except ValueError:
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Connection pool configuration
+DB_POOL_SIZE = _env_int("DB_POOL_SIZE", 10)
+DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 10)
+DB_POOL_TIMEOUT = _env_int("DB_POOL_TIMEOUT", 30)  # seconds to wait for a free connection
+DB_POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 1800)  # seconds before a connection is replaced
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+DB_POOL_WARMUP = _env_int("DB_POOL_WARMUP", 2)  # connections opened at startup
+
+# Seconds a client stays pinned to the primary after a write (read-your-writes)
+DB_READ_YOUR_WRITES_SECONDS = _env_int("DB_READ_YOUR_WRITES_SECONDS", 5)
+
+# Async driver: "psycopg" (default) or "asyncpg" (binary protocol, prepared statement cache)
+DB_DRIVER = (os.getenv("DB_DRIVER") or "psycopg").strip().lower()
+if DB_DRIVER not in ("psycopg", "asyncpg"):
+    DB_DRIVER = "psycopg"
+# Per-connection prepared statement cache size (asyncpg)
+DB_STATEMENT_CACHE_SIZE = _env_int("DB_STATEMENT_CACHE_SIZE", 256)
+# Set when connecting through a transaction-mode pooler (Supabase/PgBouncer on 6543):
+# server-side prepared statements don't survive across pooled transactions there
+DB_POOLER_MODE = _env_bool("DB_POOLER_MODE", False)
+
+_ASYNC_SCHEMES = {
+    "psycopg": "postgresql+psycopg",
+    "asyncpg": "postgresql+asyncpg",
+}
+
+
 def _append_sslmode_require(url: str) -> str:
     parts = urlsplit(url)
     query_pairs = dict(parse_qsl(parts.query))
@@ -41,17 +90,29 @@ def _append_sslmode_require(url: str) -> str:
     return urlunsplit((parts.scheme, parts.netloc, parts.path, new_query, parts.fragment))
 
 
-def _to_async_url(url: Optional[str]) -> Optional[str]:
+def _asyncpg_url(url: str) -> str:
+    """asyncpg takes SSL via connect_args and its statement cache size via the URL"""
+    parts = urlsplit(url)
+    query_pairs = dict(parse_qsl(parts.query))
+    query_pairs.pop("sslmode", None)
+    query_pairs["prepared_statement_cache_size"] = str(0 if DB_POOLER_MODE else DB_STATEMENT_CACHE_SIZE)
+    new_query = urlencode(query_pairs)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, new_query, parts.fragment))
+
+
+def _to_async_url(url: Optional[str], driver: str = DB_DRIVER) -> Optional[str]:
     if not url:
         return None
-    # If the URL already looks async, return as-is
+    # If the URL already names an async driver, only apply driver-specific options
+    if url.startswith("postgresql+asyncpg"):
+        return _asyncpg_url(url)
     if "+psycopg" in url or url.startswith("postgresql+psycopg"):
         return url
-    # Convert postgresql:// to postgresql+psycopg:// and ensure credentials are URL-encoded
+    # Convert postgresql:// to postgresql+<driver>:// and ensure credentials are URL-encoded
     if url.startswith("postgresql://"):
         # Parse components
         parts = urlsplit(url)
-        scheme = "postgresql+psycopg"
+        scheme = _ASYNC_SCHEMES[driver]
         netloc = parts.netloc
         # If credentials exist, encode password safely
         if "@" in netloc and ":" in netloc.split("@", 1)[0]:
@@ -61,29 +122,122 @@ def _to_async_url(url: Optional[str]) -> Optional[str]:
         else:
             safe_netloc = netloc
         rebuilt = urlunsplit((scheme, safe_netloc, parts.path, parts.query, parts.fragment))
+        if driver == "asyncpg":
+            return _asyncpg_url(rebuilt)
         return _append_sslmode_require(rebuilt)
     # Not starting with postgresql:// but still return with sslmode=require appended if applicable
     return _append_sslmode_require(url)
 
 
+def _connect_args(url: str) -> dict:
+    """Driver-level connection arguments for the given async URL"""
+    if url.startswith("postgresql+asyncpg"):
+        connect_args = {
+            "ssl": "require",
+            "statement_cache_size": 0 if DB_POOLER_MODE else DB_STATEMENT_CACHE_SIZE,
+        }
+        if DB_POOLER_MODE:
+            # Unnamed statements may still collide across pooled backends
+            connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+        return connect_args
+
+    connect_args = {"sslmode": "require"}
+    if DB_POOLER_MODE:
+        # psycopg auto-prepares repeated queries; disable it behind a transaction pooler
+        connect_args["prepare_threshold"] = None
+    return connect_args
+
+
 ASYNC_DATABASE_URL = _to_async_url(DATABASE_URL)
+ASYNC_DATABASE_READ_URL = _to_async_url(DATABASE_READ_URL)
+
+
+class PoolMetrics:
+    """Checkout wait statistics collected by InstrumentedQueuePool"""
+
+    def __init__(self):
+        # Callers currently blocked waiting for a connection to be returned
+        self.waiting = 0
+        self.checkouts = 0
+        # Time spent blocked on the pool queue only (not connection setup)
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+
+    def record_wait(self, wait: float):
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+
+class _InstrumentedQueue(AsyncAdaptedQueue):
+    """Pool queue that times the gets that have to block for a connection"""
+
+    metrics: PoolMetrics
 
-# Async SQLAlchemy engine and session factory
-async_engine: Optional[AsyncEngine] = (
-    create_async_engine(
-        ASYNC_DATABASE_URL,
+    def get(self, block: bool = True, timeout: Optional[float] = None):
+        if not block or not self.empty():
+            return super().get(block, timeout)
+        start = time.perf_counter()
+        self.metrics.waiting += 1
+        try:
+            return super().get(block, timeout)
+        finally:
+            self.metrics.waiting -= 1
+            self.metrics.record_wait(time.perf_counter() - start)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long callers wait for a connection"""
+
+    _queue_class = _InstrumentedQueue
+
+    def __init__(self, *args, **kwargs):
+        self.metrics = PoolMetrics()
+        super().__init__(*args, **kwargs)
+        self._pool.metrics = self.metrics
+
+    def _do_get(self):
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            # Only pool exhaustion counts; connect and auth errors propagate as they are
+            self.metrics.timeouts += 1
+            raise
+        self.metrics.checkouts += 1
+        return connection
+
+
+def _create_engine(url: Optional[str]) -> Optional[AsyncEngine]:
+    if not url:
+        return None
+    return create_async_engine(
+        url,
         future=True,
         echo=False,
-        connect_args={"sslmode": "require"},
+        connect_args=_connect_args(url),
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
     )
-    if ASYNC_DATABASE_URL
-    else None
-)
+
+
+# Async SQLAlchemy engine and session factory (primary, read-write)
+async_engine: Optional[AsyncEngine] = _create_engine(ASYNC_DATABASE_URL)
 async_session_factory: Optional[async_sessionmaker[AsyncSession]] = (
     async_sessionmaker(bind=async_engine, expire_on_commit=False)
     if async_engine else None
 )
 
+# Optional read replica engine for read-only operations
+async_read_engine: Optional[AsyncEngine] = _create_engine(ASYNC_DATABASE_READ_URL)
+async_read_session_factory: Optional[async_sessionmaker[AsyncSession]] = (
+    async_sessionmaker(bind=async_read_engine, expire_on_commit=False)
+    if async_read_engine else None
+)
+
 # Supabase client (optional)
 supabase: Optional[Client] = None
 if SUPABASE_URL and SUPABASE_KEY:
@@ -105,6 +259,69 @@ async def connect_db():
         print("✅ Connected to PostgreSQL database (async)")
     except Exception as e:
         print(f"❌ Database connection failed: {e}")
+        return
+    await warm_up_pool(async_engine)
+
+    if async_read_engine:
+        try:
+            async with async_read_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            print("✅ Connected to PostgreSQL read replica (async)")
+        except Exception as e:
+            print(f"❌ Read replica connection failed: {e}")
+            return
+        await warm_up_pool(async_read_engine)
+
+
+async def warm_up_pool(engine: AsyncEngine, count: int = DB_POOL_WARMUP):
+    """Pre-fill the pool so the first requests don't pay the connect/TLS cost"""
+    if not engine or count <= 0:
+        return
+    count = min(count, DB_POOL_SIZE)
+    connections = []
+    try:
+        results = await asyncio.gather(
+            *(engine.connect() for _ in range(count)),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"⚠️ Pool warm-up connection failed: {result}")
+            else:
+                connections.append(result)
+    finally:
+        for conn in connections:
+            await conn.close()
+    print(f"✅ Warmed up {len(connections)} pooled connection(s)")
+
+
+def _engine_pool_stats(engine: Optional[AsyncEngine]) -> dict:
+    if not engine:
+        return {"configured": False}
+    pool = engine.sync_engine.pool
+    metrics = getattr(pool, "metrics", None) or PoolMetrics()
+    average_wait = metrics.total_wait / metrics.checkouts if metrics.checkouts else 0.0
+    return {
+        "configured": True,
+        "size": pool.size(),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "waiters": metrics.waiting,
+        "checkouts": metrics.checkouts,
+        "checkout_timeouts": metrics.timeouts,
+        "avg_checkout_wait_ms": round(average_wait * 1000, 3),
+        "max_checkout_wait_ms": round(metrics.max_wait * 1000, 3)
+    }
+
+
+def get_pool_stats() -> dict:
+    """Live connection pool statistics for health and admin endpoints"""
+    stats = _engine_pool_stats(async_engine)
+    if async_read_engine:
+        stats["replica"] = _engine_pool_stats(async_read_engine)
+    return stats
 
 
 async def disconnect_db():
@@ -112,6 +329,9 @@ async def disconnect_db():
     if async_engine:
         await async_engine.dispose()
         print("✅ Disposed async engine")
+    if async_read_engine:
+        await async_read_engine.dispose()
+        print("✅ Disposed read replica engine")
 
 
 def get_async_session() -> AsyncSession:
@@ -120,6 +340,13 @@ def get_async_session() -> AsyncSession:
     return async_session_factory()
 
 
+def get_async_read_session() -> AsyncSession:
+    """Session on the read replica, falling back to the primary when none is configured"""
+    if async_read_session_factory:
+        return async_read_session_factory()
+    return get_async_session()
+
+
 async def test_connection() -> bool:
     try:
         if not async_engine:
@@ -0,0 +1,96 @@
+"""
+Request-scoped batch loaders
+A BatchLoader collects the keys requested during one event-loop tick and
+resolves them with a single ``WHERE id = ANY(:ids)`` query, memoizing the
+results for the rest of the request. Request keys together with load_many()
+(or asyncio.gather over load()) so they land in the same batch.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Set
+
+from .session import request_state
+
+BatchFn = Callable[[List[Any]], Awaitable[Dict[Any, Any]]]
+
+
+class BatchLoader:
+    """
+    Batches and memoizes lookups by key
+
+    ``batch_fn`` receives the distinct keys of one batch and returns a dict
+    of key -> value; keys it leaves out resolve to None.
+    """
+
+    __slots__ = ("_batch_fn", "_futures", "_queue", "_pending")
+
+    def __init__(self, batch_fn: BatchFn):
+        self._batch_fn = batch_fn
+        self._futures: Dict[Hashable, asyncio.Future] = {}
+        self._queue: List[Hashable] = []
+        # The loop only keeps weak references to tasks; hold in-flight batches here
+        self._pending: Set[asyncio.Task] = set()
+
+    def load(self, key: Hashable) -> Awaitable[Any]:
+        """Return an awaitable for the value of ``key``"""
+        future = self._futures.get(key)
+        if future is not None:
+            return future
+        loop = asyncio.get_running_loop()
+        future = self._futures[key] = loop.create_future()
+        if key is None:
+            future.set_result(None)
+            return future
+        self._queue.append(key)
+        if len(self._queue) == 1:
+            loop.call_soon(self._dispatch)
+        return future
+
+    async def load_many(self, keys: Iterable[Hashable]) -> List[Any]:
+        """Load several keys in one batch; results follow the order of ``keys``"""
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _dispatch(self) -> None:
+        keys, self._queue = self._queue, []
+        task = asyncio.ensure_future(self._resolve(keys))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _resolve(self, keys: List[Hashable]) -> None:
+        try:
+            values = await self._batch_fn(keys)
+        except Exception as e:
+            for key in keys:
+                # Drop failed keys from the memo so a later load retries them
+                future = self._futures.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key in keys:
+            future = self._futures[key]
+            if not future.done():
+                future.set_result(values.get(key))
+
+
+class Loaders:
+    """The batch loaders available to one request"""
+
+    __slots__ = ("courses", "payment_requests")
+
+    def __init__(self, ops):
+        self.courses = BatchLoader(ops.get_courses_by_ids)
+        self.payment_requests = BatchLoader(ops.get_payment_requests_by_ids)
+
+
+def get_loaders(ops) -> Loaders:
+    """
+    Return the current request's loaders, creating them on first use
+    Outside a request a fresh, unshared set is returned.
+    """
+    state: Optional[Dict[str, Any]] = request_state()
+    if state is None:
+        return Loaders(ops)
+    loaders = state.get("loaders")
+    if loaders is None:
+        loaders = state["loaders"] = Loaders(ops)
+    return loaders
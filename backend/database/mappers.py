@@ -0,0 +1,204 @@
+"""
+Declarative row mappers for db_ops results
+A RowMapper lists how result columns become response fields (camelCase
+renames plus UUID, Decimal and datetime conversion). The per-column plan is
+compiled once per result shape and applied straight to tuple rows, so whole
+result sets are converted without intermediate dicts or pop chains.
+"""
+
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from uuid import UUID
+
+Converter = Callable[[Any], Any]
+FieldSpec = Union[None, str, Tuple[str, Optional[Converter]]]
+
+
+def iso(value: Any) -> Any:
+    """Datetime/date to ISO 8601 text; None stays None"""
+    if value is None:
+        return None
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def to_float(value: Any) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+def _uuid_str(value: Any) -> Any:
+    return str(value) if value is not None else None
+
+
+def _scalar(value: Any) -> Any:
+    return str(value) if isinstance(value, UUID) else value
+
+
+def _scalar_decimal(value: Any) -> Any:
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+class RowMapper:
+    """
+    Maps result rows to response dicts
+
+    ``fields`` maps a column name to its output key, or to a
+    ``(key, converter)`` pair; a key of None drops the column. Columns not
+    listed keep their name. Columns without an explicit converter get one
+    picked from the first non-null value: UUIDs become strings, and Decimals
+    become floats when ``decimals_as_float`` is set. Listed columns missing
+    from a result are skipped.
+    """
+
+    __slots__ = ("_fields", "_fallback", "_decimals_as_float", "_plans")
+
+    def __init__(self, fields: Dict[str, FieldSpec], decimals_as_float: bool = False):
+        self._fields: Dict[str, Tuple[Optional[str], Optional[Converter]]] = {
+            column: spec if isinstance(spec, tuple) else (spec, None)
+            for column, spec in fields.items()
+        }
+        self._decimals_as_float = decimals_as_float
+        self._fallback = _scalar_decimal if decimals_as_float else _scalar
+        self._plans: Dict[Tuple[str, ...], Tuple[Tuple[str, int, Optional[Converter]], ...]] = {}
+
+    def _infer(self, sample: Any) -> Optional[Converter]:
+        if sample is None:
+            return self._fallback
+        if isinstance(sample, UUID):
+            return _uuid_str
+        if self._decimals_as_float and isinstance(sample, Decimal):
+            return float
+        return None
+
+    def _plan(self, keys: Tuple[str, ...], sample_row) -> Tuple[Tuple[str, int, Optional[Converter]], ...]:
+        plan = self._plans.get(keys)
+        if plan is None:
+            steps = []
+            for index, column in enumerate(keys):
+                key, convert = self._fields.get(column, (column, None))
+                if key is None:
+                    continue
+                if convert is None:
+                    convert = self._infer(sample_row[index])
+                steps.append((key, index, convert))
+            plan = tuple(steps)
+            self._plans[keys] = plan
+        return plan
+
+    def all(self, result) -> List[dict]:
+        """Map every row of a result"""
+        return self.rows(tuple(result.keys()), result.all())
+
+    def rows(self, keys: Tuple[str, ...], rows) -> List[dict]:
+        """Map rows already fetched from a result with the given keys"""
+        if not rows:
+            return []
+        plan = self._plan(keys, rows[0])
+        return [
+            {key: row[index] if convert is None else convert(row[index]) for key, index, convert in plan}
+            for row in rows
+        ]
+
+    def first(self, result) -> Optional[dict]:
+        """Map the first row of a result, or return None"""
+        keys = tuple(result.keys())
+        row = result.first()
+        if row is None:
+            return None
+        plan = self._plan(keys, row)
+        return {key: row[index] if convert is None else convert(row[index]) for key, index, convert in plan}
+
+
+ADMIN_USER = RowMapper({
+    "created_at": ("created_at", iso),
+    "updated_at": ("updated_at", iso),
+    "rank": None,
+    "exact": None,
+})
+
+COURSE = RowMapper({})
+
+# Table rows as-is, with UUIDs as strings
+RECORD = RowMapper({})
+
+PAYMENT_ACCOUNT = RowMapper({
+    "account_name": "accountName",
+    "account_number": "accountNumber",
+    "bank_name": "bankName",
+    "qr_code_url": "qrCodeUrl",
+    "is_active": "isActive",
+    "display_order": "displayOrder",
+    "created_at": ("createdAt", iso),
+    "updated_at": ("updatedAt", iso),
+})
+
+PAYMENT_REQUEST = RowMapper({
+    "user_id": "userId",
+    "course_id": "courseId",
+    "payment_account_id": "paymentAccountId",
+    "transaction_screenshot_url": "transactionScreenshotUrl",
+    "transaction_reference": "transactionReference",
+    "admin_notes": "adminNotes",
+    "rejection_reason": "rejectionReason",
+    "approved_by": "approvedBy",
+    "approved_at": ("approvedAt", iso),
+    "created_at": ("createdAt", iso),
+    "updated_at": ("updatedAt", iso),
+    "user_name": "userName",
+    "user_email": "userEmail",
+    "course_title": "courseTitle",
+    "payment_account_name": "paymentAccountName",
+    "payment_account_type": "paymentAccountType",
+})
+
+ENROLLMENT = RowMapper({
+    "user_id": "userId",
+    "course_id": "courseId",
+    "payment_request_id": "paymentRequestId",
+    "enrolled_at": ("enrolledAt", iso),
+    "completed_at": ("completedAt", iso),
+    "course_title": "courseTitle",
+    "course_description": "courseDescription",
+    "course_level": "courseLevel",
+    "course_duration": "courseDuration",
+    "course_price": ("coursePrice", to_float),
+    "course_instructor": "courseInstructor",
+    "course_duration_hours": "courseDurationHours",
+})
+
+REFERRAL_EARNING = RowMapper({
+    "referrer_id": "referrerId",
+    "referred_user_id": "referredUserId",
+    "enrollment_id": "enrollmentId",
+    "course_id": "courseId",
+    "bonus_amount": ("bonusAmount", to_float),
+    "paid_at": ("paidAt", iso),
+    "created_at": ("createdAt", iso),
+    "referred_user_name": "referredUserName",
+    "course_title": "courseTitle",
+})
+
+_WITHDRAWAL_FIELDS: Dict[str, FieldSpec] = {
+    "user_id": "userId",
+    "account_type": "accountType",
+    "account_number": "accountNumber",
+    "account_holder_name": "accountHolderName",
+    "phone_number": "phoneNumber",
+    "processed_at": ("processedAt", iso),
+    "processed_by": "processedBy",
+    "admin_notes": "adminNotes",
+    "rejection_reason": "rejectionReason",
+    "created_at": ("createdAt", iso),
+    "updated_at": None,
+}
+
+WITHDRAWAL = RowMapper(_WITHDRAWAL_FIELDS, decimals_as_float=True)
+
+WITHDRAWAL_ADMIN = RowMapper({
+    **_WITHDRAWAL_FIELDS,
+    "full_name": "userName",
+    "email": "userEmail",
+})
@@ -1,11 +1,108 @@
-from typing import List, Optional
-from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+import re
 import uuid
 from uuid import UUID
-from decimal import Decimal
-from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
-from .connection import get_async_session
+from .mappers import (
+    ADMIN_USER,
+    COURSE,
+    ENROLLMENT,
+    PAYMENT_ACCOUNT,
+    PAYMENT_REQUEST,
+    RECORD,
+    REFERRAL_EARNING,
+    WITHDRAWAL,
+    WITHDRAWAL_ADMIN,
+)
+from .catalog import CourseCatalog
+from .connection import get_async_read_session
+from .loaders import Loaders, get_loaders
+from .pagination import (
+    EXPORT_CHUNK_SIZE,
+    decode_cursor,
+    decode_rank_cursor,
+    encode_cursor,
+    encode_rank_cursor,
+    like_pattern,
+    prefix_pattern,
+)
+from .principals import principal_cache
+from .queries import QUERIES, count_query, export_query, page_query, update_query
+from .session import atomic, session_scope, commit_session, detached_session_context, on_commit, read_only
+from .token_versions import TOKEN_VERSION_SYNC_WINDOW_SECONDS, token_versions
+
+# Course durations are stored as text ("8 weeks"); duration_hours is derived on write
+HOURS_PER_WEEK = 6
+DEFAULT_COURSE_HOURS = 24
+_DURATION = re.compile(r"^\s*(\d+)\s*(weeks?|hours?|hrs?)\s*$", re.IGNORECASE)
+
+
+def duration_hours(duration: Optional[str]) -> int:
+    """
+    Learning hours for a duration such as "8 weeks" or "40 hours"
+    Any other unit (or text that does not parse) gets DEFAULT_COURSE_HOURS.
+    """
+    match = _DURATION.match(duration or "")
+    if not match:
+        return DEFAULT_COURSE_HOURS
+    amount, unit = int(match.group(1)), match.group(2).lower()
+    return amount * HOURS_PER_WEEK if unit.startswith("week") else amount
+
+# Analytics periods in days; the charts cover that many days back plus today
+ANALYTICS_PERIODS = {"7d": 7, "30d": 30, "90d": 90, "1y": 365}
+
+
+def _period_days(period: str, default: int) -> int:
+    return ANALYTICS_PERIODS.get(period, default)
+
+
+def _parse_date(value: Optional[str]) -> Optional[date]:
+    """Parse a report date (ISO 8601, optionally with a time part); raises ValueError"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value).date()
+
+
+def normalize_report_dates(start_date: Optional[str], end_date: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Canonical YYYY-MM-DD dates (None for an open end) for a report range; raises ValueError
+    Use these for cache and deduplication keys, so "2024-01-01" and
+    "2024-01-01T00:00" name the same report.
+    """
+    start = _parse_date(start_date)
+    end = _parse_date(end_date)
+    if start and end and end < start:
+        raise ValueError("end_date is before start_date")
+    return (start.isoformat() if start else None, end.isoformat() if end else None)
+
+
+def _report_range(start_date: Optional[str], end_date: Optional[str]) -> dict:
+    """
+    Bound parameters for an inclusive report date range; raises ValueError
+    Open ends are bound as date.min/date.max rather than NULL so the range
+    stays a plain index condition with the same statement for every request.
+    With no bounds at all, ``undated`` also keeps rows without a timestamp.
+    """
+    start = _parse_date(start_date)
+    end = _parse_date(end_date)
+    if start and end and end < start:
+        raise ValueError("end_date is before start_date")
+    return {
+        "start_date": start or date.min,
+        "end_date": end or date.max,
+        "undated": start is None and end is None,
+    }
+
+# pg_trgm only indexes terms of three or more characters
+TRIGRAM_MIN_LENGTH = 3
+
+# Exportable datasets: name -> (listing in queries._PAGES, row mapper)
+EXPORTS = {
+    "users": ("users.page", ADMIN_USER),
+    "payments": ("payment_requests.page", PAYMENT_REQUEST),
+    "withdrawals": ("withdrawals.page", WITHDRAWAL_ADMIN),
+}
 
 class DatabaseOperations:
     """
@@ -14,7 +111,93 @@ class DatabaseOperations:
     """
     
     def __init__(self):
-        pass
+        self.course_catalog = CourseCatalog(self._load_course_catalog)
+    
+    def loaders(self) -> Loaders:
+        """Batch loaders for courses, users and payment requests, shared across the current request"""
+        return get_loaders(self)
+    
+    async def _fetch_by_ids(self, query_name: str, mapper, ids: List[str]) -> dict:
+        async with session_scope() as session:
+            rows = await session.execute(QUERIES[query_name], {"ids": ids})
+            return {item["id"]: item for item in mapper.all(rows)}
+    
+    async def _refresh_dashboard_stats(self, session: AsyncSession, *user_ids: Optional[str]) -> None:
+        """Recompute the dashboard read model for users, inside the caller's transaction"""
+        for user_id in dict.fromkeys(filter(None, user_ids)):
+            await session.execute(QUERIES["dashboard_stats.refresh"], {"user_id": user_id})
+    
+    async def _course_student_ids(self, session: AsyncSession, course_id: str) -> List[str]:
+        rows = await session.execute(QUERIES["enrollments.user_ids_by_course"], {"course_id": course_id})
+        return [str(user_id) for user_id in rows.scalars()]
+    
+    async def _refresh_dashboard_stats_many(self, session: AsyncSession, user_ids: List[str]) -> None:
+        """Recompute the dashboard read model for many users in one statement"""
+        if user_ids:
+            await session.execute(QUERIES["dashboard_stats.refresh_many"], {"ids": user_ids})
+    
+    async def _fetch_page(self, name: str, mapper, filters: dict, limit: int,
+                          cursor: Optional[str] = None, offset: int = 0) -> dict:
+        """
+        Fetch one page of a keyset-paginated listing
+
+        Filters set to None are left out of the query. A cursor takes
+        precedence over ``offset``; raises ValueError for a malformed cursor.
+        Returns the mapped items, the total for the filters and the cursor
+        for the next page (None on the last page).
+        """
+        filters = {key: value for key, value in filters.items() if value is not None}
+        params = dict(filters, limit=limit + 1)
+        use_offset = not cursor and offset > 0
+        if cursor:
+            params["cursor_created_at"], params["cursor_id"] = decode_cursor(cursor)
+        elif use_offset:
+            params["offset"] = offset
+        
+        async with session_scope() as session:
+            result = await session.execute(
+                page_query(name, filters, after_cursor=bool(cursor), offset=use_offset), params
+            )
+            keys = tuple(result.keys())
+            rows = result.all()
+            total = (await session.execute(count_query(name, filters), filters)).scalar() or 0
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+        return {"items": mapper.rows(keys, rows), "total": int(total), "nextCursor": next_cursor}
+    
+    def export_chunks(self, dataset: str, filters: dict, cursor: Optional[str] = None,
+                      chunk_size: int = EXPORT_CHUNK_SIZE) -> AsyncIterator[List[dict]]:
+        """
+        Stream a whole dataset from EXPORTS in chunks of mapped rows, newest first
+
+        Rows are read through a server-side cursor on a dedicated replica
+        session, so memory is bounded by ``chunk_size`` whatever the table
+        size. Every row carries the ``cursor`` to resume the export after it.
+        Arguments are checked up front: raises ValueError for a malformed
+        cursor or an unknown filter, before any row is streamed.
+        """
+        name, mapper = EXPORTS[dataset]
+        filters = {key: value for key, value in filters.items() if value is not None}
+        params = dict(filters)
+        if cursor:
+            params["cursor_created_at"], params["cursor_id"] = decode_cursor(cursor)
+        statement = export_query(name, filters, after_cursor=bool(cursor))
+        return self._stream_chunks(statement, params, mapper, chunk_size)
+    
+    async def _stream_chunks(self, statement, params: dict, mapper, chunk_size: int) -> AsyncIterator[List[dict]]:
+        # The stream outlives the request, so it must not touch the request session
+        async with detached_session_context():
+            async with get_async_read_session() as session:
+                result = await session.stream(statement, params, execution_options={"yield_per": chunk_size})
+                keys = tuple(result.keys())
+                async for rows in result.partitions():
+                    items = mapper.rows(keys, rows)
+                    for item, row in zip(items, rows):
+                        item["cursor"] = encode_cursor(row.created_at, row.id)
+                    yield items
     
     # User operations
     async def create_user(self, user_data: dict) -> dict:
@@ -22,12 +205,6 @@ class DatabaseOperations:
         user_id = str(uuid.uuid4())
         referral_code = f"ELEVATE{user_id[:8].upper()}"
         
-        query = """
-        INSERT INTO users (id, full_name, email, password, referral_code, referred_by, created_at, role, total_earnings)
-        VALUES (:id, :full_name, :email, :password, :referral_code, :referred_by, :created_at, :role, :total_earnings)
-        RETURNING *
-        """
-        
         values = {
             "id": user_id,
             "full_name": user_data["fullName"],
@@ -40,10 +217,12 @@ class DatabaseOperations:
             "total_earnings": 0
         }
         
-        async with get_async_session() as session:  # type: AsyncSession
-            row = await session.execute(text(query), values)
+        async with session_scope() as session:  # type: AsyncSession
+            row = await session.execute(QUERIES["users.insert"], values)
             result = row.mappings().first()
-            await session.commit()
+            if result:
+                await session.execute(QUERIES["rollups.add_user"], {"user_id": user_id})
+            await commit_session(session)
         if result:
             result_dict = dict(result)
             # Convert UUID to string if present
@@ -52,11 +231,27 @@ class DatabaseOperations:
             return result_dict
         return None
     
+    async def get_user_credentials(self, email: str) -> Optional[dict]:
+        """
+        Get a user by email from the primary, for login
+        Not @read_only: the token_version put into new tokens must not come
+        from a lagging replica, or the fresh tokens would be rejected at once.
+        """
+        async with session_scope() as session:
+            row = await session.execute(QUERIES["users.by_email"], {"email": email})
+            result = row.mappings().first()
+        if result:
+            result_dict = dict(result)
+            if result_dict.get('id'):
+                result_dict['id'] = str(result_dict['id'])
+            return result_dict
+        return None
+    
+    @read_only
     async def get_user_by_email(self, email: str) -> Optional[dict]:
         """Get user by email"""
-        query = "SELECT * FROM users WHERE email = :email"
-        async with get_async_session() as session:
-            row = await session.execute(text(query), {"email": email})
+        async with session_scope() as session:
+            row = await session.execute(QUERIES["users.by_email"], {"email": email})
             result = row.mappings().first()
         if result:
             result_dict = dict(result)
@@ -66,11 +261,11 @@ class DatabaseOperations:
             return result_dict
         return None
     
+    @read_only
     async def get_user_by_id(self, user_id: str) -> Optional[dict]:
         """Get user by ID"""
-        query = "SELECT * FROM users WHERE id = :user_id"
-        async with get_async_session() as session:
-            row = await session.execute(text(query), {"user_id": user_id})
+        async with session_scope() as session:
+            row = await session.execute(QUERIES["users.by_id"], {"user_id": user_id})
             result = row.mappings().first()
         if result:
             result_dict = dict(result)
@@ -82,92 +277,154 @@ class DatabaseOperations:
     
     async def update_user(self, email: str, updates: dict) -> Optional[dict]:
         """Update user information"""
-        set_clause = ", ".join([f"{key} = :{key}" for key in updates.keys()])
-        query = f"UPDATE users SET {set_clause} WHERE email = :email RETURNING *"
+        query = update_query("users.update_by_email", updates.keys())
         values = {**updates, "email": email}
         
-        async with get_async_session() as session:
-            row = await session.execute(text(query), values)
+        async with session_scope() as session:
+            row = await session.execute(query, values)
             result = row.mappings().first()
-            await session.commit()
+            if result and "password" in updates:
+                await self._bump_token_version(session, result["id"])
+            await commit_session(session)
+        # Covers profile, role and password changes, including a changed email
+        on_commit(lambda: principal_cache.invalidate(email=email, user_id=result["id"] if result else None))
         return dict(result) if result else None
     
+    # Access-token revocation
+    async def _bump_token_version(self, session: AsyncSession, user_id: str) -> Optional[int]:
+        """Invalidate a user's outstanding tokens, inside the caller's transaction"""
+        row = await session.execute(QUERIES["users.bump_token_version"], {"user_id": user_id})
+        version = row.scalar()
+        if version is not None:
+            on_commit(lambda: token_versions.set(user_id, version))
+        return version
+    
+    async def revoke_user_tokens(self, user_id: str) -> bool:
+        """Invalidate every access and refresh token issued to a user so far"""
+        async with session_scope() as session:
+            version = await self._bump_token_version(session, user_id)
+            await commit_session(session)
+        return version is not None
+    
+    async def sync_token_versions(self, full: bool) -> List[tuple]:
+        """(user ID, token version) pairs for every bumped user, or only those changed recently"""
+        async with detached_session_context():
+            async with session_scope() as session:
+                if full:
+                    rows = await session.execute(QUERIES["users.token_versions"])
+                else:
+                    rows = await session.execute(
+                        QUERIES["users.token_versions_recent"],
+                        {"window": TOKEN_VERSION_SYNC_WINDOW_SECONDS},
+                    )
+                return [(str(row.id), row.token_version) for row in rows]
+    
+    # Refresh token store
+    async def create_refresh_token(self, token_id: str, user_id: str, email: str, expires_at: datetime) -> None:
+        """Record an issued refresh token"""
+        async with session_scope() as session:
+            await session.execute(QUERIES["refresh_tokens.insert"], {
+                "token_id": token_id,
+                "user_id": user_id,
+                "email": email,
+                "created_at": datetime.utcnow(),
+                "expires_at": expires_at
+            })
+            await commit_session(session)
+    
+    async def get_refresh_token(self, token_id: str) -> Optional[dict]:
+        """Get a refresh token record from the primary, so a revocation is never missed"""
+        async with session_scope() as session:
+            row = await session.execute(QUERIES["refresh_tokens.by_id"], {"token_id": token_id})
+            return RECORD.first(row)
+    
+    async def touch_refresh_token(self, token_id: str, last_used: datetime) -> None:
+        async with session_scope() as session:
+            await session.execute(QUERIES["refresh_tokens.touch"], {"token_id": token_id, "last_used": last_used})
+            await commit_session(session)
+    
+    async def revoke_refresh_token(self, token_id: str) -> bool:
+        async with session_scope() as session:
+            result = await session.execute(QUERIES["refresh_tokens.revoke"], {"token_id": token_id})
+            await commit_session(session)
+            return result.rowcount and result.rowcount > 0
+    
+    async def revoke_user_refresh_tokens(self, user_id: str) -> List[str]:
+        """Revoke a user's live refresh tokens; returns the revoked token IDs"""
+        async with session_scope() as session:
+            rows = await session.execute(QUERIES["refresh_tokens.revoke_user"], {"user_id": user_id})
+            token_ids = [row.token_id for row in rows]
+            await commit_session(session)
+        return token_ids
+    
+    @read_only
+    async def get_active_refresh_tokens(self, user_id: str) -> List[dict]:
+        async with session_scope() as session:
+            rows = await session.execute(QUERIES["refresh_tokens.active_by_user"], {"user_id": user_id})
+            return RECORD.all(rows)
+    
+    async def delete_expired_refresh_tokens(self, batch_size: int = 1000) -> int:
+        """Delete expired refresh tokens in batches, committing each; returns how many were deleted"""
+        deleted = 0
+        async with detached_session_context():
+            while True:
+                async with session_scope() as session:
+                    result = await session.execute(
+                        QUERIES["refresh_tokens.delete_expired"], {"batch_size": batch_size}
+                    )
+                    await commit_session(session)
+                deleted += result.rowcount or 0
+                if (result.rowcount or 0) < batch_size:
+                    return deleted
+    
     # Course operations
-    async def get_all_courses(self) -> List[dict]:
-        """Get all courses"""
-        query = "SELECT * FROM courses ORDER BY created_at DESC"
-        async with get_async_session() as session:
-            rows = await session.execute(text(query))
-            courses = []
-            for row in rows.mappings().all():
-                course_dict = dict(row)
-                # Convert UUID to string if present
-                if 'id' in course_dict and course_dict['id']:
+    async def _load_course_catalog(self) -> List[dict]:
+        """
+        Read the courses table for the course catalog
+        Always from the primary and outside any request session, so a reload
+        after a committed write sees it.
+        """
+        async with detached_session_context():
+            async with session_scope() as session:
+                rows = await session.execute(QUERIES["courses.all"])
+                courses = []
+                for row in rows.mappings().all():
+                    course_dict = dict(row)
                     course_dict['id'] = str(course_dict['id'])
-                courses.append(course_dict)
-            return courses
+                    courses.append(course_dict)
+                return courses
     
-    async def get_course_by_id(self, course_id: str) -> Optional[dict]:
-        """Get course by ID"""
-        query = "SELECT * FROM courses WHERE id = :course_id"
-        async with get_async_session() as session:
-            row = await session.execute(text(query), {"course_id": course_id})
-            result = row.mappings().first()
-        if result:
-            result_dict = dict(result)
-            # Convert UUID to string if present
-            if 'id' in result_dict and result_dict['id']:
-                result_dict['id'] = str(result_dict['id'])
-            return result_dict
-        return None
+    def _invalidate_course_catalog(self) -> None:
+        on_commit(self.course_catalog.invalidate)
     
-    async def create_course(self, course_data: dict) -> dict:
-        """Create a new course"""
-        course_id = str(uuid.uuid4())
-        
-        query = """
-        INSERT INTO courses (id, title, description, image, price, duration, students, rating, level, instructor, created_at)
-        VALUES (:id, :title, :description, :image, :price, :duration, :students, :rating, :level, :instructor, :created_at)
-        RETURNING *
-        """
-        
-        values = {
-            "id": course_id,
-            "students": 0,
-            "rating": 0.0,
-            "created_at": datetime.utcnow(),
-            **course_data
-        }
-        
-        async with get_async_session() as session:
-            row = await session.execute(text(query), values)
-            result = row.mappings().first()
-            await session.commit()
-        return dict(result) if result else None
+    async def get_all_courses(self) -> List[dict]:
+        """Get all courses, from the in-memory catalog"""
+        return await self.course_catalog.all()
     
-    async def update_course(self, course_id: str, updates: dict) -> Optional[dict]:
-        """Update course information"""
-        set_clause = ", ".join([f"{key} = :{key}" for key in updates.keys()])
-        query = f"UPDATE courses SET {set_clause} WHERE id = :course_id RETURNING *"
-        values = {**updates, "course_id": course_id}
-        
-        async with get_async_session() as session:
-            row = await session.execute(text(query), values)
-            result = row.mappings().first()
-            await session.commit()
-        return dict(result) if result else None
+    @read_only
+    async def get_courses_page(self, limit: int, cursor: Optional[str] = None, offset: int = 0,
+                               search: Optional[str] = None, level: Optional[str] = None,
+                               is_active: Optional[bool] = None) -> dict:
+        """Get one page of courses, newest first, filtered in SQL"""
+        return await self._fetch_page("courses.page", COURSE, {
+            "search": like_pattern(search),
+            "level": level,
+            "is_active": is_active,
+        }, limit, cursor, offset)
+    
+    async def get_course_by_id(self, course_id: str) -> Optional[dict]:
+        """Get course by ID, from the in-memory catalog"""
+        return await self.course_catalog.get(course_id)
+    
+    async def get_courses_by_ids(self, course_ids: List[str]) -> dict:
+        """Get courses keyed by ID from the in-memory catalog; missing IDs are left out"""
+        return await self.course_catalog.get_many(course_ids)
     
     # Enrollment operations
     async def create_enrollment(self, user_id: str, enrollment_data: dict) -> dict:
         """Create a new enrollment"""
         enrollment_id = str(uuid.uuid4())
         
-        query = """
-        INSERT INTO enrollments (id, user_id, course_id, enrolled_at, progress, status)
-        VALUES (:id, :user_id, :course_id, :enrolled_at, :progress, :status)
-        RETURNING *
-        """
-        
         values = {
             "id": enrollment_id,
             "user_id": user_id,
@@ -177,41 +434,24 @@ class DatabaseOperations:
             "status": "active"
         }
         
-        async with get_async_session() as session:
-            row = await session.execute(text(query), values)
+        async with session_scope() as session:
+            row = await session.execute(QUERIES["enrollments.insert"], values)
             result = row.mappings().first()
-        if result:
-            await session.execute(
-                text("UPDATE courses SET students = students + 1 WHERE id = :course_id"),
-                {"course_id": enrollment_data["course_id"]},
-            )
-        await session.commit()
+            if result:
+                await session.execute(
+                    QUERIES["courses.increment_students"],
+                    {"course_id": enrollment_data["course_id"]},
+                )
+                self._invalidate_course_catalog()
+                await session.execute(QUERIES["rollups.add_enrollment"], {"enrollment_id": enrollment_id})
+                await self._refresh_dashboard_stats(session, user_id)
+            await commit_session(session)
         return dict(result) if result else None
     
-    async def get_user_enrollments(self, user_id: str) -> List[dict]:
-        """Get user's enrollments with course details"""
-        query = """
-        SELECT e.*, c.title, c.description, c.image, c.instructor, c.duration
-        FROM enrollments e
-        JOIN courses c ON e.course_id = c.id
-        WHERE e.user_id = :user_id
-        ORDER BY e.enrolled_at DESC
-        """
-        async with get_async_session() as session:
-            rows = await session.execute(text(query), {"user_id": user_id})
-            return [dict(m) for m in rows.mappings().all()]
-    
     async def update_enrollment_progress(self, user_id: str, enrollment_id: str, progress: int) -> Optional[dict]:
         """Update enrollment progress"""
         status = "completed" if progress >= 100 else "active"
         
-        query = """
-        UPDATE enrollments 
-        SET progress = :progress, status = :status 
-        WHERE id = :enrollment_id AND user_id = :user_id 
-        RETURNING *
-        """
-        
         values = {
             "progress": progress,
             "status": status,
@@ -219,10 +459,12 @@ class DatabaseOperations:
             "user_id": user_id
         }
         
-        async with get_async_session() as session:
-            row = await session.execute(text(query), values)
+        async with session_scope() as session:
+            row = await session.execute(QUERIES["enrollments.update_progress"], values)
             result = row.mappings().first()
-            await session.commit()
+            if result:
+                await self._refresh_dashboard_stats(session, user_id)
+            await commit_session(session)
         return dict(result) if result else None
     
     # Payment method operations
@@ -231,18 +473,11 @@ class DatabaseOperations:
         method_id = str(uuid.uuid4())
         
         # Check if this is the first payment method (make it default)
-        count_query = "SELECT COUNT(*) as count FROM payment_methods WHERE user_id = :user_id"
-        async with get_async_session() as session:
-            count_row = await session.execute(text(count_query), {"user_id": user_id})
+        async with session_scope() as session:
+            count_row = await session.execute(QUERIES["payment_methods.count_for_user"], {"user_id": user_id})
             count_result = count_row.mappings().first()
             is_default = (count_result or {}).get("count", 0) == 0
         
-        query = """
-        INSERT INTO payment_methods (id, user_id, type, account_number, holder_name, is_default, created_at)
-        VALUES (:id, :user_id, :type, :account_number, :holder_name, :is_default, :created_at)
-        RETURNING *
-        """
-        
         values = {
             "id": method_id,
             "user_id": user_id,
@@ -251,10 +486,10 @@ class DatabaseOperations:
             **method_data
         }
         
-        async with get_async_session() as session:
-            row = await session.execute(text(query), values)
+        async with session_scope() as session:
+            row = await session.execute(QUERIES["payment_methods.insert"], values)
             result = row.mappings().first()
-            await session.commit()
+            await commit_session(session)
         
         if result:
             result_dict = dict(result)
@@ -276,11 +511,11 @@ class DatabaseOperations:
             }
         return None
     
+    @read_only
     async def get_user_payment_methods(self, user_id: str) -> List[dict]:
         """Get user's payment methods"""
-        query = "SELECT * FROM payment_methods WHERE user_id = :user_id ORDER BY created_at DESC"
-        async with get_async_session() as session:
-            rows = await session.execute(text(query), {"user_id": user_id})
+        async with session_scope() as session:
+            rows = await session.execute(QUERIES["payment_methods.by_user"], {"user_id": user_id})
             results = []
             for row in rows.mappings().all():
                 result_dict = dict(row)
@@ -304,131 +539,54 @@ class DatabaseOperations:
     
     async def delete_payment_method(self, user_id: str, method_id: str) -> bool:
         """Delete a payment method"""
-        query = "DELETE FROM payment_methods WHERE id = :method_id AND user_id = :user_id"
-        async with get_async_session() as session:
-            row = await session.execute(text(query), {"method_id": method_id, "user_id": user_id})
-            await session.commit()
+        async with session_scope() as session:
+            row = await session.execute(QUERIES["payment_methods.delete"], {"method_id": method_id, "user_id": user_id})
+            await commit_session(session)
             return row.rowcount and row.rowcount > 0
     
     async def set_default_payment_method(self, user_id: str, method_id: str) -> bool:
         """Set a payment method as default"""
         # First, unset all defaults for this user
-        async with get_async_session() as session:
+        async with session_scope() as session:
             await session.execute(
-                text("UPDATE payment_methods SET is_default = false WHERE user_id = :user_id"),
+                QUERIES["payment_methods.clear_default"],
                 {"user_id": user_id},
             )
             result = await session.execute(
-                text("UPDATE payment_methods SET is_default = true WHERE id = :method_id AND user_id = :user_id"),
+                QUERIES["payment_methods.set_default"],
                 {"method_id": method_id, "user_id": user_id},
             )
-            await session.commit()
+            await commit_session(session)
             return result.rowcount and result.rowcount > 0
     
     # Payment request operations
-    async def create_payment_request(self, user_id: str, request_data: dict) -> dict:
-        """Create a new payment request"""
-        request_id = str(uuid.uuid4())
-        
-        query = """
-        INSERT INTO payment_requests (id, user_id, course_id, payment_account_id, amount, status, created_at)
-        VALUES (:id, :user_id, :course_id, :payment_account_id, :amount, :status, :created_at)
-        RETURNING *
-        """
-        
-        values = {
-            "id": request_id,
-            "user_id": user_id,
-            "status": "pending",
-            "created_at": datetime.utcnow(),
-            **request_data
-        }
-        
-        async with get_async_session() as session:
-            row = await session.execute(text(query), values)
-            result = row.mappings().first()
-            await session.commit()
-        
-        if result:
-            result_dict = dict(result)
-            if 'id' in result_dict and result_dict['id']:
-                result_dict['id'] = str(result_dict['id'])
-            # Convert database field names to API response format
-            return {
-                "id": str(result_dict['id']),
-                "userId": result_dict['user_id'],
-                "courseId": result_dict['course_id'],
-                "paymentAccountId": result_dict['payment_account_id'],
-                "amount": float(result_dict['amount']),
-                "status": result_dict['status'],
-                "createdAt": result_dict['created_at'].isoformat()
-            }
-        return None
-    
+    @read_only
     async def get_payment_requests(self, status: str = None) -> List[dict]:
         """Get payment requests with optional status filter"""
         if status:
-            query = """
-            SELECT pr.*, u.full_name, u.email, c.title as course_title, 
-                   apa.type as payment_type, apa.account_number
-            FROM payment_requests pr
-            JOIN users u ON pr.user_id = u.id
-            JOIN courses c ON pr.course_id = c.id
-            JOIN admin_payment_accounts apa ON pr.payment_account_id = apa.id
-            WHERE pr.status = :status
-            ORDER BY pr.created_at DESC
-            """
+            query = QUERIES["payment_requests.list_by_status"]
             params = {"status": status}
         else:
-            query = """
-            SELECT pr.*, u.full_name, u.email, c.title as course_title, 
-                   apa.type as payment_type, apa.account_number
-            FROM payment_requests pr
-            JOIN users u ON pr.user_id = u.id
-            JOIN courses c ON pr.course_id = c.id
-            JOIN admin_payment_accounts apa ON pr.payment_account_id = apa.id
-            ORDER BY pr.created_at DESC
-            """
+            query = QUERIES["payment_requests.list"]
             params = {}
         
-        async with get_async_session() as session:
-            rows = await session.execute(text(query), params)
-            results = []
-            for row in rows.mappings().all():
-                result_dict = dict(row)
-                
-                # UNIVERSAL UUID CONVERSION - Convert ALL UUIDs to strings immediately
-                result_dict = {
-                    key: str(value) if isinstance(value, UUID) else value
-                    for key, value in result_dict.items()
-                }
-                
-                # Convert datetime to string (after UUID conversion)
-                if 'created_at' in result_dict and result_dict['created_at']:
-                    if hasattr(result_dict['created_at'], 'isoformat'):
-                        result_dict['created_at'] = result_dict['created_at'].isoformat()
-                    else:
-                        result_dict['created_at'] = str(result_dict['created_at'])
-                if 'approved_at' in result_dict and result_dict['approved_at']:
-                    if hasattr(result_dict['approved_at'], 'isoformat'):
-                        result_dict['approved_at'] = result_dict['approved_at'].isoformat()
-                    else:
-                        result_dict['approved_at'] = str(result_dict['approved_at'])
-                
-                results.append(result_dict)
-            return results
+        async with session_scope() as session:
+            rows = await session.execute(query, params)
+            return PAYMENT_REQUEST.all(rows)
+    
+    @read_only
+    async def get_payment_requests_page(self, limit: int, cursor: Optional[str] = None,
+                                        status: Optional[str] = None) -> dict:
+        """Get one page of payment requests, newest first"""
+        return await self._fetch_page(
+            "payment_requests.page", PAYMENT_REQUEST, {"status": status}, limit, cursor
+        )
     
     async def approve_payment_request(self, request_id: str, admin_id: str, admin_notes: str = None) -> bool:
         """Approve a payment request and create enrollment"""
-        async with get_async_session() as session:
+        async with session_scope() as session, atomic(session) as savepoint:
             # Update payment request status
-            update_query = """
-            UPDATE payment_requests 
-            SET status = 'approved', approved_at = :approved_at, admin_notes = :admin_notes, approved_by = :admin_id
-            WHERE id = :request_id
-            """
-            
-            await session.execute(text(update_query), {
+            await session.execute(QUERIES["payment_requests.mark_approved"], {
                 "request_id": request_id,
                 "approved_at": datetime.utcnow(),
                 "admin_id": admin_id,
@@ -436,12 +594,11 @@ class DatabaseOperations:
             })
             
             # Get payment request details
-            get_query = "SELECT * FROM payment_requests WHERE id = :request_id"
-            result = await session.execute(text(get_query), {"request_id": request_id})
+            result = await session.execute(QUERIES["payment_requests.by_id"], {"request_id": request_id})
             payment_request = result.mappings().first()
             
             if not payment_request:
-                await session.rollback()
+                await savepoint.rollback()
                 return False
             
             # Create enrollment
@@ -454,7 +611,7 @@ class DatabaseOperations:
             enrollment = await self.create_enrollment(payment_request["user_id"], enrollment_data)
             
             if not enrollment:
-                await session.rollback()
+                await savepoint.rollback()
                 return False
             
             # TODO: Implement referral system when referrals table is available
@@ -484,45 +641,46 @@ class DatabaseOperations:
             
             # await session.execute(text(earnings_query), {"user_id": payment_request["user_id"]})
             
-            await session.commit()
+            await commit_session(session)
             return True
-    
-    async def reject_payment_request(self, request_id: str, admin_id: str, rejection_reason: str) -> bool:
-        """Reject a payment request"""
-        query = """
-        UPDATE payment_requests 
-        SET status = 'rejected', approved_at = :rejected_at, rejection_reason = :rejection_reason, approved_by = :admin_id
-        WHERE id = :request_id
-        """
-        
-        async with get_async_session() as session:
-            result = await session.execute(text(query), {
-                "request_id": request_id,
-                "rejected_at": datetime.utcnow(),
-                "admin_id": admin_id,
-                "rejection_reason": rejection_reason
-            })
-            await session.commit()
-            return result.rowcount and result.rowcount > 0
 
     # Admin operations
+    @read_only
     async def get_admin_by_email(self, email: str) -> Optional[dict]:
         """Get admin user by email"""
-        query = "SELECT * FROM admin_users WHERE email = :email AND is_active = TRUE"
-        async with get_async_session() as session:
-            row = await session.execute(text(query), {"email": email})
+        async with session_scope() as session:
+            row = await session.execute(QUERIES["admin_users.active_by_email"], {"email": email})
             result = row.mappings().first()
         return dict(result) if result else None
     
     async def update_admin_last_login(self, admin_id: str) -> bool:
         """Update admin last login time"""
-        query = "UPDATE admin_users SET last_login = :last_login WHERE id = :admin_id"
-        async with get_async_session() as session:
-            result = await session.execute(text(query), {
+        async with session_scope() as session:
+            result = await session.execute(QUERIES["admin_users.touch_last_login"], {
                 "admin_id": admin_id,
                 "last_login": datetime.utcnow()
             })
-            await session.commit()
+            await commit_session(session)
+        on_commit(lambda: principal_cache.invalidate(user_id=admin_id))
+        return result.rowcount and result.rowcount > 0
+
+    async def rehash_password(self, table: str, account_id: str, old_hash: str, new_hash: str) -> bool:
+        """
+        Replace a user's or admin's password hash with a stronger one
+        The password itself is unchanged, so unlike update_user this does not
+        bump token_version or sign the account out. It commits on its own
+        session, so a failed upgrade cannot roll back the login request.
+        """
+        if table not in ("users", "admin_users"):
+            raise ValueError(f"Unknown account table: {table}")
+        async with detached_session_context():
+            async with session_scope() as session:
+                result = await session.execute(QUERIES[f"{table}.rehash_password"], {
+                    "account_id": account_id,
+                    "old_hash": old_hash,
+                    "new_hash": new_hash
+                })
+                await commit_session(session)
         return result.rowcount and result.rowcount > 0
 
     # Referral operations (updated to work with payment approval)
@@ -530,12 +688,6 @@ class DatabaseOperations:
         """Create a new referral (status pending until payment approved)"""
         referral_id = str(uuid.uuid4())
         
-        query = """
-        INSERT INTO referrals (id, referrer_id, name, email, status, reward_earned, date_referred)
-        VALUES (:id, :referrer_id, :name, :email, :status, :reward_earned, :date_referred)
-        RETURNING *
-        """
-        
         values = {
             "id": referral_id,
             "referrer_id": referrer_id,
@@ -545,18 +697,19 @@ class DatabaseOperations:
             **referral_data
         }
         
-        async with get_async_session() as session:
-            row = await session.execute(text(query), values)
+        async with session_scope() as session:
+            row = await session.execute(QUERIES["referrals.insert"], values)
             result = row.mappings().first()
-            await session.commit()
+            await self._refresh_dashboard_stats(session, referrer_id)
+            await commit_session(session)
         
         return dict(result) if result else None
     
+    @read_only
     async def get_user_referrals(self, user_id: str) -> List[dict]:
         """Get user's referrals"""
-        query = "SELECT * FROM referrals WHERE referrer_id = :user_id ORDER BY date_referred DESC"
-        async with get_async_session() as session:
-            rows = await session.execute(text(query), {"user_id": user_id})
+        async with session_scope() as session:
+            rows = await session.execute(QUERIES["referrals.by_referrer"], {"user_id": user_id})
             results = []
             for row in rows.mappings().all():
                 result_dict = dict(row)
@@ -578,41 +731,36 @@ class DatabaseOperations:
                 result_dict['rewardEarned'] = result_dict.pop('reward_earned', 0)
                 result_dict['referredUserName'] = result_dict.pop('name', 'Unknown User')
                 
-                # Add completedAt if referral is completed
-                if result_dict.get('status') == 'completed' and result_dict.get('payment_request_id'):
-                    # Get the approval date from the payment request
-                    query_approval_date = """
-                    SELECT approved_at FROM payment_requests WHERE id = :payment_request_id
-                    """
-                    approval_row = await session.execute(text(query_approval_date), {
-                        "payment_request_id": result_dict['payment_request_id']
-                    })
-                    approval_result = approval_row.mappings().first()
-                    if approval_result and approval_result['approved_at']:
-                        result_dict['completedAt'] = approval_result['approved_at'].isoformat()
-                
                 # Remove fields not needed in response
                 result_dict.pop('referrer_id', None)
                 result_dict.pop('date_referred', None)
-                result_dict.pop('payment_request_id', None)
                 
                 results.append(result_dict)
-            return results
+        
+        # Completed referrals take completedAt from their payment's approval date, in one batch
+        completed = [r for r in results if r.get('status') == 'completed' and r.get('payment_request_id')]
+        payments = await self.loaders().payment_requests.load_many(r['payment_request_id'] for r in completed)
+        for referral, payment in zip(completed, payments):
+            if payment and payment['approved_at']:
+                referral['completedAt'] = payment['approved_at'].isoformat()
+        for referral in results:
+            referral.pop('payment_request_id', None)
+        return results
     
+    @read_only
     async def find_user_by_referral_code(self, referral_code: str) -> Optional[dict]:
         """Find user by referral code"""
-        query = "SELECT * FROM users WHERE referral_code = :referral_code"
-        async with get_async_session() as session:
-            row = await session.execute(text(query), {"referral_code": referral_code})
+        async with session_scope() as session:
+            row = await session.execute(QUERIES["users.by_referral_code"], {"referral_code": referral_code})
             result = row.mappings().first()
         return dict(result) if result else None
 
     # User management operations
+    @read_only
     async def get_all_users(self) -> List[dict]:
         """Get all users"""
-        query = "SELECT * FROM users ORDER BY created_at DESC"
-        async with get_async_session() as session:
-            rows = await session.execute(text(query))
+        async with session_scope() as session:
+            rows = await session.execute(QUERIES["users.all"])
             results = []
             for row in rows.mappings().all():
                 result_dict = dict(row)
@@ -624,30 +772,73 @@ class DatabaseOperations:
                 results.append(result_dict)
             return results
 
+    @read_only
+    async def get_users_page(self, limit: int, cursor: Optional[str] = None, offset: int = 0,
+                             is_active: Optional[bool] = None) -> dict:
+        """Get one page of users, newest first, filtered in SQL"""
+        return await self._fetch_page(
+            "users.page", ADMIN_USER, {"is_active": is_active}, limit, cursor, offset
+        )
+
+    @read_only
+    async def search_users(self, query: str, limit: int, cursor: Optional[str] = None,
+                           offset: int = 0, is_active: Optional[bool] = None) -> dict:
+        """
+        Look users up by name or email, best matches first
+
+        Substring matches are ranked by trigram similarity with an exact
+        email match on top; queries shorter than TRIGRAM_MIN_LENGTH fall back
+        to a prefix match. Returns a page like _fetch_page: the cursor pages
+        by (exact, rank, id) and takes precedence over ``offset``; raises
+        ValueError for a malformed cursor.
+        """
+        query = query.strip()
+        params = {
+            "query": query, "is_active": is_active, "limit": limit + 1, "offset": 0,
+            "cursor_exact": None, "cursor_rank": None, "cursor_id": None,
+        }
+        if cursor:
+            params["cursor_exact"], params["cursor_rank"], params["cursor_id"] = decode_rank_cursor(cursor)
+        else:
+            params["offset"] = offset
+        if len(query) < TRIGRAM_MIN_LENGTH:
+            name = "users.search_prefix"
+            params["prefix"] = prefix_pattern(query)
+        else:
+            name = "users.search"
+            params["pattern"] = like_pattern(query)
+        
+        async with session_scope() as session:
+            result = await session.execute(QUERIES[name], params)
+            keys = tuple(result.keys())
+            rows = result.all()
+            total = (await session.execute(QUERIES[f"{name}_count"], params)).scalar() or 0
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_rank_cursor(rows[-1].exact, rows[-1].rank, rows[-1].id)
+        return {"items": ADMIN_USER.rows(keys, rows), "total": int(total), "nextCursor": next_cursor}
+
     async def update_user_status(self, user_id: str, is_active: bool) -> bool:
         """Update user active status"""
-        query = "UPDATE users SET is_active = :is_active WHERE id = :user_id"
-        async with get_async_session() as session:
-            result = await session.execute(text(query), {
+        async with session_scope() as session:
+            result = await session.execute(QUERIES["users.set_active"], {
                 "user_id": user_id,
                 "is_active": is_active
             })
-            await session.commit()
-            return result.rowcount and result.rowcount > 0
+            if not is_active:
+                # Deactivation signs the user out everywhere
+                await self._bump_token_version(session, user_id)
+            await commit_session(session)
+        on_commit(lambda: principal_cache.invalidate(user_id=user_id))
+        return result.rowcount and result.rowcount > 0
 
     # Course management operations
     async def create_course(self, course_data: dict) -> dict:
         """Create a new course"""
         course_id = str(uuid.uuid4())
         
-        query = """
-        INSERT INTO courses (id, title, description, instructor, price, duration, level, 
-                           students, rating, image, created_at, updated_at)
-        VALUES (:id, :title, :description, :instructor, :price, :duration, :level, 
-                :students, :rating, :image, :created_at, :updated_at)
-        RETURNING *
-        """
-        
         values = {
             "id": course_id,
             "students": 0,
@@ -657,11 +848,13 @@ class DatabaseOperations:
             "updated_at": datetime.utcnow(),
             **course_data
         }
+        values["duration_hours"] = duration_hours(values.get("duration"))
         
-        async with get_async_session() as session:
-            row = await session.execute(text(query), values)
+        async with session_scope() as session:
+            row = await session.execute(QUERIES["courses.insert"], values)
             result = row.mappings().first()
-            await session.commit()
+            await commit_session(session)
+        self._invalidate_course_catalog()
         
         if result:
             result_dict = dict(result)
@@ -680,56 +873,52 @@ class DatabaseOperations:
         # Add updated_at timestamp
         course_data["updated_at"] = datetime.utcnow()
         
-        # Build dynamic update query
-        set_clauses = []
-        values = {"course_id": course_id}
-        
-        for key, value in course_data.items():
-            if key != "id":  # Don't update the ID
-                set_clauses.append(f"{key} = :{key}")
-                values[key] = value
-        
-        if not set_clauses:
-            return False
-        
-        query = f"UPDATE courses SET {', '.join(set_clauses)} WHERE id = :course_id"
+        # Never update the ID; other columns are checked against the whitelist
+        updates = {key: value for key, value in course_data.items() if key != "id"}
+        if "duration" in updates:
+            updates["duration_hours"] = duration_hours(updates["duration"])
+        query = update_query("courses.update", updates.keys())
+        values = {**updates, "course_id": course_id}
         
-        async with get_async_session() as session:
-            result = await session.execute(text(query), values)
-            await session.commit()
-            return result.rowcount and result.rowcount > 0
+        async with session_scope() as session:
+            result = await session.execute(query, values)
+            if "duration_hours" in updates:
+                # Enrolled students' hours learned follow the course length
+                await self._refresh_dashboard_stats_many(
+                    session, await self._course_student_ids(session, course_id)
+                )
+            await commit_session(session)
+        self._invalidate_course_catalog()
+        return result.rowcount and result.rowcount > 0
 
     async def delete_course(self, course_id: str) -> bool:
         """Delete a course"""
-        query = "DELETE FROM courses WHERE id = :course_id"
-        async with get_async_session() as session:
-            result = await session.execute(text(query), {"course_id": course_id})
-            await session.commit()
-            return result.rowcount and result.rowcount > 0
+        async with session_scope() as session:
+            # Collected first: the enrollments may go with the course
+            student_ids = await self._course_student_ids(session, course_id)
+            result = await session.execute(QUERIES["courses.delete"], {"course_id": course_id})
+            await self._refresh_dashboard_stats_many(session, student_ids)
+            await commit_session(session)
+        self._invalidate_course_catalog()
+        return result.rowcount and result.rowcount > 0
 
     async def update_course_status(self, course_id: str, is_active: bool) -> bool:
         """Update course active status"""
-        query = "UPDATE courses SET is_active = :is_active, updated_at = :updated_at WHERE id = :course_id"
-        async with get_async_session() as session:
-            result = await session.execute(text(query), {
+        async with session_scope() as session:
+            result = await session.execute(QUERIES["courses.set_active"], {
                 "course_id": course_id,
                 "is_active": is_active,
                 "updated_at": datetime.utcnow()
             })
-            await session.commit()
-            return result.rowcount and result.rowcount > 0
+            await commit_session(session)
+        self._invalidate_course_catalog()
+        return result.rowcount and result.rowcount > 0
 
+    @read_only
     async def get_course_enrollments(self, course_id: str) -> List[dict]:
         """Get course enrollments"""
-        query = """
-        SELECT e.*, u.full_name as user_name, u.email as user_email
-        FROM enrollments e
-        JOIN users u ON e.user_id = u.id
-        WHERE e.course_id = :course_id
-        ORDER BY e.enrolled_at DESC
-        """
-        async with get_async_session() as session:
-            rows = await session.execute(text(query), {"course_id": course_id})
+        async with session_scope() as session:
+            rows = await session.execute(QUERIES["enrollments.by_course"], {"course_id": course_id})
             results = []
             for row in rows.mappings().all():
                 result_dict = dict(row)
@@ -745,31 +934,15 @@ class DatabaseOperations:
                 results.append(result_dict)
             return results
 
+    @read_only
     async def get_course_stats(self, course_id: str) -> dict:
         """Get course statistics"""
-        # Get total enrollments
-        enrollments_query = "SELECT COUNT(*) as total_enrollments FROM enrollments WHERE course_id = :course_id"
-        
-        # Get active enrollments
-        active_enrollments_query = "SELECT COUNT(*) as active_enrollments FROM enrollments WHERE course_id = :course_id AND status = 'active'"
-        
-        # Get completed enrollments
-        completed_enrollments_query = "SELECT COUNT(*) as completed_enrollments FROM enrollments WHERE course_id = :course_id AND status = 'completed'"
-        
-        # Get total revenue
-        revenue_query = """
-        SELECT COALESCE(SUM(c.price), 0) as total_revenue
-        FROM enrollments e
-        JOIN courses c ON e.course_id = c.id
-        WHERE e.course_id = :course_id AND e.payment_status = 'approved'
-        """
-        
-        async with get_async_session() as session:
+        async with session_scope() as session:
             # Execute all queries
-            total_enrollments = await session.execute(text(enrollments_query), {"course_id": course_id})
-            active_enrollments = await session.execute(text(active_enrollments_query), {"course_id": course_id})
-            completed_enrollments = await session.execute(text(completed_enrollments_query), {"course_id": course_id})
-            revenue = await session.execute(text(revenue_query), {"course_id": course_id})
+            total_enrollments = await session.execute(QUERIES["courses.enrollment_count"], {"course_id": course_id})
+            active_enrollments = await session.execute(QUERIES["courses.active_enrollment_count"], {"course_id": course_id})
+            completed_enrollments = await session.execute(QUERIES["courses.completed_enrollment_count"], {"course_id": course_id})
+            revenue = await session.execute(QUERIES["courses.revenue"], {"course_id": course_id})
             
             return {
                 "total_enrollments": total_enrollments.scalar() or 0,
@@ -778,189 +951,108 @@ class DatabaseOperations:
                 "total_revenue": float(revenue.scalar() or 0)
             }
 
+    @read_only
     async def get_course_categories(self) -> List[str]:
         """Get all unique course categories (using level as category)"""
-        query = "SELECT DISTINCT level FROM courses WHERE level IS NOT NULL ORDER BY level"
-        async with get_async_session() as session:
-            rows = await session.execute(text(query))
+        async with session_scope() as session:
+            rows = await session.execute(QUERIES["courses.levels"])
             return [row[0] for row in rows.fetchall()]
 
     # Analytics operations
+    @read_only
+    async def get_admin_stats(self) -> dict:
+        """Get payment and user counters for the admin dashboard"""
+        async with session_scope() as session:
+            row = await session.execute(QUERIES["admin.stats"])
+            stats = row.mappings().first()
+        
+        total_payments = stats["pending_payments"] + stats["approved_payments"] + stats["rejected_payments"]
+        return {
+            "pendingPayments": stats["pending_payments"],
+            "approvedPayments": stats["approved_payments"],
+            "rejectedPayments": stats["rejected_payments"],
+            "totalPayments": total_payments,
+            "totalUsers": stats["total_users"],
+            "activeUsers": stats["active_users"],
+            "inactiveUsers": stats["total_users"] - stats["active_users"]
+        }
+
+    @read_only
     async def get_analytics_overview(self) -> dict:
         """Get comprehensive analytics overview"""
-        # Get total counts
-        total_users_query = "SELECT COUNT(*) FROM users"
-        total_courses_query = "SELECT COUNT(*) FROM courses"
-        total_enrollments_query = "SELECT COUNT(*) FROM enrollments"
-        total_revenue_query = """
-        SELECT COALESCE(SUM(c.price), 0) 
-        FROM enrollments e 
-        JOIN courses c ON e.course_id = c.id 
-        WHERE e.payment_status = 'approved'
-        """
-        
-        # Get recent activity (last 30 days)
-        recent_users_query = """
-        SELECT COUNT(*) FROM users 
-        WHERE created_at >= NOW() - INTERVAL '30 days'
-        """
-        recent_enrollments_query = """
-        SELECT COUNT(*) FROM enrollments 
-        WHERE enrolled_at >= NOW() - INTERVAL '30 days'
+        async with session_scope() as session:
+            row = await session.execute(QUERIES["analytics.overview"])
+            overview = row.mappings().first()
+        
+        return {
+            "total_users": overview["total_users"],
+            "total_courses": overview["total_courses"],
+            "total_enrollments": overview["total_enrollments"],
+            "total_revenue": float(overview["total_revenue"]),
+            "recent_users": overview["recent_users"],
+            "recent_enrollments": overview["recent_enrollments"],
+            "recent_revenue": float(overview["recent_revenue"])
+        }
+
+    async def refresh_analytics_rollups(self, days: Optional[int] = 2) -> None:
         """
-        recent_revenue_query = """
-        SELECT COALESCE(SUM(c.price), 0) 
-        FROM enrollments e 
-        JOIN courses c ON e.course_id = c.id 
-        WHERE e.payment_status = 'approved' 
-        AND e.enrolled_at >= NOW() - INTERVAL '30 days'
+        Recompute the daily rollups for the last ``days`` days (all history when None)
+        The write paths keep the rollups current; this repairs drift from
+        changes they do not see, such as edited prices or deleted rows.
         """
-        
-        async with get_async_session() as session:
-            total_users = await session.execute(text(total_users_query))
-            total_courses = await session.execute(text(total_courses_query))
-            total_enrollments = await session.execute(text(total_enrollments_query))
-            total_revenue = await session.execute(text(total_revenue_query))
-            recent_users = await session.execute(text(recent_users_query))
-            recent_enrollments = await session.execute(text(recent_enrollments_query))
-            recent_revenue = await session.execute(text(recent_revenue_query))
-            
-            return {
-                "total_users": total_users.scalar() or 0,
-                "total_courses": total_courses.scalar() or 0,
-                "total_enrollments": total_enrollments.scalar() or 0,
-                "total_revenue": float(total_revenue.scalar() or 0),
-                "recent_users": recent_users.scalar() or 0,
-                "recent_enrollments": recent_enrollments.scalar() or 0,
-                "recent_revenue": float(recent_revenue.scalar() or 0)
-            }
-
+        today = datetime.combine(date.today(), datetime.min.time())
+        since = datetime.min if days is None else today - timedelta(days=days)
+        params = {"since": since}
+        async with session_scope() as session:
+            await session.execute(QUERIES["rollups.lock"])
+            await session.execute(QUERIES["rollups.clear_users"], params)
+            await session.execute(QUERIES["rollups.fill_users"], params)
+            await session.execute(QUERIES["rollups.clear_courses"], params)
+            await session.execute(QUERIES["rollups.fill_courses"], params)
+            await commit_session(session)
+    
+    @read_only
     async def get_revenue_analytics(self, period: str) -> dict:
-        """Get revenue analytics for specified period"""
-        # Calculate date range based on period
-        if period == "7d":
-            days = 7
-        elif period == "30d":
-            days = 30
-        elif period == "90d":
-            days = 90
-        elif period == "1y":
-            days = 365
-        else:
-            days = 30
-        
-        # Get daily revenue for the period
-        daily_revenue_query = """
-        SELECT 
-            DATE(e.enrolled_at) as date,
-            COALESCE(SUM(c.price), 0) as revenue
-        FROM enrollments e 
-        JOIN courses c ON e.course_id = c.id 
-        WHERE e.payment_status = 'approved' 
-        AND e.enrolled_at >= NOW() - INTERVAL '%s days'
-        GROUP BY DATE(e.enrolled_at)
-        ORDER BY date
-        """ % days
-        
-        # Get total revenue for the period
-        total_revenue_query = """
-        SELECT COALESCE(SUM(c.price), 0) 
-        FROM enrollments e 
-        JOIN courses c ON e.course_id = c.id 
-        WHERE e.payment_status = 'approved' 
-        AND e.enrolled_at >= NOW() - INTERVAL '%s days'
-        """ % days
-        
-        async with get_async_session() as session:
-            daily_revenue = await session.execute(text(daily_revenue_query))
-            total_revenue = await session.execute(text(total_revenue_query))
-            
-            daily_data = []
-            for row in daily_revenue.fetchall():
-                daily_data.append({
-                    "date": row[0].isoformat() if row[0] else None,
-                    "revenue": float(row[1] or 0)
-                })
-            
-            return {
-                "period": period,
-                "total_revenue": float(total_revenue.scalar() or 0),
-                "daily_revenue": daily_data
-            }
+        """Get revenue analytics for specified period, from the daily rollups"""
+        days = _period_days(period, 30)
+        
+        async with session_scope() as session:
+            rows = await session.execute(QUERIES["analytics.daily_revenue"], {"days": days})
+            daily_data = [
+                {"date": row.date.isoformat(), "revenue": float(row.revenue)}
+                for row in rows
+            ]
+        
+        return {
+            "period": period,
+            "total_revenue": sum(day["revenue"] for day in daily_data),
+            "daily_revenue": daily_data
+        }
 
+    @read_only
     async def get_user_analytics(self, period: str) -> dict:
-        """Get user growth and engagement analytics"""
-        days = 30 if period == "30d" else 7 if period == "7d" else 90 if period == "90d" else 365
-        
-        # Get daily user registrations
-        daily_users_query = """
-        SELECT 
-            DATE(created_at) as date,
-            COUNT(*) as new_users
-        FROM users 
-        WHERE created_at >= NOW() - INTERVAL '%s days'
-        GROUP BY DATE(created_at)
-        ORDER BY date
-        """ % days
-        
-        # Get total users for the period
-        total_users_query = """
-        SELECT COUNT(*) 
-        FROM users 
-        WHERE created_at >= NOW() - INTERVAL '%s days'
-        """ % days
-        
-        async with get_async_session() as session:
-            daily_users = await session.execute(text(daily_users_query))
-            total_users = await session.execute(text(total_users_query))
-            
-            daily_data = []
-            for row in daily_users.fetchall():
-                daily_data.append({
-                    "date": row[0].isoformat() if row[0] else None,
-                    "new_users": row[1] or 0
-                })
-            
-            return {
-                "period": period,
-                "total_new_users": total_users.scalar() or 0,
-                "daily_users": daily_data
-            }
+        """Get user growth and engagement analytics, from the daily rollups"""
+        days = _period_days(period, 365)
+        
+        async with session_scope() as session:
+            rows = await session.execute(QUERIES["analytics.daily_new_users"], {"days": days})
+            daily_data = [
+                {"date": row.date.isoformat(), "new_users": row.new_users}
+                for row in rows
+            ]
+        
+        return {
+            "period": period,
+            "total_new_users": sum(day["new_users"] for day in daily_data),
+            "daily_users": daily_data
+        }
 
+    @read_only
     async def get_course_analytics(self) -> dict:
         """Get course performance analytics"""
-        # Get top performing courses
-        top_courses_query = """
-        SELECT 
-            c.id,
-            c.title,
-            c.instructor,
-            c.price,
-            COUNT(e.id) as enrollments,
-            COALESCE(SUM(c.price), 0) as revenue
-        FROM courses c
-        LEFT JOIN enrollments e ON c.id = e.course_id AND e.payment_status = 'approved'
-        GROUP BY c.id, c.title, c.instructor, c.price
-        ORDER BY enrollments DESC
-        LIMIT 10
-        """
-        
-        # Get course completion rates
-        completion_query = """
-        SELECT 
-            c.title,
-            COUNT(e.id) as total_enrollments,
-            COUNT(CASE WHEN e.status = 'completed' THEN 1 END) as completed_enrollments
-        FROM courses c
-        LEFT JOIN enrollments e ON c.id = e.course_id
-        GROUP BY c.id, c.title
-        HAVING COUNT(e.id) > 0
-        ORDER BY total_enrollments DESC
-        """
-        
-        async with get_async_session() as session:
-            top_courses = await session.execute(text(top_courses_query))
-            completion_rates = await session.execute(text(completion_query))
+        async with session_scope() as session:
+            top_courses = await session.execute(QUERIES["analytics.top_courses"])
+            completion_rates = await session.execute(QUERIES["analytics.completion_rates"])
             
             top_courses_data = []
             for row in top_courses.fetchall():
@@ -990,89 +1082,36 @@ class DatabaseOperations:
                 "completion_rates": completion_data
             }
 
+    @read_only
     async def get_enrollment_analytics(self, period: str) -> dict:
-        """Get enrollment trends and analytics"""
-        days = 30 if period == "30d" else 7 if period == "7d" else 90 if period == "90d" else 365
-        
-        # Get daily enrollments
-        daily_enrollments_query = """
-        SELECT 
-            DATE(enrolled_at) as date,
-            COUNT(*) as enrollments
-        FROM enrollments 
-        WHERE enrolled_at >= NOW() - INTERVAL '%s days'
-        GROUP BY DATE(enrolled_at)
-        ORDER BY date
-        """ % days
+        """Get enrollment trends and analytics, from the daily rollups"""
+        days = _period_days(period, 365)
         
-        # Get enrollment by course
-        course_enrollments_query = """
-        SELECT 
-            c.title,
-            COUNT(e.id) as enrollments
-        FROM courses c
-        LEFT JOIN enrollments e ON c.id = e.course_id 
-        AND e.enrolled_at >= NOW() - INTERVAL '%s days'
-        GROUP BY c.id, c.title
-        ORDER BY enrollments DESC
-        LIMIT 10
-        """ % days
-        
-        async with get_async_session() as session:
-            daily_enrollments = await session.execute(text(daily_enrollments_query))
-            course_enrollments = await session.execute(text(course_enrollments_query))
-            
-            daily_data = []
-            for row in daily_enrollments.fetchall():
-                daily_data.append({
-                    "date": row[0].isoformat() if row[0] else None,
-                    "enrollments": row[1] or 0
-                })
+        async with session_scope() as session:
+            daily_enrollments = await session.execute(QUERIES["analytics.daily_enrollments"], {"days": days})
+            course_enrollments = await session.execute(QUERIES["analytics.course_enrollments"], {"days": days})
             
-            course_data = []
-            for row in course_enrollments.fetchall():
-                course_data.append({
-                    "title": row[0],
-                    "enrollments": row[1] or 0
-                })
-            
-            return {
-                "period": period,
-                "daily_enrollments": daily_data,
-                "course_enrollments": course_data
-            }
+            daily_data = [
+                {"date": row.date.isoformat(), "enrollments": row.enrollments}
+                for row in daily_enrollments
+            ]
+            course_data = [
+                {"title": row.title, "enrollments": row.enrollments}
+                for row in course_enrollments
+            ]
+        
+        return {
+            "period": period,
+            "daily_enrollments": daily_data,
+            "course_enrollments": course_data
+        }
 
+    @read_only
     async def get_referral_analytics(self) -> dict:
         """Get referral program analytics"""
-        # Get referral statistics
-        referral_stats_query = """
-        SELECT 
-            COUNT(*) as total_referrals,
-            COUNT(CASE WHEN status = 'completed' THEN 1 END) as completed_referrals,
-            COUNT(CASE WHEN status = 'pending' THEN 1 END) as pending_referrals,
-            COALESCE(SUM(reward_earned), 0) as total_rewards_paid
-        FROM referrals
-        """
-        
-        # Get top referrers
-        top_referrers_query = """
-        SELECT 
-            u.full_name,
-            u.email,
-            COUNT(r.id) as total_referrals,
-            COUNT(CASE WHEN r.status = 'completed' THEN 1 END) as successful_referrals,
-            COALESCE(SUM(r.reward_earned), 0) as total_earnings
-        FROM users u
-        LEFT JOIN referrals r ON u.id = r.referrer_id
-        GROUP BY u.id, u.full_name, u.email
-        HAVING COUNT(r.id) > 0
-        ORDER BY total_referrals DESC
-        LIMIT 10
-        """
-        
-        async with get_async_session() as session:
-            referral_stats = await session.execute(text(referral_stats_query))
-            top_referrers = await session.execute(text(top_referrers_query))
+        async with session_scope() as session:
+            referral_stats = await session.execute(QUERIES["analytics.referral_stats"])
+            top_referrers = await session.execute(QUERIES["analytics.top_referrers"])
             
             stats = referral_stats.fetchone()
             stats_data = {
@@ -1097,278 +1136,136 @@ class DatabaseOperations:
                 "top_referrers": top_referrers_data
             }
 
+    @read_only
     async def get_financial_report(self, start_date: str = None, end_date: str = None) -> dict:
-        """Generate financial report"""
-        # Build date filter
-        date_filter = ""
-        if start_date and end_date:
-            date_filter = f"AND e.enrolled_at >= '{start_date}' AND e.enrolled_at <= '{end_date}'"
-        elif start_date:
-            date_filter = f"AND e.enrolled_at >= '{start_date}'"
-        elif end_date:
-            date_filter = f"AND e.enrolled_at <= '{end_date}'"
-        
-        # Get revenue summary
-        revenue_query = f"""
-        SELECT 
-            COALESCE(SUM(c.price), 0) as total_revenue,
-            COUNT(e.id) as total_transactions,
-            COALESCE(AVG(c.price), 0) as average_transaction_value
-        FROM enrollments e 
-        JOIN courses c ON e.course_id = c.id 
-        WHERE e.payment_status = 'approved'
-        {date_filter}
         """
-        
-        # Get revenue by course
-        course_revenue_query = f"""
-        SELECT 
-            c.title,
-            c.instructor,
-            COUNT(e.id) as enrollments,
-            COALESCE(SUM(c.price), 0) as revenue
-        FROM courses c
-        LEFT JOIN enrollments e ON c.id = e.course_id 
-        AND e.payment_status = 'approved'
-        {date_filter}
-        GROUP BY c.id, c.title, c.instructor
-        ORDER BY revenue DESC
+        Generate financial report from the daily rollups
+        Both dates are inclusive; raises ValueError for a malformed date.
         """
+        params = _report_range(start_date, end_date)
         
-        async with get_async_session() as session:
-            revenue_summary = await session.execute(text(revenue_query))
-            course_revenue = await session.execute(text(course_revenue_query))
+        async with session_scope() as session:
+            revenue_summary = await session.execute(QUERIES["reports.revenue_summary"], params)
+            course_revenue = await session.execute(QUERIES["reports.course_revenue"], params)
             
-            summary = revenue_summary.fetchone()
+            summary = revenue_summary.first()
+            total_revenue = float(summary.total_revenue)
+            total_transactions = summary.total_transactions
             summary_data = {
-                "total_revenue": float(summary[0] or 0),
-                "total_transactions": summary[1] or 0,
-                "average_transaction_value": float(summary[2] or 0)
+                "total_revenue": total_revenue,
+                "total_transactions": total_transactions,
+                "average_transaction_value": total_revenue / total_transactions if total_transactions else 0.0
             }
             
-            course_data = []
-            for row in course_revenue.fetchall():
-                course_data.append({
-                    "title": row[0],
-                    "instructor": row[1],
-                    "enrollments": row[2] or 0,
-                    "revenue": float(row[3] or 0)
-                })
-            
-            return {
-                "period": {
-                    "start_date": start_date,
-                    "end_date": end_date
-                },
-                "summary": summary_data,
-                "course_revenue": course_data
-            }
+            course_data = [
+                {
+                    "title": row.title,
+                    "instructor": row.instructor,
+                    "enrollments": row.enrollments,
+                    "revenue": float(row.revenue)
+                }
+                for row in course_revenue
+            ]
+        
+        return {
+            "period": {
+                "start_date": start_date,
+                "end_date": end_date
+            },
+            "summary": summary_data,
+            "course_revenue": course_data
+        }
 
+    @read_only
     async def get_user_report(self, start_date: str = None, end_date: str = None) -> dict:
-        """Generate user activity report"""
-        # Build date filter
-        date_filter = ""
-        if start_date and end_date:
-            date_filter = f"AND u.created_at >= '{start_date}' AND u.created_at <= '{end_date}'"
-        elif start_date:
-            date_filter = f"AND u.created_at >= '{start_date}'"
-        elif end_date:
-            date_filter = f"AND u.created_at <= '{end_date}'"
-        
-        # Get user summary
-        user_summary_query = f"""
-        SELECT 
-            COUNT(*) as total_users,
-            COUNT(CASE WHEN u.created_at >= NOW() - INTERVAL '30 days' THEN 1 END) as new_users_30d,
-            COUNT(CASE WHEN u.is_active = true THEN 1 END) as active_users
-        FROM users u
-        WHERE 1=1 {date_filter}
         """
-        
-        # Get user activity
-        user_activity_query = f"""
-        SELECT 
-            DATE(u.created_at) as date,
-            COUNT(*) as new_users
-        FROM users u
-        WHERE 1=1 {date_filter}
-        GROUP BY DATE(u.created_at)
-        ORDER BY date
+        Generate user activity report
+        Both dates are inclusive; raises ValueError for a malformed date.
         """
+        params = _report_range(start_date, end_date)
         
-        async with get_async_session() as session:
-            user_summary = await session.execute(text(user_summary_query))
-            user_activity = await session.execute(text(user_activity_query))
+        async with session_scope() as session:
+            user_summary = await session.execute(QUERIES["reports.user_summary"], params)
+            user_activity = await session.execute(QUERIES["reports.user_activity"], params)
             
-            summary = user_summary.fetchone()
+            summary = user_summary.first()
             summary_data = {
-                "total_users": summary[0] or 0,
-                "new_users_30d": summary[1] or 0,
-                "active_users": summary[2] or 0
+                "total_users": summary.total_users,
+                "new_users_30d": summary.new_users_30d,
+                "active_users": summary.active_users
             }
             
-            activity_data = []
-            for row in user_activity.fetchall():
-                activity_data.append({
-                    "date": row[0].isoformat() if row[0] else None,
-                    "new_users": row[1] or 0
-                })
-            
-            return {
-                "period": {
-                    "start_date": start_date,
-                    "end_date": end_date
-                },
-                "summary": summary_data,
-                "daily_activity": activity_data
-            }
+            activity_data = [
+                {"date": row.date.isoformat() if row.date else None, "new_users": row.new_users}
+                for row in user_activity
+            ]
+        
+        return {
+            "period": {
+                "start_date": start_date,
+                "end_date": end_date
+            },
+            "summary": summary_data,
+            "daily_activity": activity_data
+        }
 
+    @read_only
     async def get_course_report(self, start_date: str = None, end_date: str = None) -> dict:
-        """Generate course performance report"""
-        # Build date filter
-        date_filter = ""
-        if start_date and end_date:
-            date_filter = f"AND e.enrolled_at >= '{start_date}' AND e.enrolled_at <= '{end_date}'"
-        elif start_date:
-            date_filter = f"AND e.enrolled_at >= '{start_date}'"
-        elif end_date:
-            date_filter = f"AND e.enrolled_at <= '{end_date}'"
-        
-        # Get course performance
-        course_performance_query = f"""
-        SELECT 
-            c.title,
-            c.instructor,
-            c.price,
-            c.level,
-            COUNT(e.id) as total_enrollments,
-            COUNT(CASE WHEN e.payment_status = 'approved' THEN 1 END) as paid_enrollments,
-            COUNT(CASE WHEN e.status = 'completed' THEN 1 END) as completed_enrollments,
-            COALESCE(SUM(CASE WHEN e.payment_status = 'approved' THEN c.price ELSE 0 END), 0) as revenue
-        FROM courses c
-        LEFT JOIN enrollments e ON c.id = e.course_id
-        {date_filter.replace('e.enrolled_at', 'e.enrolled_at') if date_filter else ''}
-        GROUP BY c.id, c.title, c.instructor, c.price, c.level
-        ORDER BY revenue DESC
         """
+        Generate course performance report
+        Both dates are inclusive; raises ValueError for a malformed date.
+        """
+        params = _report_range(start_date, end_date)
         
-        async with get_async_session() as session:
-            course_performance = await session.execute(text(course_performance_query))
+        async with session_scope() as session:
+            course_performance = await session.execute(QUERIES["reports.course_performance"], params)
             
             performance_data = []
-            for row in course_performance.fetchall():
-                total = row[4] or 0
-                completed = row[6] or 0
-                completion_rate = (completed / total * 100) if total > 0 else 0
-                
+            for row in course_performance:
+                total = row.total_enrollments
+                completion_rate = (row.completed_enrollments / total * 100) if total > 0 else 0
                 performance_data.append({
-                    "title": row[0],
-                    "instructor": row[1],
-                    "price": float(row[2] or 0),
-                    "level": row[3],
+                    "title": row.title,
+                    "instructor": row.instructor,
+                    "price": float(row.price or 0),
+                    "level": row.level,
                     "total_enrollments": total,
-                    "paid_enrollments": row[5] or 0,
-                    "completed_enrollments": completed,
+                    "paid_enrollments": row.paid_enrollments,
+                    "completed_enrollments": row.completed_enrollments,
                     "completion_rate": round(completion_rate, 2),
-                    "revenue": float(row[7] or 0)
+                    "revenue": float(row.revenue)
                 })
-            
-            return {
-                "period": {
-                    "start_date": start_date,
-                    "end_date": end_date
-                },
-                "course_performance": performance_data
-            }
+        
+        return {
+            "period": {
+                "start_date": start_date,
+                "end_date": end_date
+            },
+            "course_performance": performance_data
+        }
     
     # ===================================
     # NEW PAYMENT SYSTEM OPERATIONS
     # ===================================
     
     # Payment Account Operations
+    @read_only
     async def get_payment_accounts(self, active_only: bool = True) -> List[dict]:
         """Get all payment accounts, optionally filtered by active status"""
-        query = """
-        SELECT * FROM admin_payment_accounts
-        WHERE (:active_only = false OR is_active = true)
-        ORDER BY display_order ASC, created_at DESC
-        """
-        
-        async with get_async_session() as session:
-            rows = await session.execute(text(query), {"active_only": active_only})
-            results = []
-            for row in rows.mappings().all():
-                result_dict = dict(row)
-                # Convert UUIDs to strings
-                result_dict = {
-                    key: str(value) if isinstance(value, UUID) else value
-                    for key, value in result_dict.items()
-                }
-                # Convert datetime to string
-                if 'created_at' in result_dict and result_dict['created_at']:
-                    result_dict['created_at'] = result_dict['created_at'].isoformat() if hasattr(result_dict['created_at'], 'isoformat') else str(result_dict['created_at'])
-                if 'updated_at' in result_dict and result_dict['updated_at']:
-                    result_dict['updated_at'] = result_dict['updated_at'].isoformat() if hasattr(result_dict['updated_at'], 'isoformat') else str(result_dict['updated_at'])
-                
-                # Convert snake_case to camelCase for frontend
-                result_dict['accountName'] = result_dict.pop('account_name')
-                result_dict['accountNumber'] = result_dict.pop('account_number')
-                result_dict['bankName'] = result_dict.pop('bank_name', None)
-                result_dict['qrCodeUrl'] = result_dict.pop('qr_code_url', None)
-                result_dict['isActive'] = result_dict.pop('is_active')
-                result_dict['displayOrder'] = result_dict.pop('display_order')
-                result_dict['createdAt'] = result_dict.pop('created_at')
-                result_dict['updatedAt'] = result_dict.pop('updated_at')
-                
-                results.append(result_dict)
-            return results
+        async with session_scope() as session:
+            rows = await session.execute(QUERIES["payment_accounts.list"], {"active_only": active_only})
+            return PAYMENT_ACCOUNT.all(rows)
     
+    @read_only
     async def get_payment_account_by_id(self, account_id: str) -> Optional[dict]:
         """Get a specific payment account by ID"""
-        query = """
-        SELECT * FROM admin_payment_accounts WHERE id = :account_id
-        """
-        
-        async with get_async_session() as session:
-            row = await session.execute(text(query), {"account_id": account_id})
-            result = row.mappings().first()
-            if result:
-                result_dict = dict(result)
-                # Convert UUIDs to strings
-                result_dict = {
-                    key: str(value) if isinstance(value, UUID) else value
-                    for key, value in result_dict.items()
-                }
-                # Convert datetime
-                if 'created_at' in result_dict and result_dict['created_at']:
-                    result_dict['created_at'] = result_dict['created_at'].isoformat() if hasattr(result_dict['created_at'], 'isoformat') else str(result_dict['created_at'])
-                if 'updated_at' in result_dict and result_dict['updated_at']:
-                    result_dict['updated_at'] = result_dict['updated_at'].isoformat() if hasattr(result_dict['updated_at'], 'isoformat') else str(result_dict['updated_at'])
-                
-                # Convert snake_case to camelCase
-                result_dict['accountName'] = result_dict.pop('account_name')
-                result_dict['accountNumber'] = result_dict.pop('account_number')
-                result_dict['bankName'] = result_dict.pop('bank_name', None)
-                result_dict['qrCodeUrl'] = result_dict.pop('qr_code_url', None)
-                result_dict['isActive'] = result_dict.pop('is_active')
-                result_dict['displayOrder'] = result_dict.pop('display_order')
-                result_dict['createdAt'] = result_dict.pop('created_at')
-                result_dict['updatedAt'] = result_dict.pop('updated_at')
-                
-                return result_dict
-            return None
+        async with session_scope() as session:
+            row = await session.execute(QUERIES["payment_accounts.by_id"], {"account_id": account_id})
+            return PAYMENT_ACCOUNT.first(row)
     
     async def create_payment_account(self, data: dict) -> dict:
         """Create a new payment account"""
         account_id = str(uuid.uuid4())
-        query = """
-        INSERT INTO admin_payment_accounts 
-        (id, type, account_name, account_number, bank_name, instructions, qr_code_url, is_active, display_order, created_at, updated_at)
-        VALUES 
-        (:id, :type, :account_name, :account_number, :bank_name, :instructions, :qr_code_url, :is_active, :display_order, :created_at, :updated_at)
-        RETURNING *
-        """
-        
         values = {
             "id": account_id,
             "type": data["type"],
@@ -1383,29 +1280,11 @@ class DatabaseOperations:
             "updated_at": datetime.utcnow()
         }
         
-        async with get_async_session() as session:
-            row = await session.execute(text(query), values)
-            result = row.mappings().first()
-            await session.commit()
-            
-            if result:
-                result_dict = dict(result)
-                result_dict['id'] = str(result_dict['id'])
-                result_dict['created_at'] = result_dict['created_at'].isoformat() if hasattr(result_dict['created_at'], 'isoformat') else str(result_dict['created_at'])
-                result_dict['updated_at'] = result_dict['updated_at'].isoformat() if hasattr(result_dict['updated_at'], 'isoformat') else str(result_dict['updated_at'])
-                
-                # Convert to camelCase
-                result_dict['accountName'] = result_dict.pop('account_name')
-                result_dict['accountNumber'] = result_dict.pop('account_number')
-                result_dict['bankName'] = result_dict.pop('bank_name', None)
-                result_dict['qrCodeUrl'] = result_dict.pop('qr_code_url', None)
-                result_dict['isActive'] = result_dict.pop('is_active')
-                result_dict['displayOrder'] = result_dict.pop('display_order')
-                result_dict['createdAt'] = result_dict.pop('created_at')
-                result_dict['updatedAt'] = result_dict.pop('updated_at')
-                
-                return result_dict
-        return None
+        async with session_scope() as session:
+            row = await session.execute(QUERIES["payment_accounts.insert"], values)
+            result = PAYMENT_ACCOUNT.first(row)
+            await commit_session(session)
+            return result
     
     async def update_payment_account(self, account_id: str, data: dict) -> Optional[dict]:
         """Update a payment account"""
@@ -1426,68 +1305,32 @@ class DatabaseOperations:
         
         for frontend_key, db_key in field_mapping.items():
             if frontend_key in data:
-                update_fields.append(f"{db_key} = :{db_key}")
+                update_fields.append(db_key)
                 values[db_key] = data[frontend_key]
         
         if not update_fields:
             return None
         
-        update_fields.append("updated_at = :updated_at")
+        update_fields.append("updated_at")
+        query = update_query("payment_accounts.update", update_fields)
         
-        query = f"""
-        UPDATE admin_payment_accounts
-        SET {', '.join(update_fields)}
-        WHERE id = :account_id
-        RETURNING *
-        """
-        
-        async with get_async_session() as session:
-            row = await session.execute(text(query), values)
-            result = row.mappings().first()
-            await session.commit()
-            
-            if result:
-                result_dict = dict(result)
-                result_dict['id'] = str(result_dict['id'])
-                result_dict['created_at'] = result_dict['created_at'].isoformat() if hasattr(result_dict['created_at'], 'isoformat') else str(result_dict['created_at'])
-                result_dict['updated_at'] = result_dict['updated_at'].isoformat() if hasattr(result_dict['updated_at'], 'isoformat') else str(result_dict['updated_at'])
-                
-                # Convert to camelCase
-                result_dict['accountName'] = result_dict.pop('account_name')
-                result_dict['accountNumber'] = result_dict.pop('account_number')
-                result_dict['bankName'] = result_dict.pop('bank_name', None)
-                result_dict['qrCodeUrl'] = result_dict.pop('qr_code_url', None)
-                result_dict['isActive'] = result_dict.pop('is_active')
-                result_dict['displayOrder'] = result_dict.pop('display_order')
-                result_dict['createdAt'] = result_dict.pop('created_at')
-                result_dict['updatedAt'] = result_dict.pop('updated_at')
-                
-                return result_dict
-        return None
+        async with session_scope() as session:
+            row = await session.execute(query, values)
+            result = PAYMENT_ACCOUNT.first(row)
+            await commit_session(session)
+            return result
     
     async def delete_payment_account(self, account_id: str) -> bool:
         """Delete a payment account"""
-        query = """
-        DELETE FROM admin_payment_accounts WHERE id = :account_id
-        """
-        
-        async with get_async_session() as session:
-            result = await session.execute(text(query), {"account_id": account_id})
-            await session.commit()
+        async with session_scope() as session:
+            result = await session.execute(QUERIES["payment_accounts.delete"], {"account_id": account_id})
+            await commit_session(session)
             return result.rowcount > 0
     
     # Payment Request Operations
     async def create_payment_request(self, data: dict) -> dict:
         """Create a new payment request"""
         request_id = str(uuid.uuid4())
-        query = """
-        INSERT INTO payment_requests 
-        (id, user_id, course_id, payment_account_id, amount, transaction_screenshot_url, transaction_reference, status, created_at, updated_at)
-        VALUES 
-        (:id, :user_id, :course_id, :payment_account_id, :amount, :transaction_screenshot_url, :transaction_reference, :status, :created_at, :updated_at)
-        RETURNING *
-        """
-        
         values = {
             "id": request_id,
             "user_id": data["user_id"],
@@ -1501,143 +1344,36 @@ class DatabaseOperations:
             "updated_at": datetime.utcnow()
         }
         
-        async with get_async_session() as session:
-            row = await session.execute(text(query), values)
-            result = row.mappings().first()
-            await session.commit()
-            
-            if result:
-                result_dict = dict(result)
-                # Convert UUIDs
-                result_dict = {
-                    key: str(value) if isinstance(value, UUID) else value
-                    for key, value in result_dict.items()
-                }
-                # Convert datetime
-                result_dict['created_at'] = result_dict['created_at'].isoformat() if hasattr(result_dict['created_at'], 'isoformat') else str(result_dict['created_at'])
-                result_dict['updated_at'] = result_dict['updated_at'].isoformat() if hasattr(result_dict['updated_at'], 'isoformat') else str(result_dict['updated_at'])
-                
-                # Convert to camelCase
-                result_dict['userId'] = result_dict.pop('user_id')
-                result_dict['courseId'] = result_dict.pop('course_id')
-                result_dict['paymentAccountId'] = result_dict.pop('payment_account_id')
-                result_dict['transactionScreenshotUrl'] = result_dict.pop('transaction_screenshot_url')
-                result_dict['transactionReference'] = result_dict.pop('transaction_reference', None)
-                result_dict['adminNotes'] = result_dict.pop('admin_notes', None)
-                result_dict['rejectionReason'] = result_dict.pop('rejection_reason', None)
-                result_dict['approvedBy'] = result_dict.pop('approved_by', None)
-                result_dict['approvedAt'] = result_dict.pop('approved_at', None)
-                result_dict['createdAt'] = result_dict.pop('created_at')
-                result_dict['updatedAt'] = result_dict.pop('updated_at')
-                
-                return result_dict
-        return None
+        async with session_scope() as session:
+            row = await session.execute(QUERIES["payment_requests.insert"], values)
+            result = PAYMENT_REQUEST.first(row)
+            await commit_session(session)
+            return result
     
+    @read_only
     async def get_user_payment_requests(self, user_id: str) -> List[dict]:
         """Get all payment requests for a user"""
-        query = """
-        SELECT pr.*, c.title as course_title, apa.account_name as payment_account_name, apa.type as payment_account_type
-        FROM payment_requests pr
-        JOIN courses c ON pr.course_id = c.id
-        JOIN admin_payment_accounts apa ON pr.payment_account_id = apa.id
-        WHERE pr.user_id = :user_id
-        ORDER BY pr.created_at DESC
-        """
-        
-        async with get_async_session() as session:
-            rows = await session.execute(text(query), {"user_id": user_id})
-            results = []
-            for row in rows.mappings().all():
-                result_dict = dict(row)
-                # Convert UUIDs
-                result_dict = {
-                    key: str(value) if isinstance(value, UUID) else value
-                    for key, value in result_dict.items()
-                }
-                # Convert datetime
-                for date_field in ['created_at', 'updated_at', 'approved_at']:
-                    if date_field in result_dict and result_dict[date_field]:
-                        result_dict[date_field] = result_dict[date_field].isoformat() if hasattr(result_dict[date_field], 'isoformat') else str(result_dict[date_field])
-                
-                # Convert to camelCase
-                result_dict['userId'] = result_dict.pop('user_id')
-                result_dict['courseId'] = result_dict.pop('course_id')
-                result_dict['paymentAccountId'] = result_dict.pop('payment_account_id')
-                result_dict['transactionScreenshotUrl'] = result_dict.pop('transaction_screenshot_url')
-                result_dict['transactionReference'] = result_dict.pop('transaction_reference', None)
-                result_dict['adminNotes'] = result_dict.pop('admin_notes', None)
-                result_dict['rejectionReason'] = result_dict.pop('rejection_reason', None)
-                result_dict['approvedBy'] = result_dict.pop('approved_by', None)
-                result_dict['approvedAt'] = result_dict.pop('approved_at', None)
-                result_dict['createdAt'] = result_dict.pop('created_at')
-                result_dict['updatedAt'] = result_dict.pop('updated_at')
-                result_dict['courseTitle'] = result_dict.pop('course_title')
-                result_dict['paymentAccountName'] = result_dict.pop('payment_account_name')
-                result_dict['paymentAccountType'] = result_dict.pop('payment_account_type')
-                
-                results.append(result_dict)
-            return results
+        async with session_scope() as session:
+            rows = await session.execute(QUERIES["payment_requests.by_user"], {"user_id": user_id})
+            return PAYMENT_REQUEST.all(rows)
     
+    @read_only
     async def get_payment_request_by_id(self, request_id: str) -> Optional[dict]:
         """Get a specific payment request"""
-        query = """
-        SELECT pr.*, u.full_name as user_name, u.email as user_email, 
-               c.title as course_title, apa.account_name as payment_account_name, apa.type as payment_account_type
-        FROM payment_requests pr
-        JOIN users u ON pr.user_id = u.id
-        JOIN courses c ON pr.course_id = c.id
-        JOIN admin_payment_accounts apa ON pr.payment_account_id = apa.id
-        WHERE pr.id = :request_id
-        """
-        
-        async with get_async_session() as session:
-            row = await session.execute(text(query), {"request_id": request_id})
-            result = row.mappings().first()
-            
-            if result:
-                result_dict = dict(result)
-                # Convert UUIDs
-                result_dict = {
-                    key: str(value) if isinstance(value, UUID) else value
-                    for key, value in result_dict.items()
-                }
-                # Convert datetime
-                for date_field in ['created_at', 'updated_at', 'approved_at']:
-                    if date_field in result_dict and result_dict[date_field]:
-                        result_dict[date_field] = result_dict[date_field].isoformat() if hasattr(result_dict[date_field], 'isoformat') else str(result_dict[date_field])
-                
-                # Convert to camelCase
-                result_dict['userId'] = result_dict.pop('user_id')
-                result_dict['courseId'] = result_dict.pop('course_id')
-                result_dict['paymentAccountId'] = result_dict.pop('payment_account_id')
-                result_dict['transactionScreenshotUrl'] = result_dict.pop('transaction_screenshot_url')
-                result_dict['transactionReference'] = result_dict.pop('transaction_reference', None)
-                result_dict['adminNotes'] = result_dict.pop('admin_notes', None)
-                result_dict['rejectionReason'] = result_dict.pop('rejection_reason', None)
-                result_dict['approvedBy'] = result_dict.pop('approved_by', None)
-                result_dict['approvedAt'] = result_dict.pop('approved_at', None)
-                result_dict['createdAt'] = result_dict.pop('created_at')
-                result_dict['updatedAt'] = result_dict.pop('updated_at')
-                result_dict['userName'] = result_dict.pop('user_name')
-                result_dict['userEmail'] = result_dict.pop('user_email')
-                result_dict['courseTitle'] = result_dict.pop('course_title')
-                result_dict['paymentAccountName'] = result_dict.pop('payment_account_name')
-                result_dict['paymentAccountType'] = result_dict.pop('payment_account_type')
-                
-                return result_dict
-        return None
+        async with session_scope() as session:
+            row = await session.execute(QUERIES["payment_requests.detail_by_id"], {"request_id": request_id})
+            return PAYMENT_REQUEST.first(row)
+    
+    @read_only
+    async def get_payment_requests_by_ids(self, request_ids: List[str]) -> dict:
+        """Get payment_requests table rows keyed by ID; missing IDs are left out"""
+        return await self._fetch_by_ids("payment_requests.by_ids", RECORD, request_ids)
     
+    @read_only
     async def get_user_payment_for_course(self, user_id: str, course_id: str) -> Optional[dict]:
         """Check if user has a payment request for a specific course"""
-        query = """
-        SELECT * FROM payment_requests
-        WHERE user_id = :user_id AND course_id = :course_id
-        ORDER BY created_at DESC
-        LIMIT 1
-        """
-        
-        async with get_async_session() as session:
-            row = await session.execute(text(query), {"user_id": user_id, "course_id": course_id})
+        async with session_scope() as session:
+            row = await session.execute(QUERIES["payment_requests.latest_for_user_course"], {"user_id": user_id, "course_id": course_id})
             result = row.mappings().first()
             
             if result:
@@ -1654,18 +1390,10 @@ class DatabaseOperations:
         CRITICAL FUNCTION: Approve payment and enroll user in course
         Also handles referral bonus distribution
         """
-        async with get_async_session() as session:
+        async with session_scope() as session, atomic(session):
             try:
                 # 1. Get payment request details
-                query_get_payment = """
-                SELECT pr.*, u.referred_by, c.price as course_price
-                FROM payment_requests pr
-                JOIN users u ON pr.user_id = u.id
-                JOIN courses c ON pr.course_id = c.id
-                WHERE pr.id = :request_id AND pr.status = 'pending'
-                """
-                
-                row = await session.execute(text(query_get_payment), {"request_id": request_id})
+                row = await session.execute(QUERIES["payment_requests.pending_for_approval"], {"request_id": request_id})
                 payment = row.mappings().first()
                 
                 if not payment:
@@ -1678,17 +1406,7 @@ class DatabaseOperations:
                 course_price = float(payment_dict.get('course_price', 0))
                 
                 # 2. Update payment status
-                query_update_payment = """
-                UPDATE payment_requests
-                SET status = 'approved', 
-                    approved_by = :admin_id, 
-                    approved_at = :approved_at,
-                    admin_notes = :admin_notes,
-                    updated_at = :updated_at
-                WHERE id = :request_id
-                """
-                
-                await session.execute(text(query_update_payment), {
+                await session.execute(QUERIES["payment_requests.approve"], {
                     "request_id": request_id,
                     "admin_id": admin_id,
                     "approved_at": datetime.utcnow(),
@@ -1698,12 +1416,7 @@ class DatabaseOperations:
                 
                 # 3. Create enrollment
                 enrollment_id = str(uuid.uuid4())
-                query_create_enrollment = """
-                INSERT INTO enrollments (id, user_id, course_id, enrolled_at, progress, status)
-                VALUES (:id, :user_id, :course_id, :enrolled_at, :progress, :status)
-                """
-                
-                await session.execute(text(query_create_enrollment), {
+                await session.execute(QUERIES["enrollments.insert_approved"], {
                     "id": enrollment_id,
                     "user_id": user_id,
                     "course_id": course_id,
@@ -1711,10 +1424,12 @@ class DatabaseOperations:
                     "progress": 0,
                     "status": "active"
                 })
+                await session.execute(QUERIES["rollups.add_enrollment"], {"enrollment_id": enrollment_id})
                 
                 # 4. Handle referral bonus if user was referred
                 referral_bonus_awarded = False
                 referral_amount = 0
+                referrer_id = None
                 
                 if referred_by:
                     # Calculate referral bonus (10% of course price)
@@ -1722,23 +1437,14 @@ class DatabaseOperations:
                     referral_amount = (course_price * referral_bonus_percentage) / 100
                     
                     # Find the referrer user ID by referral code
-                    query_find_referrer = """
-                    SELECT id FROM users WHERE referral_code = :referral_code
-                    """
-                    referrer_row = await session.execute(text(query_find_referrer), {"referral_code": referred_by})
+                    referrer_row = await session.execute(QUERIES["users.id_by_referral_code"], {"referral_code": referred_by})
                     referrer_result = referrer_row.mappings().first()
                     
                     if referrer_result:
                         referrer_id = str(referrer_result['id'])
                         
                         # Update the referrals table to mark as completed
-                        query_update_referral = """
-                        UPDATE referrals 
-                        SET status = 'completed', reward_earned = :reward_amount, payment_request_id = :payment_request_id
-                        WHERE referrer_id = :referrer_id AND email = (SELECT email FROM users WHERE id = :user_id)
-                        """
-                        
-                        await session.execute(text(query_update_referral), {
+                        await session.execute(QUERIES["referrals.complete"], {
                             "reward_amount": referral_amount,
                             "payment_request_id": request_id,
                             "referrer_id": referrer_id,
@@ -1747,14 +1453,7 @@ class DatabaseOperations:
                         
                         # Create referral earning record
                         referral_earning_id = str(uuid.uuid4())
-                        query_create_referral = """
-                        INSERT INTO referral_earnings 
-                        (id, referrer_id, referred_user_id, enrollment_id, course_id, bonus_amount, status, created_at)
-                        VALUES 
-                        (:id, :referrer_id, :referred_user_id, :enrollment_id, :course_id, :bonus_amount, :status, :created_at)
-                        """
-                        
-                        await session.execute(text(query_create_referral), {
+                        await session.execute(QUERIES["referral_earnings.insert"], {
                             "id": referral_earning_id,
                             "referrer_id": referrer_id,
                             "referred_user_id": user_id,
@@ -1766,21 +1465,18 @@ class DatabaseOperations:
                         })
                         
                         # Update referrer's total earnings
-                        query_update_earnings = """
-                        UPDATE users
-                        SET total_earnings = total_earnings + :bonus_amount
-                        WHERE id = :referrer_id
-                        """
-                        
-                        await session.execute(text(query_update_earnings), {
+                        await session.execute(QUERIES["users.add_earnings"], {
                             "bonus_amount": referral_amount,
                             "referrer_id": referrer_id
                         })
                         
                         referral_bonus_awarded = True
                 
+                # 5. Keep both users' dashboard numbers in step
+                await self._refresh_dashboard_stats(session, user_id, referrer_id)
+                
                 # Commit all changes
-                await session.commit()
+                await commit_session(session)
                 
                 return {
                     "enrollment_id": enrollment_id,
@@ -1789,148 +1485,54 @@ class DatabaseOperations:
                 }
                 
             except Exception as e:
-                await session.rollback()
                 raise Exception(f"Failed to approve payment and enroll: {str(e)}")
     
     async def reject_payment_request(self, request_id: str, admin_id: str, rejection_reason: str) -> bool:
         """Reject a payment request"""
-        query = """
-        UPDATE payment_requests
-        SET status = 'rejected',
-            approved_by = :admin_id,
-            rejection_reason = :rejection_reason,
-            updated_at = :updated_at
-        WHERE id = :request_id AND status = 'pending'
-        """
-        
-        async with get_async_session() as session:
-            result = await session.execute(text(query), {
+        async with session_scope() as session:
+            result = await session.execute(QUERIES["payment_requests.reject"], {
                 "request_id": request_id,
                 "admin_id": admin_id,
                 "rejection_reason": rejection_reason,
                 "updated_at": datetime.utcnow()
             })
-            await session.commit()
+            await commit_session(session)
             return result.rowcount > 0
     
     # Enrollment Operations
+    @read_only
     async def get_user_enrollments(self, user_id: str) -> List[dict]:
         """Get all enrollments (My Courses) for a user"""
-        query = """
-        SELECT e.*, c.title as course_title, c.description as course_description, 
-               c.level as course_level, c.duration as course_duration, c.price as course_price
-        FROM enrollments e
-        JOIN courses c ON e.course_id = c.id
-        WHERE e.user_id = :user_id
-        ORDER BY e.enrolled_at DESC
-        """
-        
-        async with get_async_session() as session:
-            rows = await session.execute(text(query), {"user_id": user_id})
-            results = []
-            for row in rows.mappings().all():
-                result_dict = dict(row)
-                # Convert UUIDs
-                result_dict = {
-                    key: str(value) if isinstance(value, UUID) else value
-                    for key, value in result_dict.items()
-                }
-                # Convert datetime
-                for date_field in ['enrolled_at', 'completed_at']:
-                    if date_field in result_dict and result_dict[date_field]:
-                        result_dict[date_field] = result_dict[date_field].isoformat() if hasattr(result_dict[date_field], 'isoformat') else str(result_dict[date_field])
-                
-                # Convert to camelCase
-                result_dict['userId'] = result_dict.pop('user_id')
-                result_dict['courseId'] = result_dict.pop('course_id')
-                result_dict['paymentRequestId'] = result_dict.pop('payment_request_id', None)
-                result_dict['enrolledAt'] = result_dict.pop('enrolled_at')
-                result_dict['completedAt'] = result_dict.pop('completed_at', None)
-                result_dict['courseTitle'] = result_dict.pop('course_title')
-                result_dict['courseDescription'] = result_dict.pop('course_description')
-                result_dict['courseLevel'] = result_dict.pop('course_level')
-                result_dict['courseDuration'] = result_dict.pop('course_duration')
-                result_dict['coursePrice'] = float(result_dict.pop('course_price', 0))
-                
-                results.append(result_dict)
-            return results
+        async with session_scope() as session:
+            rows = await session.execute(QUERIES["enrollments.by_user"], {"user_id": user_id})
+            return ENROLLMENT.all(rows)
     
+    @read_only
     async def is_user_enrolled(self, user_id: str, course_id: str) -> bool:
         """Check if a user is enrolled in a specific course"""
-        query = """
-        SELECT COUNT(*) as count FROM enrollments
-        WHERE user_id = :user_id AND course_id = :course_id
-        """
-        
-        async with get_async_session() as session:
-            row = await session.execute(text(query), {"user_id": user_id, "course_id": course_id})
+        async with session_scope() as session:
+            row = await session.execute(QUERIES["enrollments.count_for_user_course"], {"user_id": user_id, "course_id": course_id})
             result = row.mappings().first()
             return result['count'] > 0 if result else False
     
+    @read_only
     async def get_referral_earnings(self, user_id: str) -> List[dict]:
         """Get all referral earnings for a user"""
-        query = """
-        SELECT re.*, u.full_name as referred_user_name, c.title as course_title
-        FROM referral_earnings re
-        JOIN users u ON re.referred_user_id = u.id
-        JOIN courses c ON re.course_id = c.id
-        WHERE re.referrer_id = :user_id
-        ORDER BY re.created_at DESC
-        """
-        
-        async with get_async_session() as session:
-            rows = await session.execute(text(query), {"user_id": user_id})
-            results = []
-            for row in rows.mappings().all():
-                result_dict = dict(row)
-                # Convert UUIDs
-                result_dict = {
-                    key: str(value) if isinstance(value, UUID) else value
-                    for key, value in result_dict.items()
-                }
-                # Convert datetime
-                for date_field in ['created_at', 'paid_at']:
-                    if date_field in result_dict and result_dict[date_field]:
-                        result_dict[date_field] = result_dict[date_field].isoformat() if hasattr(result_dict[date_field], 'isoformat') else str(result_dict[date_field])
-                
-                # Convert to camelCase
-                result_dict['referrerId'] = result_dict.pop('referrer_id')
-                result_dict['referredUserId'] = result_dict.pop('referred_user_id')
-                result_dict['enrollmentId'] = result_dict.pop('enrollment_id')
-                result_dict['courseId'] = result_dict.pop('course_id')
-                result_dict['bonusAmount'] = float(result_dict.pop('bonus_amount'))
-                result_dict['paidAt'] = result_dict.pop('paid_at', None)
-                result_dict['createdAt'] = result_dict.pop('created_at')
-                result_dict['referredUserName'] = result_dict.pop('referred_user_name')
-                result_dict['courseTitle'] = result_dict.pop('course_title')
-                
-                results.append(result_dict)
-            return results
+        async with session_scope() as session:
+            rows = await session.execute(QUERIES["referral_earnings.by_referrer"], {"user_id": user_id})
+            return REFERRAL_EARNING.all(rows)
 
+    @read_only
     async def get_referral_stats(self, user_id: str) -> dict:
         """Get user's referral statistics"""
-        # Get user's referral code
-        user_query = "SELECT referral_code FROM users WHERE id = :user_id"
-        
-        # Get referral statistics
-        stats_query = """
-        SELECT 
-            COUNT(*) as total_referrals,
-            COUNT(CASE WHEN status = 'completed' THEN 1 END) as completed_referrals,
-            COUNT(CASE WHEN status = 'pending' THEN 1 END) as pending_referrals,
-            COALESCE(SUM(reward_earned), 0) as total_earnings
-        FROM referrals
-        WHERE referrer_id = :user_id
-        """
-        
-        async with get_async_session() as session:
+        async with session_scope() as session:
             # Get referral code
-            user_row = await session.execute(text(user_query), {"user_id": user_id})
+            user_row = await session.execute(QUERIES["users.referral_code"], {"user_id": user_id})
             user_result = user_row.mappings().first()
             referral_code = user_result['referral_code'] if user_result else 'N/A'
             
             # Get stats
-            stats_row = await session.execute(text(stats_query), {"user_id": user_id})
+            stats_row = await session.execute(QUERIES["referrals.stats_for_referrer"], {"user_id": user_id})
             stats_result = stats_row.mappings().first()
             
             return {
@@ -1941,11 +1543,86 @@ class DatabaseOperations:
                 "referralCode": referral_code
             }
 
+    async def get_dashboard_stats(self, user_id: str) -> Optional[dict]:
+        """
+        Get the user's dashboard numbers from the user_dashboard_stats read model
+
+        Users without a row yet (e.g. before the first rebuild) get one
+        computed and stored on first read. Returns None for unknown users.
+        """
+        async with session_scope() as session:
+            row = await session.execute(QUERIES["dashboard_stats.by_user"], {"user_id": user_id})
+            stats = row.mappings().first()
+            if stats is None:
+                row = await session.execute(QUERIES["dashboard_stats.refresh"], {"user_id": user_id})
+                stats = row.mappings().first()
+                await commit_session(session)
+        return dict(stats) if stats else None
+    
+    async def rebuild_dashboard_stats(self) -> int:
+        """Recompute the dashboard read model for every user; returns the rows written"""
+        async with session_scope() as session:
+            result = await session.execute(QUERIES["dashboard_stats.rebuild"])
+            await commit_session(session)
+            return result.rowcount
+    
+    @read_only
+    async def get_dashboard_summary(self, user_id: str, with_enrollments: bool = True,
+                                    recent_referrals: int = 0) -> Optional[dict]:
+        """
+        Get the data behind the student dashboard in one session
+
+        Returns the user's totals, enrollment and referral stats, their
+        enrollments when ``with_enrollments`` is set, and their latest
+        ``recent_referrals`` referrals; None if the user does not exist.
+        """
+        async with session_scope() as session:
+            row = await session.execute(QUERIES["dashboard.summary"], {"user_id": user_id})
+            summary = row.mappings().first()
+            if summary is None:
+                return None
+            
+            enrollments = []
+            if with_enrollments:
+                rows = await session.execute(QUERIES["enrollments.by_user"], {"user_id": user_id})
+                enrollments = ENROLLMENT.all(rows)
+            
+            referrals = []
+            if recent_referrals:
+                rows = await session.execute(QUERIES["referrals.recent_by_referrer"], {
+                    "user_id": user_id,
+                    "limit": recent_referrals
+                })
+                referrals = [
+                    {
+                        "name": r["name"],
+                        "rewardEarned": r["reward_earned"] or 0,
+                        "dateReferred": r["date_referred"].isoformat() if r["date_referred"] else None
+                    }
+                    for r in rows.mappings().all()
+                ]
+        
+        return {
+            "totalEarnings": summary["total_earnings"] or 0,
+            "coursesEnrolled": summary["courses_enrolled"],
+            "hoursLearned": int(summary["hours_learned"]),
+            "certificates": summary["certificates"],
+            "referralStats": {
+                "totalReferrals": summary["total_referrals"] or 0,
+                "completedReferrals": summary["completed_referrals"] or 0,
+                "pendingReferrals": summary["pending_referrals"] or 0,
+                "totalEarnings": float(summary["referral_earnings"] or 0),
+                "referralCode": summary["referral_code"] or "N/A"
+            },
+            "enrollments": enrollments,
+            "recentReferrals": referrals
+        }
+
+    @read_only
     async def get_user_referral_code(self, user_id: str) -> str:
         """Get user's referral code"""
-        query = "SELECT referral_code FROM users WHERE id = :user_id"
-        async with get_async_session() as session:
-            row = await session.execute(text(query), {"user_id": user_id})
+        async with session_scope() as session:
+            row = await session.execute(QUERIES["users.referral_code"], {"user_id": user_id})
             result = row.mappings().first()
             return result['referral_code'] if result else 'N/A'
 
@@ -1954,13 +1631,6 @@ class DatabaseOperations:
         """Create a withdrawal request"""
         withdrawal_id = str(uuid.uuid4())
         
-        query = """
-        INSERT INTO withdrawal_requests 
-        (id, user_id, amount, account_type, account_number, account_holder_name, phone_number, status, created_at)
-        VALUES (:id, :user_id, :amount, :account_type, :account_number, :account_holder_name, :phone_number, :status, :created_at)
-        RETURNING *
-        """
-        
         values = {
             "id": withdrawal_id,
             "user_id": user_id,
@@ -1973,127 +1643,48 @@ class DatabaseOperations:
             "created_at": datetime.utcnow()
         }
         
-        async with get_async_session() as session:
-            row = await session.execute(text(query), values)
-            result = row.mappings().first()
+        async with session_scope() as session:
+            row = await session.execute(QUERIES["withdrawals.insert"], values)
+            result = WITHDRAWAL.first(row)
             if result:
-                result_dict = dict(result)
-                # Convert UUIDs to strings and Decimal to float
-                result_dict = {
-                    key: str(value) if isinstance(value, UUID) else float(value) if isinstance(value, Decimal) else value
-                    for key, value in result_dict.items()
-                }
-                # Convert datetime to string
-                if 'created_at' in result_dict and result_dict['created_at']:
-                    result_dict['created_at'] = result_dict['created_at'].isoformat()
-                await session.commit()
-                return result_dict
-        return None
+                await commit_session(session)
+            return result
 
+    @read_only
     async def get_user_withdrawal_requests(self, user_id: str) -> List[dict]:
         """Get user's withdrawal requests"""
-        query = """
-        SELECT * FROM withdrawal_requests 
-        WHERE user_id = :user_id 
-        ORDER BY created_at DESC
-        """
-        async with get_async_session() as session:
-            rows = await session.execute(text(query), {"user_id": user_id})
-            results = []
-            for row in rows.mappings().all():
-                result_dict = dict(row)
-                
-                # Convert UUIDs to strings and Decimal to float
-                result_dict = {
-                    key: str(value) if isinstance(value, UUID) else float(value) if isinstance(value, Decimal) else value
-                    for key, value in result_dict.items()
-                }
-                
-                # Convert datetime to string
-                if 'created_at' in result_dict and result_dict['created_at']:
-                    result_dict['created_at'] = result_dict['created_at'].isoformat()
-                if 'processed_at' in result_dict and result_dict['processed_at']:
-                    result_dict['processed_at'] = result_dict['processed_at'].isoformat()
-                
-                # Map field names to match API response
-                result_dict['accountType'] = result_dict.pop('account_type', '')
-                result_dict['accountNumber'] = result_dict.pop('account_number', '')
-                result_dict['accountHolderName'] = result_dict.pop('account_holder_name', '')
-                result_dict['phoneNumber'] = result_dict.pop('phone_number', None)
-                result_dict['processedAt'] = result_dict.pop('processed_at', None)
-                result_dict['processedBy'] = result_dict.pop('processed_by', None)
-                result_dict['adminNotes'] = result_dict.pop('admin_notes', None)
-                result_dict['rejectionReason'] = result_dict.pop('rejection_reason', None)
-                
-                results.append(result_dict)
-            return results
+        async with session_scope() as session:
+            rows = await session.execute(QUERIES["withdrawals.by_user"], {"user_id": user_id})
+            return WITHDRAWAL.all(rows)
 
+    @read_only
     async def get_all_withdrawal_requests(self, status: str = None) -> List[dict]:
         """Get all withdrawal requests (admin)"""
         if status:
-            query = """
-            SELECT wr.*, u.full_name, u.email
-            FROM withdrawal_requests wr
-            JOIN users u ON wr.user_id = u.id
-            WHERE wr.status = :status
-            ORDER BY wr.created_at DESC
-            """
+            query = QUERIES["withdrawals.list_by_status"]
             params = {"status": status}
         else:
-            query = """
-            SELECT wr.*, u.full_name, u.email
-            FROM withdrawal_requests wr
-            JOIN users u ON wr.user_id = u.id
-            ORDER BY wr.created_at DESC
-            """
+            query = QUERIES["withdrawals.list"]
             params = {}
         
-        async with get_async_session() as session:
-            rows = await session.execute(text(query), params)
-            results = []
-            for row in rows.mappings().all():
-                result_dict = dict(row)
-                
-                # Convert UUIDs to strings
-                result_dict = {
-                    key: str(value) if isinstance(value, UUID) else value
-                    for key, value in result_dict.items()
-                }
-                
-                # Convert datetime to string
-                if 'created_at' in result_dict and result_dict['created_at']:
-                    result_dict['created_at'] = result_dict['created_at'].isoformat()
-                if 'processed_at' in result_dict and result_dict['processed_at']:
-                    result_dict['processed_at'] = result_dict['processed_at'].isoformat()
-                
-                # Map field names
-                result_dict['accountType'] = result_dict.pop('account_type', '')
-                result_dict['accountNumber'] = result_dict.pop('account_number', '')
-                result_dict['accountHolderName'] = result_dict.pop('account_holder_name', '')
-                result_dict['phoneNumber'] = result_dict.pop('phone_number', None)
-                result_dict['processedAt'] = result_dict.pop('processed_at', None)
-                result_dict['processedBy'] = result_dict.pop('processed_by', None)
-                result_dict['adminNotes'] = result_dict.pop('admin_notes', None)
-                result_dict['rejectionReason'] = result_dict.pop('rejection_reason', None)
-                result_dict['userName'] = result_dict.pop('full_name', '')
-                result_dict['userEmail'] = result_dict.pop('email', '')
-                
-                results.append(result_dict)
-            return results
+        async with session_scope() as session:
+            rows = await session.execute(query, params)
+            return WITHDRAWAL_ADMIN.all(rows)
+
+    @read_only
+    async def get_withdrawal_requests_page(self, limit: int, cursor: Optional[str] = None,
+                                           status: Optional[str] = None) -> dict:
+        """Get one page of withdrawal requests with user details (admin)"""
+        return await self._fetch_page(
+            "withdrawals.page", WITHDRAWAL_ADMIN, {"status": status}, limit, cursor
+        )
 
     async def approve_withdrawal_request(self, withdrawal_id: str, admin_id: str, admin_notes: str = None) -> bool:
         """Approve a withdrawal request"""
-        async with get_async_session() as session:
+        async with session_scope() as session, atomic(session):
             try:
                 # Get withdrawal request details
-                query_get = """
-                SELECT wr.*, u.total_earnings
-                FROM withdrawal_requests wr
-                JOIN users u ON wr.user_id = u.id
-                WHERE wr.id = :withdrawal_id AND wr.status = 'pending'
-                """
-                
-                row = await session.execute(text(query_get), {"withdrawal_id": withdrawal_id})
+                row = await session.execute(QUERIES["withdrawals.pending_with_earnings"], {"withdrawal_id": withdrawal_id})
                 withdrawal = row.mappings().first()
                 
                 if not withdrawal:
@@ -2109,13 +1700,7 @@ class DatabaseOperations:
                     return False
                 
                 # Update withdrawal request status
-                query_update = """
-                UPDATE withdrawal_requests 
-                SET status = 'approved', processed_at = :processed_at, processed_by = :admin_id, admin_notes = :admin_notes
-                WHERE id = :withdrawal_id
-                """
-                
-                await session.execute(text(query_update), {
+                await session.execute(QUERIES["withdrawals.approve"], {
                     "withdrawal_id": withdrawal_id,
                     "processed_at": datetime.utcnow(),
                     "admin_id": admin_id,
@@ -2123,46 +1708,33 @@ class DatabaseOperations:
                 })
                 
                 # Deduct amount from user's earnings
-                query_deduct = """
-                UPDATE users 
-                SET total_earnings = total_earnings - :amount
-                WHERE id = :user_id
-                """
-                
-                await session.execute(text(query_deduct), {
+                await session.execute(QUERIES["users.deduct_earnings"], {
                     "amount": amount,
                     "user_id": user_id
                 })
+                await self._refresh_dashboard_stats(session, user_id)
                 
-                await session.commit()
+                await commit_session(session)
                 return True
                 
             except Exception as e:
-                await session.rollback()
                 raise Exception(f"Failed to approve withdrawal: {str(e)}")
 
     async def reject_withdrawal_request(self, withdrawal_id: str, admin_id: str, rejection_reason: str) -> bool:
         """Reject a withdrawal request"""
-        async with get_async_session() as session:
+        async with session_scope() as session, atomic(session):
             try:
-                query = """
-                UPDATE withdrawal_requests 
-                SET status = 'rejected', processed_at = :processed_at, processed_by = :admin_id, rejection_reason = :rejection_reason
-                WHERE id = :withdrawal_id AND status = 'pending'
-                """
-                
-                await session.execute(text(query), {
+                await session.execute(QUERIES["withdrawals.reject"], {
                     "withdrawal_id": withdrawal_id,
                     "processed_at": datetime.utcnow(),
                     "admin_id": admin_id,
                     "rejection_reason": rejection_reason
                 })
                 
-                await session.commit()
+                await commit_session(session)
                 return True
                 
             except Exception as e:
-                await session.rollback()
                 raise Exception(f"Failed to reject withdrawal: {str(e)}")
 
 # Global database operations instance
@@ -0,0 +1,70 @@
+"""
+Keyset pagination helpers
+Listings are ordered by (created_at DESC, id DESC) and a page continues from
+the last row of the previous one, so every page is an index range scan
+regardless of how deep the client has paged. Rows without a created_at sort
+last. The cursor is an opaque URL-safe token carrying that (created_at, id)
+pair, with an empty created_at for an undated row.
+"""
+
+import base64
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Rows fetched per round trip by streaming exports
+EXPORT_CHUNK_SIZE = 1000
+
+
+def encode_cursor(created_at: Optional[datetime], row_id: UUID) -> str:
+    """Encode the sort key of the last row on a page"""
+    raw = f"{created_at.isoformat() if created_at else ''}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], UUID]:
+    """Decode a cursor from encode_cursor; raises ValueError if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        return (datetime.fromisoformat(created_at) if created_at else None), UUID(row_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid pagination cursor") from e
+
+
+def encode_rank_cursor(exact: bool, rank: float, row_id: UUID) -> str:
+    """Encode the sort key of the last row on a page of ranked search results"""
+    raw = f"{int(bool(exact))}|{float(rank)!r}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_rank_cursor(cursor: str) -> Tuple[bool, float, UUID]:
+    """Decode a cursor from encode_rank_cursor; raises ValueError if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        exact, rank, row_id = base64.urlsafe_b64decode(padded).decode().split("|", 2)
+        if exact not in ("0", "1"):
+            raise ValueError(exact)
+        return exact == "1", float(rank), UUID(row_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid pagination cursor") from e
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def like_pattern(search: Optional[str]) -> Optional[str]:
+    """Substring ILIKE pattern with LIKE wildcards in the input escaped"""
+    if not search:
+        return None
+    return f"%{_escape_like(search)}%"
+
+
+def prefix_pattern(search: Optional[str]) -> Optional[str]:
+    """Lower-cased prefix LIKE pattern with LIKE wildcards in the input escaped"""
+    if not search:
+        return None
+    return f"{_escape_like(search.lower())}%"
@@ -0,0 +1,94 @@
+"""
+Authenticated-principal cache
+get_current_user resolves the token subject to a user (or admin) row on
+every authenticated request. This keeps a bounded LRU of those principals,
+keyed by (role kind, email), with entries expiring after
+PRINCIPAL_CACHE_TTL_SECONDS. Only the fields routes read are stored, never
+the password hash. db_ops invalidates entries after commit when a user's
+profile, password or status changes. Each invalidation bumps a generation
+counter, and a lookup that raced an invalidation is not cached.
+"""
+
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
+# Columns kept per principal kind
+USER_FIELDS = ("id", "email", "full_name", "referral_code", "referred_by", "role", "is_active", "created_at")
+ADMIN_FIELDS = ("id", "email", "full_name", "role", "is_active", "created_at", "last_login")
+
+Key = Tuple[str, str]
+LoadFn = Callable[[], Awaitable[Optional[dict]]]
+
+
+def project(row: dict, fields: Iterable[str]) -> Dict[str, Any]:
+    """Keep only ``fields`` of a row, with UUID ids as strings"""
+    principal = {field: row.get(field) for field in fields}
+    if principal.get("id") is not None:
+        principal["id"] = str(principal["id"])
+    return principal
+
+
+class PrincipalCache:
+    """Bounded LRU + TTL cache of authenticated principals"""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries: "OrderedDict[Key, Tuple[float, dict]]" = OrderedDict()
+        self._counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    async def get_or_load(self, kind: str, email: str, load: LoadFn) -> Optional[dict]:
+        """Return a copy of the cached principal, loading it on a miss; None results are not cached"""
+        key = (kind, email)
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() < entry[0]:
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return dict(entry[1])
+
+        self._counters["misses"] += 1
+        generation = self.generation
+        principal = await load()
+        if principal is None:
+            self._entries.pop(key, None)
+            return None
+        if self.ttl > 0 and generation == self.generation:
+            self._entries[key] = (time.monotonic() + self.ttl, principal)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return dict(principal)
+
+    def invalidate(self, email: Optional[str] = None, user_id: Optional[str] = None) -> None:
+        """Drop every kind of principal for an email and/or a user/admin ID"""
+        self.generation += 1
+        self._counters["invalidations"] += 1
+        user_id = str(user_id) if user_id else None
+        for key in [
+            key for key, (_, principal) in self._entries.items()
+            if (email and key[1] == email) or (user_id and principal.get("id") == user_id)
+        ]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {
+            **self._counters,
+            "entries": len(self._entries),
+            "hit_ratio": round(self._counters["hits"] / lookups, 4) if lookups else 0.0,
+            "ttl_seconds": self.ttl,
+            "max_entries": self.max_entries,
+        }
+
+
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_TTL_SECONDS, PRINCIPAL_CACHE_MAX_ENTRIES)
@@ -0,0 +1,891 @@
+"""
+Named SQL statements used by DatabaseOperations
+Every statement is compiled once at import time and referenced by name, and
+the name is attached as the ``query_name`` execution option so metrics, plan
+capture and caches can key on it. Dynamic UPDATEs are only built from the
+whitelisted columns in UPDATABLE_COLUMNS and are cached per column set;
+paginated listings are likewise built from the predicates declared in
+_PAGES and cached per filter combination.
+"""
+
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+
+
+# Recomputes user_dashboard_stats rows from the source tables; {where} picks the users
+_DASHBOARD_STATS_UPSERT = """
+    INSERT INTO user_dashboard_stats
+    (user_id, courses_enrolled, hours_learned, certificates, total_earnings, successful_referrals, updated_at)
+    SELECT u.id,
+           COALESCE(e.courses_enrolled, 0),
+           COALESCE(e.hours_learned, 0),
+           COALESCE(e.certificates, 0),
+           COALESCE(u.total_earnings, 0),
+           COALESCE(r.successful_referrals, 0),
+           NOW()
+    FROM users u
+    LEFT JOIN LATERAL (
+        SELECT COUNT(*) as courses_enrolled,
+               COUNT(*) FILTER (WHERE en.progress >= 100) as certificates,
+               SUM(c.duration_hours) as hours_learned
+        FROM enrollments en
+        LEFT JOIN courses c ON c.id = en.course_id
+        WHERE en.user_id = u.id
+    ) e ON true
+    LEFT JOIN LATERAL (
+        SELECT COUNT(*) as successful_referrals
+        FROM referrals
+        WHERE referrer_id = u.id AND status = 'completed'
+    ) r ON true
+    {where}
+    ON CONFLICT (user_id) DO UPDATE SET
+        courses_enrolled = EXCLUDED.courses_enrolled,
+        hours_learned = EXCLUDED.hours_learned,
+        certificates = EXCLUDED.certificates,
+        total_earnings = EXCLUDED.total_earnings,
+        successful_referrals = EXCLUDED.successful_referrals,
+        updated_at = EXCLUDED.updated_at
+"""
+
+# Admin user search. Matches are ranked (exact email first, then trigram
+# similarity) and paged by the keyset (exact, rank, id); a NULL cursor_id
+# starts from the top. The count applies the same match and filters.
+_USER_SEARCH_MATCH = {
+    "pattern": "(u.full_name ILIKE :pattern OR u.email ILIKE :pattern)",
+    "prefix": "(lower(u.full_name) LIKE :prefix OR lower(u.email) LIKE :prefix)",
+}
+
+_USER_SEARCH = """
+    SELECT u.id, u.full_name, u.email, u.referral_code, u.referred_by, u.role,
+           u.total_earnings, u.is_active, u.created_at, u.updated_at,
+           lower(u.email) = lower(:query) AS exact,
+           GREATEST(similarity(u.full_name, :query), similarity(u.email, :query)) AS rank
+    FROM users u
+    WHERE {match}
+      AND (CAST(:is_active AS boolean) IS NULL OR u.is_active = CAST(:is_active AS boolean))
+      AND (CAST(:cursor_id AS uuid) IS NULL
+           OR (lower(u.email) = lower(:query),
+               GREATEST(similarity(u.full_name, :query), similarity(u.email, :query)),
+               u.id)
+              < (CAST(:cursor_exact AS boolean), CAST(:cursor_rank AS double precision), CAST(:cursor_id AS uuid)))
+    ORDER BY exact DESC, rank DESC, u.id DESC
+    LIMIT :limit OFFSET :offset
+"""
+
+_USER_SEARCH_COUNT = """
+    SELECT count(*)
+    FROM users u
+    WHERE {match}
+      AND (CAST(:is_active AS boolean) IS NULL OR u.is_active = CAST(:is_active AS boolean))
+"""
+
+_STATEMENTS: Dict[str, str] = {
+    # Users
+    "users.insert": """
+        INSERT INTO users (id, full_name, email, password, referral_code, referred_by, created_at, role, total_earnings)
+        VALUES (:id, :full_name, :email, :password, :referral_code, :referred_by, :created_at, :role, :total_earnings)
+        RETURNING *
+    """,
+    "users.by_email": "SELECT * FROM users WHERE email = :email",
+    "users.by_id": "SELECT * FROM users WHERE id = :user_id",
+    "users.by_referral_code": "SELECT * FROM users WHERE referral_code = :referral_code",
+    "users.id_by_referral_code": "SELECT id FROM users WHERE referral_code = :referral_code",
+    "users.referral_code": "SELECT referral_code FROM users WHERE id = :user_id",
+    "users.all": "SELECT * FROM users ORDER BY created_at DESC",
+    # Admin lookup: substring match served by the trigram indexes, exact
+    # email first, then by trigram similarity; paged by (exact, rank, id)
+    "users.search": _USER_SEARCH.format(match=_USER_SEARCH_MATCH["pattern"]),
+    "users.search_count": _USER_SEARCH_COUNT.format(match=_USER_SEARCH_MATCH["pattern"]),
+    # Queries too short for trigrams: prefix match on the lower() pattern indexes
+    "users.search_prefix": _USER_SEARCH.format(match=_USER_SEARCH_MATCH["prefix"]),
+    "users.search_prefix_count": _USER_SEARCH_COUNT.format(match=_USER_SEARCH_MATCH["prefix"]),
+    "users.set_active": "UPDATE users SET is_active = :is_active WHERE id = :user_id",
+    # Upgrade a stored hash in place; a no-op if the password changed meanwhile
+    "users.rehash_password": "UPDATE users SET password = :new_hash WHERE id = :account_id AND password = :old_hash",
+    "users.bump_token_version": """
+        UPDATE users SET token_version = token_version + 1, token_version_changed_at = NOW()
+        WHERE id = :user_id
+        RETURNING token_version
+    """,
+    "users.token_versions": "SELECT id, token_version FROM users WHERE token_version > 0",
+    "users.token_versions_recent": """
+        SELECT id, token_version FROM users
+        WHERE token_version > 0
+          AND token_version_changed_at >= NOW() - make_interval(secs => :window)
+    """,
+    "users.add_earnings": """
+        UPDATE users
+        SET total_earnings = total_earnings + :bonus_amount
+        WHERE id = :referrer_id
+    """,
+    "users.deduct_earnings": """
+        UPDATE users
+        SET total_earnings = total_earnings - :amount
+        WHERE id = :user_id
+    """,
+
+    # Admin users
+    "admin_users.active_by_email": "SELECT * FROM admin_users WHERE email = :email AND is_active = TRUE",
+    "admin_users.touch_last_login": "UPDATE admin_users SET last_login = :last_login WHERE id = :admin_id",
+    "admin_users.rehash_password": """
+        UPDATE admin_users SET password = :new_hash WHERE id = :account_id AND password = :old_hash
+    """,
+
+    # Refresh tokens; revoked rows are kept until they expire
+    "refresh_tokens.insert": """
+        INSERT INTO refresh_tokens (token_id, user_id, email, created_at, last_used, expires_at)
+        VALUES (:token_id, :user_id, :email, :created_at, :created_at, :expires_at)
+    """,
+    "refresh_tokens.by_id": """
+        SELECT token_id, user_id, email, created_at, last_used, expires_at, revoked_at
+        FROM refresh_tokens WHERE token_id = :token_id
+    """,
+    "refresh_tokens.touch": "UPDATE refresh_tokens SET last_used = :last_used WHERE token_id = :token_id",
+    "refresh_tokens.revoke": """
+        UPDATE refresh_tokens SET revoked_at = NOW()
+        WHERE token_id = :token_id AND revoked_at IS NULL
+    """,
+    "refresh_tokens.revoke_user": """
+        UPDATE refresh_tokens SET revoked_at = NOW()
+        WHERE user_id = :user_id AND revoked_at IS NULL AND expires_at > NOW()
+        RETURNING token_id
+    """,
+    "refresh_tokens.active_by_user": """
+        SELECT token_id, created_at, last_used
+        FROM refresh_tokens
+        WHERE user_id = :user_id AND revoked_at IS NULL AND expires_at > NOW()
+        ORDER BY created_at DESC
+    """,
+    "refresh_tokens.delete_expired": """
+        DELETE FROM refresh_tokens
+        WHERE token_id IN (
+            SELECT token_id FROM refresh_tokens
+            WHERE expires_at <= NOW()
+            ORDER BY expires_at
+            LIMIT :batch_size
+        )
+    """,
+
+    # Courses
+    "courses.all": "SELECT * FROM courses ORDER BY created_at DESC",
+    "courses.insert": """
+        INSERT INTO courses (id, title, description, instructor, price, duration, duration_hours,
+                             level, students, rating, image, created_at, updated_at)
+        VALUES (:id, :title, :description, :instructor, :price, :duration, :duration_hours,
+                :level, :students, :rating, :image, :created_at, :updated_at)
+        RETURNING *
+    """,
+    "courses.delete": "DELETE FROM courses WHERE id = :course_id",
+    "courses.set_active": "UPDATE courses SET is_active = :is_active, updated_at = :updated_at WHERE id = :course_id",
+    "courses.increment_students": "UPDATE courses SET students = students + 1 WHERE id = :course_id",
+    "courses.levels": "SELECT DISTINCT level FROM courses WHERE level IS NOT NULL ORDER BY level",
+    "courses.enrollment_count": "SELECT COUNT(*) as total_enrollments FROM enrollments WHERE course_id = :course_id",
+    "courses.active_enrollment_count": "SELECT COUNT(*) as active_enrollments FROM enrollments WHERE course_id = :course_id AND status = 'active'",
+    "courses.completed_enrollment_count": "SELECT COUNT(*) as completed_enrollments FROM enrollments WHERE course_id = :course_id AND status = 'completed'",
+    "courses.revenue": """
+        SELECT COALESCE(SUM(c.price), 0) as total_revenue
+        FROM enrollments e
+        JOIN courses c ON e.course_id = c.id
+        WHERE e.course_id = :course_id AND e.payment_status = 'approved'
+    """,
+
+    # Enrollments
+    "enrollments.insert": """
+        INSERT INTO enrollments (id, user_id, course_id, enrolled_at, progress, status)
+        VALUES (:id, :user_id, :course_id, :enrolled_at, :progress, :status)
+        RETURNING *
+    """,
+    "enrollments.insert_approved": """
+        INSERT INTO enrollments (id, user_id, course_id, enrolled_at, progress, status, payment_status)
+        VALUES (:id, :user_id, :course_id, :enrolled_at, :progress, :status, 'approved')
+    """,
+    "enrollments.by_user": """
+        SELECT e.*, c.title as course_title, c.description as course_description,
+               c.level as course_level, c.duration as course_duration, c.price as course_price,
+               c.instructor as course_instructor, c.duration_hours as course_duration_hours
+        FROM enrollments e
+        JOIN courses c ON e.course_id = c.id
+        WHERE e.user_id = :user_id
+        ORDER BY e.enrolled_at DESC
+    """,
+    "enrollments.by_course": """
+        SELECT e.*, u.full_name as user_name, u.email as user_email
+        FROM enrollments e
+        JOIN users u ON e.user_id = u.id
+        WHERE e.course_id = :course_id
+        ORDER BY e.enrolled_at DESC
+    """,
+    "enrollments.user_ids_by_course": "SELECT DISTINCT user_id FROM enrollments WHERE course_id = :course_id",
+    "enrollments.update_progress": """
+        UPDATE enrollments
+        SET progress = :progress, status = :status
+        WHERE id = :enrollment_id AND user_id = :user_id
+        RETURNING *
+    """,
+    "enrollments.count_for_user_course": """
+        SELECT COUNT(*) as count FROM enrollments
+        WHERE user_id = :user_id AND course_id = :course_id
+    """,
+
+    # Payment methods
+    "payment_methods.count_for_user": "SELECT COUNT(*) as count FROM payment_methods WHERE user_id = :user_id",
+    "payment_methods.insert": """
+        INSERT INTO payment_methods (id, user_id, type, account_number, holder_name, is_default, created_at)
+        VALUES (:id, :user_id, :type, :account_number, :holder_name, :is_default, :created_at)
+        RETURNING *
+    """,
+    "payment_methods.by_user": "SELECT * FROM payment_methods WHERE user_id = :user_id ORDER BY created_at DESC",
+    "payment_methods.delete": "DELETE FROM payment_methods WHERE id = :method_id AND user_id = :user_id",
+    "payment_methods.clear_default": "UPDATE payment_methods SET is_default = false WHERE user_id = :user_id",
+    "payment_methods.set_default": "UPDATE payment_methods SET is_default = true WHERE id = :method_id AND user_id = :user_id",
+
+    # Admin payment accounts
+    "payment_accounts.list": """
+        SELECT * FROM admin_payment_accounts
+        WHERE (:active_only = false OR is_active = true)
+        ORDER BY display_order ASC, created_at DESC
+    """,
+    "payment_accounts.by_id": "SELECT * FROM admin_payment_accounts WHERE id = :account_id",
+    "payment_accounts.insert": """
+        INSERT INTO admin_payment_accounts
+        (id, type, account_name, account_number, bank_name, instructions, qr_code_url, is_active, display_order, created_at, updated_at)
+        VALUES
+        (:id, :type, :account_name, :account_number, :bank_name, :instructions, :qr_code_url, :is_active, :display_order, :created_at, :updated_at)
+        RETURNING *
+    """,
+    "payment_accounts.delete": "DELETE FROM admin_payment_accounts WHERE id = :account_id",
+
+    # Payment requests
+    "payment_requests.list": """
+        SELECT pr.id, pr.user_id, pr.course_id, pr.payment_account_id, pr.amount,
+               pr.transaction_screenshot_url, pr.transaction_reference, pr.status,
+               pr.admin_notes, pr.rejection_reason, pr.approved_by, pr.approved_at, pr.created_at,
+               COALESCE(pr.updated_at, pr.created_at) as updated_at,
+               u.full_name as user_name, u.email as user_email, c.title as course_title,
+               apa.type as payment_account_name, apa.type as payment_account_type
+        FROM payment_requests pr
+        JOIN users u ON pr.user_id = u.id
+        JOIN courses c ON pr.course_id = c.id
+        JOIN admin_payment_accounts apa ON pr.payment_account_id = apa.id
+        ORDER BY pr.created_at DESC
+    """,
+    "payment_requests.list_by_status": """
+        SELECT pr.id, pr.user_id, pr.course_id, pr.payment_account_id, pr.amount,
+               pr.transaction_screenshot_url, pr.transaction_reference, pr.status,
+               pr.admin_notes, pr.rejection_reason, pr.approved_by, pr.approved_at, pr.created_at,
+               COALESCE(pr.updated_at, pr.created_at) as updated_at,
+               u.full_name as user_name, u.email as user_email, c.title as course_title,
+               apa.type as payment_account_name, apa.type as payment_account_type
+        FROM payment_requests pr
+        JOIN users u ON pr.user_id = u.id
+        JOIN courses c ON pr.course_id = c.id
+        JOIN admin_payment_accounts apa ON pr.payment_account_id = apa.id
+        WHERE pr.status = :status
+        ORDER BY pr.created_at DESC
+    """,
+    "payment_requests.by_ids": "SELECT * FROM payment_requests WHERE id = ANY(CAST(:ids AS uuid[]))",
+    "payment_requests.insert": """
+        INSERT INTO payment_requests
+        (id, user_id, course_id, payment_account_id, amount, transaction_screenshot_url, transaction_reference, status, created_at, updated_at)
+        VALUES
+        (:id, :user_id, :course_id, :payment_account_id, :amount, :transaction_screenshot_url, :transaction_reference, :status, :created_at, :updated_at)
+        RETURNING *
+    """,
+    "payment_requests.by_id": "SELECT * FROM payment_requests WHERE id = :request_id",
+    "payment_requests.detail_by_id": """
+        SELECT pr.*, u.full_name as user_name, u.email as user_email,
+               c.title as course_title, apa.account_name as payment_account_name, apa.type as payment_account_type
+        FROM payment_requests pr
+        JOIN users u ON pr.user_id = u.id
+        JOIN courses c ON pr.course_id = c.id
+        JOIN admin_payment_accounts apa ON pr.payment_account_id = apa.id
+        WHERE pr.id = :request_id
+    """,
+    "payment_requests.by_user": """
+        SELECT pr.*, c.title as course_title, apa.account_name as payment_account_name, apa.type as payment_account_type
+        FROM payment_requests pr
+        JOIN courses c ON pr.course_id = c.id
+        JOIN admin_payment_accounts apa ON pr.payment_account_id = apa.id
+        WHERE pr.user_id = :user_id
+        ORDER BY pr.created_at DESC
+    """,
+    "payment_requests.latest_for_user_course": """
+        SELECT * FROM payment_requests
+        WHERE user_id = :user_id AND course_id = :course_id
+        ORDER BY created_at DESC
+        LIMIT 1
+    """,
+    "payment_requests.pending_for_approval": """
+        SELECT pr.*, u.referred_by, c.price as course_price
+        FROM payment_requests pr
+        JOIN users u ON pr.user_id = u.id
+        JOIN courses c ON pr.course_id = c.id
+        WHERE pr.id = :request_id AND pr.status = 'pending'
+    """,
+    "payment_requests.approve": """
+        UPDATE payment_requests
+        SET status = 'approved',
+            approved_by = :admin_id,
+            approved_at = :approved_at,
+            admin_notes = :admin_notes,
+            updated_at = :updated_at
+        WHERE id = :request_id
+    """,
+    "payment_requests.mark_approved": """
+        UPDATE payment_requests
+        SET status = 'approved', approved_at = :approved_at, admin_notes = :admin_notes, approved_by = :admin_id
+        WHERE id = :request_id
+    """,
+    "payment_requests.reject": """
+        UPDATE payment_requests
+        SET status = 'rejected',
+            approved_by = :admin_id,
+            rejection_reason = :rejection_reason,
+            updated_at = :updated_at
+        WHERE id = :request_id AND status = 'pending'
+    """,
+
+    # Referrals
+    "referrals.insert": """
+        INSERT INTO referrals (id, referrer_id, name, email, status, reward_earned, date_referred)
+        VALUES (:id, :referrer_id, :name, :email, :status, :reward_earned, :date_referred)
+        RETURNING *
+    """,
+    "referrals.by_referrer": "SELECT * FROM referrals WHERE referrer_id = :user_id ORDER BY date_referred DESC",
+    "referrals.complete": """
+        UPDATE referrals
+        SET status = 'completed', reward_earned = :reward_amount, payment_request_id = :payment_request_id
+        WHERE referrer_id = :referrer_id AND email = (SELECT email FROM users WHERE id = :user_id)
+    """,
+    "referrals.stats_for_referrer": """
+        SELECT
+            COUNT(*) as total_referrals,
+            COUNT(CASE WHEN status = 'completed' THEN 1 END) as completed_referrals,
+            COUNT(CASE WHEN status = 'pending' THEN 1 END) as pending_referrals,
+            COALESCE(SUM(reward_earned), 0) as total_earnings
+        FROM referrals
+        WHERE referrer_id = :user_id
+    """,
+    "referrals.recent_by_referrer": """
+        SELECT name, reward_earned, date_referred
+        FROM referrals
+        WHERE referrer_id = :user_id
+        ORDER BY date_referred DESC
+        LIMIT :limit
+    """,
+
+    # Dashboard read model, kept current by the write paths that change it
+    "dashboard_stats.by_user": "SELECT * FROM user_dashboard_stats WHERE user_id = :user_id",
+    "dashboard_stats.refresh": _DASHBOARD_STATS_UPSERT.format(where="WHERE u.id = :user_id") + " RETURNING *",
+    "dashboard_stats.refresh_many": _DASHBOARD_STATS_UPSERT.format(where="WHERE u.id = ANY(CAST(:ids AS uuid[]))"),
+    # WHERE true keeps ON CONFLICT from being parsed as part of the last JOIN
+    "dashboard_stats.rebuild": _DASHBOARD_STATS_UPSERT.format(where="WHERE true"),
+
+    # Student dashboard: the user's totals, enrollment and referral stats in one round trip
+    "dashboard.summary": """
+        WITH enrollment_stats AS (
+            SELECT
+                COUNT(*) as courses_enrolled,
+                COUNT(*) FILTER (WHERE e.progress >= 100) as certificates,
+                COALESCE(SUM(c.duration_hours), 0) as hours_learned
+            FROM enrollments e
+            LEFT JOIN courses c ON c.id = e.course_id
+            WHERE e.user_id = :user_id
+        ),
+        referral_stats AS (
+            SELECT
+                COUNT(*) as total_referrals,
+                COUNT(*) FILTER (WHERE status = 'completed') as completed_referrals,
+                COUNT(*) FILTER (WHERE status = 'pending') as pending_referrals,
+                COALESCE(SUM(reward_earned), 0) as referral_earnings
+            FROM referrals
+            WHERE referrer_id = :user_id
+        )
+        SELECT u.total_earnings, u.referral_code, es.*, rs.*
+        FROM users u
+        CROSS JOIN enrollment_stats es
+        CROSS JOIN referral_stats rs
+        WHERE u.id = :user_id
+    """,
+    "referral_earnings.insert": """
+        INSERT INTO referral_earnings
+        (id, referrer_id, referred_user_id, enrollment_id, course_id, bonus_amount, status, created_at)
+        VALUES
+        (:id, :referrer_id, :referred_user_id, :enrollment_id, :course_id, :bonus_amount, :status, :created_at)
+    """,
+    "referral_earnings.by_referrer": """
+        SELECT re.*, u.full_name as referred_user_name, c.title as course_title
+        FROM referral_earnings re
+        JOIN users u ON re.referred_user_id = u.id
+        JOIN courses c ON re.course_id = c.id
+        WHERE re.referrer_id = :user_id
+        ORDER BY re.created_at DESC
+    """,
+
+    # Withdrawals
+    "withdrawals.insert": """
+        INSERT INTO withdrawal_requests
+        (id, user_id, amount, account_type, account_number, account_holder_name, phone_number, status, created_at)
+        VALUES (:id, :user_id, :amount, :account_type, :account_number, :account_holder_name, :phone_number, :status, :created_at)
+        RETURNING *
+    """,
+    "withdrawals.by_user": """
+        SELECT * FROM withdrawal_requests
+        WHERE user_id = :user_id
+        ORDER BY created_at DESC
+    """,
+    "withdrawals.list": """
+        SELECT wr.*, u.full_name, u.email
+        FROM withdrawal_requests wr
+        JOIN users u ON wr.user_id = u.id
+        ORDER BY wr.created_at DESC
+    """,
+    "withdrawals.list_by_status": """
+        SELECT wr.*, u.full_name, u.email
+        FROM withdrawal_requests wr
+        JOIN users u ON wr.user_id = u.id
+        WHERE wr.status = :status
+        ORDER BY wr.created_at DESC
+    """,
+    "withdrawals.pending_with_earnings": """
+        SELECT wr.*, u.total_earnings
+        FROM withdrawal_requests wr
+        JOIN users u ON wr.user_id = u.id
+        WHERE wr.id = :withdrawal_id AND wr.status = 'pending'
+    """,
+    "withdrawals.approve": """
+        UPDATE withdrawal_requests
+        SET status = 'approved', processed_at = :processed_at, processed_by = :admin_id, admin_notes = :admin_notes
+        WHERE id = :withdrawal_id
+    """,
+    "withdrawals.reject": """
+        UPDATE withdrawal_requests
+        SET status = 'rejected', processed_at = :processed_at, processed_by = :admin_id, rejection_reason = :rejection_reason
+        WHERE id = :withdrawal_id AND status = 'pending'
+    """,
+
+    # Analytics
+    # Admin dashboard counters, one pass per table
+    "admin.stats": """
+        SELECT p.*, u.*
+        FROM (
+            SELECT
+                COUNT(*) FILTER (WHERE status = 'pending') as pending_payments,
+                COUNT(*) FILTER (WHERE status = 'approved') as approved_payments,
+                COUNT(*) FILTER (WHERE status = 'rejected') as rejected_payments
+            FROM payment_requests
+        ) p
+        CROSS JOIN (
+            SELECT
+                COUNT(*) as total_users,
+                COUNT(*) FILTER (WHERE is_active) as active_users
+            FROM users
+        ) u
+    """,
+    "analytics.overview": """
+        SELECT u.*, c.*, e.*
+        FROM (
+            SELECT
+                COUNT(*) as total_users,
+                COUNT(*) FILTER (WHERE created_at >= NOW() - INTERVAL '30 days') as recent_users
+            FROM users
+        ) u
+        CROSS JOIN (SELECT COUNT(*) as total_courses FROM courses) c
+        CROSS JOIN (
+            SELECT
+                COUNT(*) as total_enrollments,
+                COUNT(*) FILTER (WHERE en.enrolled_at >= NOW() - INTERVAL '30 days') as recent_enrollments,
+                COALESCE(SUM(co.price) FILTER (WHERE en.payment_status = 'approved'), 0) as total_revenue,
+                COALESCE(SUM(co.price) FILTER (
+                    WHERE en.payment_status = 'approved'
+                    AND en.enrolled_at >= NOW() - INTERVAL '30 days'
+                ), 0) as recent_revenue
+            FROM enrollments en
+            LEFT JOIN courses co ON en.course_id = co.id
+        ) e
+    """,
+    "analytics.top_courses": """
+        SELECT
+            c.id,
+            c.title,
+            c.instructor,
+            c.price,
+            COUNT(e.id) as enrollments,
+            COALESCE(SUM(c.price), 0) as revenue
+        FROM courses c
+        LEFT JOIN enrollments e ON c.id = e.course_id AND e.payment_status = 'approved'
+        GROUP BY c.id, c.title, c.instructor, c.price
+        ORDER BY enrollments DESC
+        LIMIT 10
+    """,
+    "analytics.completion_rates": """
+        SELECT
+            c.title,
+            COUNT(e.id) as total_enrollments,
+            COUNT(CASE WHEN e.status = 'completed' THEN 1 END) as completed_enrollments
+        FROM courses c
+        LEFT JOIN enrollments e ON c.id = e.course_id
+        GROUP BY c.id, c.title
+        HAVING COUNT(e.id) > 0
+        ORDER BY total_enrollments DESC
+    """,
+    "analytics.referral_stats": """
+        SELECT
+            COUNT(*) as total_referrals,
+            COUNT(CASE WHEN status = 'completed' THEN 1 END) as completed_referrals,
+            COUNT(CASE WHEN status = 'pending' THEN 1 END) as pending_referrals,
+            COALESCE(SUM(reward_earned), 0) as total_rewards_paid
+        FROM referrals
+    """,
+    "analytics.top_referrers": """
+        SELECT
+            u.full_name,
+            u.email,
+            COUNT(r.id) as total_referrals,
+            COUNT(CASE WHEN r.status = 'completed' THEN 1 END) as successful_referrals,
+            COALESCE(SUM(r.reward_earned), 0) as total_earnings
+        FROM users u
+        LEFT JOIN referrals r ON u.id = r.referrer_id
+        GROUP BY u.id, u.full_name, u.email
+        HAVING COUNT(r.id) > 0
+        ORDER BY total_referrals DESC
+        LIMIT 10
+    """,
+
+    # Daily rollups, bumped by the registration and enrollment write paths
+    "rollups.add_user": """
+        INSERT INTO analytics_daily_users (day, new_users)
+        SELECT DATE(created_at), 1 FROM users WHERE id = :user_id
+        ON CONFLICT (day) DO UPDATE SET new_users = analytics_daily_users.new_users + 1
+    """,
+    "rollups.add_enrollment": """
+        INSERT INTO analytics_daily_courses (day, course_id, enrollments, approved_enrollments, revenue)
+        SELECT DATE(e.enrolled_at), e.course_id, 1,
+               CASE WHEN e.payment_status = 'approved' THEN 1 ELSE 0 END,
+               CASE WHEN e.payment_status = 'approved' THEN c.price ELSE 0 END
+        FROM enrollments e
+        JOIN courses c ON e.course_id = c.id
+        WHERE e.id = :enrollment_id
+        ON CONFLICT (day, course_id) DO UPDATE SET
+            enrollments = analytics_daily_courses.enrollments + EXCLUDED.enrollments,
+            approved_enrollments = analytics_daily_courses.approved_enrollments + EXCLUDED.approved_enrollments,
+            revenue = analytics_daily_courses.revenue + EXCLUDED.revenue
+    """,
+    # Periodic refresh: recompute every rollup row from :since onwards. The
+    # lock blocks the rollups.add_* upserts (ROW EXCLUSIVE) until the refresh
+    # commits, so an event is neither lost between clear and fill nor counted twice
+    "rollups.lock": "LOCK TABLE analytics_daily_users, analytics_daily_courses IN SHARE ROW EXCLUSIVE MODE",
+    "rollups.clear_users": "DELETE FROM analytics_daily_users WHERE day >= :since",
+    "rollups.fill_users": """
+        INSERT INTO analytics_daily_users (day, new_users)
+        SELECT DATE(created_at), COUNT(*)
+        FROM users
+        WHERE created_at >= :since
+        GROUP BY DATE(created_at)
+        ON CONFLICT (day) DO UPDATE SET new_users = EXCLUDED.new_users
+    """,
+    "rollups.clear_courses": "DELETE FROM analytics_daily_courses WHERE day >= :since",
+    "rollups.fill_courses": """
+        INSERT INTO analytics_daily_courses (day, course_id, enrollments, approved_enrollments, revenue)
+        SELECT DATE(e.enrolled_at), e.course_id, COUNT(*),
+               COUNT(*) FILTER (WHERE e.payment_status = 'approved'),
+               COALESCE(SUM(c.price) FILTER (WHERE e.payment_status = 'approved'), 0)
+        FROM enrollments e
+        JOIN courses c ON e.course_id = c.id
+        WHERE e.enrolled_at >= :since
+        GROUP BY DATE(e.enrolled_at), e.course_id
+        ON CONFLICT (day, course_id) DO UPDATE SET
+            enrollments = EXCLUDED.enrollments,
+            approved_enrollments = EXCLUDED.approved_enrollments,
+            revenue = EXCLUDED.revenue
+    """,
+
+    # Analytics over the rollups; generate_series fills days without activity
+    "analytics.daily_revenue": """
+        SELECT d.day::date as date, COALESCE(SUM(r.revenue), 0) as revenue
+        FROM generate_series(CURRENT_DATE - CAST(:days AS integer), CURRENT_DATE, INTERVAL '1 day') d(day)
+        LEFT JOIN analytics_daily_courses r ON r.day = d.day::date
+        GROUP BY d.day
+        ORDER BY d.day
+    """,
+    "analytics.daily_new_users": """
+        SELECT d.day::date as date, COALESCE(r.new_users, 0) as new_users
+        FROM generate_series(CURRENT_DATE - CAST(:days AS integer), CURRENT_DATE, INTERVAL '1 day') d(day)
+        LEFT JOIN analytics_daily_users r ON r.day = d.day::date
+        ORDER BY d.day
+    """,
+    "analytics.daily_enrollments": """
+        SELECT d.day::date as date, COALESCE(SUM(r.enrollments), 0) as enrollments
+        FROM generate_series(CURRENT_DATE - CAST(:days AS integer), CURRENT_DATE, INTERVAL '1 day') d(day)
+        LEFT JOIN analytics_daily_courses r ON r.day = d.day::date
+        GROUP BY d.day
+        ORDER BY d.day
+    """,
+    "analytics.course_enrollments": """
+        SELECT c.title, COALESCE(SUM(r.enrollments), 0) as enrollments
+        FROM courses c
+        LEFT JOIN analytics_daily_courses r
+            ON r.course_id = c.id AND r.day >= CURRENT_DATE - CAST(:days AS integer)
+        GROUP BY c.id, c.title
+        ORDER BY enrollments DESC
+        LIMIT 10
+    """,
+    "reports.revenue_summary": """
+        SELECT COALESCE(SUM(revenue), 0) as total_revenue,
+               COALESCE(SUM(approved_enrollments), 0) as total_transactions
+        FROM analytics_daily_courses
+        WHERE day BETWEEN CAST(:start_date AS date) AND CAST(:end_date AS date)
+    """,
+    "reports.course_revenue": """
+        SELECT c.title, c.instructor,
+               COALESCE(SUM(r.approved_enrollments), 0) as enrollments,
+               COALESCE(SUM(r.revenue), 0) as revenue
+        FROM courses c
+        LEFT JOIN analytics_daily_courses r
+            ON r.course_id = c.id
+            AND r.day BETWEEN CAST(:start_date AS date) AND CAST(:end_date AS date)
+        GROUP BY c.id, c.title, c.instructor
+        ORDER BY revenue DESC
+    """,
+    # Report ranges are inclusive dates; the upper bound is the start of the
+    # day after end_date so created_at/enrolled_at are compared as a range.
+    # Unbounded reports (:undated) also count rows without a timestamp
+    "reports.user_summary": """
+        SELECT COUNT(*) as total_users,
+               COUNT(*) FILTER (WHERE u.created_at >= NOW() - INTERVAL '30 days') as new_users_30d,
+               COUNT(*) FILTER (WHERE u.is_active) as active_users
+        FROM users u
+        WHERE (u.created_at >= CAST(:start_date AS date)
+               AND u.created_at < CAST(:end_date AS date) + 1)
+           OR (CAST(:undated AS boolean) AND u.created_at IS NULL)
+    """,
+    "reports.user_activity": """
+        SELECT DATE(u.created_at) as date, COUNT(*) as new_users
+        FROM users u
+        WHERE (u.created_at >= CAST(:start_date AS date)
+               AND u.created_at < CAST(:end_date AS date) + 1)
+           OR (CAST(:undated AS boolean) AND u.created_at IS NULL)
+        GROUP BY DATE(u.created_at)
+        ORDER BY date
+    """,
+    "reports.course_performance": """
+        SELECT c.title, c.instructor, c.price, c.level,
+               COUNT(e.id) as total_enrollments,
+               COUNT(*) FILTER (WHERE e.payment_status = 'approved') as paid_enrollments,
+               COUNT(*) FILTER (WHERE e.status = 'completed') as completed_enrollments,
+               COALESCE(SUM(c.price) FILTER (WHERE e.payment_status = 'approved'), 0) as revenue
+        FROM courses c
+        LEFT JOIN enrollments e
+            ON e.course_id = c.id
+            AND ((e.enrolled_at >= CAST(:start_date AS date)
+                  AND e.enrolled_at < CAST(:end_date AS date) + 1)
+                 OR (CAST(:undated AS boolean) AND e.enrolled_at IS NULL))
+        GROUP BY c.id, c.title, c.instructor, c.price, c.level
+        ORDER BY revenue DESC
+    """,
+}
+
+
+# Columns a dynamic UPDATE may set, per table; anything else is rejected
+UPDATABLE_COLUMNS: Dict[str, FrozenSet[str]] = {
+    "users": frozenset({
+        "full_name", "email", "password", "referred_by", "role", "is_active", "updated_at",
+    }),
+    "courses": frozenset({
+        "title", "description", "image", "price", "duration", "duration_hours", "level", "instructor",
+        "is_active", "updated_at",
+    }),
+    "admin_payment_accounts": frozenset({
+        "type", "account_name", "account_number", "bank_name", "instructions",
+        "qr_code_url", "is_active", "display_order", "updated_at",
+    }),
+}
+
+# Keyset-paginated listings: name -> (table, alias, columns, FROM ... JOIN ..., filters).
+# Each filter is a predicate on the listing's own table. The count query uses
+# the same FROM/JOIN clause and filters, so the total covers exactly the rows
+# the pages can reach.
+_PAGES: Dict[str, Tuple[str, str, str, str, Dict[str, str]]] = {
+    "users.page": (
+        "users", "u",
+        """
+        u.id, u.full_name, u.email, u.referral_code, u.referred_by, u.role,
+        u.total_earnings, u.is_active, u.created_at, u.updated_at
+        """,
+        "users u",
+        {"is_active": "u.is_active = :is_active"},
+    ),
+    "courses.page": (
+        "courses", "c",
+        "c.*",
+        "courses c",
+        {
+            "search": "(c.title ILIKE :search OR c.description ILIKE :search OR c.instructor ILIKE :search)",
+            "level": "lower(c.level) = lower(:level)",
+            "is_active": "c.is_active = :is_active",
+        },
+    ),
+    "payment_requests.page": (
+        "payment_requests", "pr",
+        """
+        pr.id, pr.user_id, pr.course_id, pr.payment_account_id, pr.amount,
+        pr.transaction_screenshot_url, pr.transaction_reference, pr.status,
+        pr.admin_notes, pr.rejection_reason, pr.approved_by, pr.approved_at, pr.created_at,
+        COALESCE(pr.updated_at, pr.created_at) as updated_at,
+        u.full_name as user_name, u.email as user_email, c.title as course_title,
+        apa.type as payment_account_name, apa.type as payment_account_type
+        """,
+        """
+        payment_requests pr
+        JOIN users u ON pr.user_id = u.id
+        JOIN courses c ON pr.course_id = c.id
+        JOIN admin_payment_accounts apa ON pr.payment_account_id = apa.id
+        """,
+        {"status": "pr.status = :status"},
+    ),
+    "withdrawals.page": (
+        "withdrawal_requests", "wr",
+        "wr.*, u.full_name, u.email",
+        """
+        withdrawal_requests wr
+        JOIN users u ON wr.user_id = u.id
+        """,
+        {"status": "wr.status = :status"},
+    ),
+}
+
+# Unfiltered totals come from the planner's row estimate once a table is
+# large enough that an exact count would mean a full scan
+EXACT_COUNT_BELOW = 10000
+
+# Dynamic UPDATEs: name -> (table, WHERE clause, RETURNING *)
+_UPDATES: Dict[str, Tuple[str, str, bool]] = {
+    "users.update_by_email": ("users", "email = :email", True),
+    "courses.update": ("courses", "id = :course_id", False),
+    "payment_accounts.update": ("admin_payment_accounts", "id = :account_id", True),
+}
+
+
+def _compile(name: str, sql: str) -> TextClause:
+    return text(sql).execution_options(query_name=name)
+
+
+QUERIES: Dict[str, TextClause] = {
+    name: _compile(name, sql) for name, sql in _STATEMENTS.items()
+}
+
+
+@lru_cache(maxsize=256)
+def _compile_update(name: str, columns: Tuple[str, ...]) -> TextClause:
+    table, where, returning = _UPDATES[name]
+    assignments = ", ".join(f"{column} = :{column}" for column in columns)
+    sql = f"UPDATE {table} SET {assignments} WHERE {where}"
+    if returning:
+        sql += " RETURNING *"
+    return _compile(name, sql)
+
+
+def update_query(name: str, columns: Iterable[str]) -> TextClause:
+    """
+    Return the named UPDATE statement for the given columns
+
+    Columns are sorted so each combination compiles to one cached statement
+    with identical SQL text. Raises ValueError for columns outside the
+    table's whitelist or when there is nothing to update.
+    """
+    table = _UPDATES[name][0]
+    columns = tuple(sorted(set(columns)))
+    if not columns:
+        raise ValueError(f"No columns to update for {name}")
+    rejected = [column for column in columns if column not in UPDATABLE_COLUMNS[table]]
+    if rejected:
+        raise ValueError(f"Columns not updatable on {table}: {', '.join(rejected)}")
+    return _compile_update(name, columns)
+
+
+def _page_filters(name: str, filters: Iterable[str]) -> Tuple[str, ...]:
+    filters = tuple(sorted(set(filters)))
+    unknown = [f for f in filters if f not in _PAGES[name][4]]
+    if unknown:
+        raise ValueError(f"Unknown filters for {name}: {', '.join(unknown)}")
+    return filters
+
+
+def _where(predicates: List[str]) -> str:
+    return f" WHERE {' AND '.join(predicates)}" if predicates else ""
+
+
+def _sort_key(alias: str) -> str:
+    # created_at is nullable; undated rows sort last and stay reachable by the
+    # keyset predicate. Matches the expression indexes on each listing table
+    return f"COALESCE({alias}.created_at, '-infinity')"
+
+
+def _listing_sql(name: str, filters: Tuple[str, ...], after_cursor: bool) -> str:
+    _, alias, columns, source, predicates = _PAGES[name]
+    where = [predicates[f] for f in filters]
+    if after_cursor:
+        where.append(
+            f"({_sort_key(alias)}, {alias}.id)"
+            " < (COALESCE(CAST(:cursor_created_at AS timestamptz), '-infinity'), :cursor_id)"
+        )
+    return (
+        f"SELECT {columns.strip()} FROM {source.strip()}{_where(where)}"
+        f" ORDER BY {_sort_key(alias)} DESC, {alias}.id DESC"
+    )
+
+
+@lru_cache(maxsize=128)
+def _compile_page(name: str, filters: Tuple[str, ...], after_cursor: bool, offset: bool) -> TextClause:
+    sql = f"{_listing_sql(name, filters, after_cursor)} LIMIT :limit"
+    if offset:
+        sql += " OFFSET :offset"
+    return _compile(name, sql)
+
+
+@lru_cache(maxsize=64)
+def _compile_export(name: str, filters: Tuple[str, ...], after_cursor: bool) -> TextClause:
+    return _compile(f"{name}.export", _listing_sql(name, filters, after_cursor))
+
+
+@lru_cache(maxsize=128)
+def _compile_count(name: str, filters: Tuple[str, ...]) -> TextClause:
+    table, alias, _, source, predicates = _PAGES[name]
+    if not filters and source.strip() == f"{table} {alias}":
+        # A listing without joins counts the whole table
+        sql = f"""
+            SELECT CASE WHEN c.reltuples < {EXACT_COUNT_BELOW}
+                        THEN (SELECT count(*) FROM {table})
+                        ELSE c.reltuples::bigint END
+            FROM pg_class c
+            WHERE c.oid = '{table}'::regclass
+        """
+    else:
+        sql = f"SELECT count(*) FROM {source.strip()}{_where([predicates[f] for f in filters])}"
+    return _compile(f"{name}.count", sql)
+
+
+def page_query(name: str, filters: Iterable[str] = (), after_cursor: bool = False,
+               offset: bool = False) -> TextClause:
+    """
+    Return the named listing query for a set of active filters
+
+    Rows come back newest first. ``after_cursor`` adds the keyset predicate
+    (bind ``cursor_created_at`` and ``cursor_id``); ``offset`` adds an
+    OFFSET for clients still paging by page number. Raises ValueError for
+    filters the listing does not declare.
+    """
+    return _compile_page(name, _page_filters(name, filters), after_cursor, offset)
+
+
+def count_query(name: str, filters: Iterable[str] = ()) -> TextClause:
+    """Return the total-rows query matching page_query for the same filters"""
+    return _compile_count(name, _page_filters(name, filters))
+
+
+def export_query(name: str, filters: Iterable[str] = (), after_cursor: bool = False) -> TextClause:
+    """Return the whole listing in page order, without LIMIT, for streaming exports"""
+    return _compile_export(name, _page_filters(name, filters), after_cursor)
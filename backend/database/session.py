@@ -0,0 +1,270 @@
+"""
+Request-scoped database sessions (unit of work)
+Binds one AsyncSession to each HTTP request so every db_ops call made while
+handling it shares a single pooled connection and commits once at the end.
+Read-only operations are routed to the read replica when one is configured.
+"""
+
+import functools
+import hashlib
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.middleware.base import BaseHTTPMiddleware
+import logging
+
+from .connection import (
+    get_async_session,
+    get_async_read_session,
+    async_session_factory,
+    async_read_session_factory,
+    DB_READ_YOUR_WRITES_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RequestUnit:
+    """Sessions and write state for the request currently being handled"""
+
+    __slots__ = ("client_key", "session", "read_session", "wrote", "state", "after_commit")
+
+    def __init__(self, client_key: str):
+        self.client_key = client_key
+        self.session: Optional[AsyncSession] = None
+        self.read_session: Optional[AsyncSession] = None
+        self.wrote = False
+        # Request-scoped helpers such as the batch loaders, created on first use
+        self.state: Dict[str, Any] = {}
+        # Callbacks to run once the request's writes are committed
+        self.after_commit: List[Callable[[], None]] = []
+
+    def primary(self) -> AsyncSession:
+        # AsyncSession is lazy: no connection is checked out until the first query
+        if self.session is None:
+            self.session = async_session_factory()
+        return self.session
+
+    def replica(self) -> AsyncSession:
+        if self.read_session is None:
+            self.read_session = async_read_session_factory()
+        return self.read_session
+
+
+# Unit bound to the request currently being handled (None outside a request)
+_request_unit: ContextVar[Optional[RequestUnit]] = ContextVar("request_unit", default=None)
+# Set while a db_ops method marked @read_only is running
+_read_only: ContextVar[bool] = ContextVar("read_only", default=False)
+
+# client key -> monotonic time of that client's last committed write
+_recent_writes: Dict[str, float] = {}
+_RECENT_WRITES_PRUNE_AT = 10000
+
+
+def _record_write(client_key: str):
+    now = time.monotonic()
+    _recent_writes[client_key] = now
+    if len(_recent_writes) > _RECENT_WRITES_PRUNE_AT:
+        cutoff = now - DB_READ_YOUR_WRITES_SECONDS
+        for key in [k for k, t in _recent_writes.items() if t < cutoff]:
+            del _recent_writes[key]
+
+
+def _pinned_to_primary(unit: RequestUnit) -> bool:
+    if unit.wrote:
+        return True
+    last_write = _recent_writes.get(unit.client_key)
+    return last_write is not None and time.monotonic() - last_write < DB_READ_YOUR_WRITES_SECONDS
+
+
+def _client_key(request: Request) -> str:
+    authorization = request.headers.get("authorization")
+    if authorization:
+        return hashlib.sha256(authorization.encode()).hexdigest()
+    return request.client.host if request.client else "anonymous"
+
+
+def current_request_session() -> Optional[AsyncSession]:
+    """Return the primary session bound to the current request, if any"""
+    unit = _request_unit.get()
+    return unit.primary() if unit is not None else None
+
+
+def request_state() -> Optional[Dict[str, Any]]:
+    """Return the per-request state dict, or None outside a request"""
+    unit = _request_unit.get()
+    return unit.state if unit is not None else None
+
+
+def read_only(func):
+    """Mark a db_ops method as read-only so it may be served by the read replica"""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = _read_only.set(True)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _read_only.reset(token)
+    return wrapper
+
+
+@asynccontextmanager
+async def session_scope() -> AsyncIterator[AsyncSession]:
+    """
+    Yield the request-scoped session when one is bound, otherwise a fresh
+    session that is closed on exit (scripts, startup hooks, background work)
+
+    Inside a @read_only method the replica session is used, unless the
+    request (or its client, within the read-your-writes window) has written.
+    """
+    use_replica = _read_only.get() and async_read_session_factory is not None
+    unit = _request_unit.get()
+    if unit is not None:
+        if use_replica and not _pinned_to_primary(unit):
+            yield unit.replica()
+        else:
+            yield unit.primary()
+        return
+
+    factory = get_async_read_session if use_replica else get_async_session
+    async with factory() as session:
+        yield session
+
+
+def on_commit(callback: Callable[[], None]) -> None:
+    """
+    Run ``callback`` once the current request's writes are committed
+    Outside a request the caller has already committed, so it runs at once.
+    Callbacks are dropped if the request rolls back.
+    """
+    unit = _request_unit.get()
+    if unit is not None and unit.session is not None:
+        unit.after_commit.append(callback)
+    else:
+        callback()
+
+
+async def commit_session(session: AsyncSession) -> None:
+    """Commit, or defer to the end of the request when the session is request-scoped"""
+    unit = _request_unit.get()
+    if unit is not None and session is unit.session:
+        unit.wrote = True
+        await session.flush()
+    else:
+        await session.commit()
+
+
+class Savepoint:
+    """Handle for an atomic() block"""
+
+    def __init__(self, transaction, unit: Optional[RequestUnit]):
+        self.transaction = transaction
+        self._unit = unit
+        self._wrote = unit.wrote if unit is not None else False
+        self._callbacks = len(unit.after_commit) if unit is not None else 0
+
+    async def rollback(self) -> None:
+        """Undo the block's writes and drop the on_commit callbacks it registered"""
+        if self.transaction.is_active:
+            await self.transaction.rollback()
+        if self._unit is not None:
+            del self._unit.after_commit[self._callbacks:]
+            self._unit.wrote = self._wrote
+
+
+@asynccontextmanager
+async def atomic(session: AsyncSession) -> AsyncIterator[Savepoint]:
+    """
+    Run a block inside a SAVEPOINT
+    An exception (or savepoint.rollback()) undoes only the block's own writes
+    and callbacks, so the rest of the request's unit of work survives and the
+    shared transaction stays usable.
+    """
+    unit = _request_unit.get()
+    if unit is not None and session is not unit.session:
+        unit = None
+    savepoint = Savepoint(await session.begin_nested(), unit)
+    try:
+        yield savepoint
+    except BaseException:
+        await savepoint.rollback()
+        raise
+    if savepoint.transaction.is_active:
+        await savepoint.transaction.commit()
+
+
+@asynccontextmanager
+async def detached_session_context() -> AsyncIterator[None]:
+    """
+    Unbind the request session for the enclosed block
+    Use this in tasks spawned from a request that may outlive it
+    """
+    token = _request_unit.set(None)
+    try:
+        yield
+    finally:
+        _request_unit.reset(token)
+
+
+class DatabaseSessionMiddleware(BaseHTTPMiddleware):
+    """
+    Middleware that opens one session per request and commits it once
+
+    The commit runs before the response is returned to the client, so a
+    successful response always means the request's writes are durable.
+    Error responses (4xx/5xx) and unhandled exceptions roll the unit back.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        if async_session_factory is None:
+            return await call_next(request)
+
+        unit = RequestUnit(_client_key(request))
+        token = _request_unit.set(unit)
+        try:
+            try:
+                response = await call_next(request)
+            except Exception:
+                if unit.session is not None:
+                    await unit.session.rollback()
+                raise
+
+            if unit.session is not None:
+                if response.status_code >= 400:
+                    await unit.session.rollback()
+                else:
+                    try:
+                        await unit.session.commit()
+                    except Exception as e:
+                        logger.error(f"Request commit failed: {str(e)}")
+                        await unit.session.rollback()
+                        raise
+                    if unit.wrote:
+                        _record_write(unit.client_key)
+                    for callback in unit.after_commit:
+                        try:
+                            callback()
+                        except Exception as e:
+                            logger.error(f"After-commit callback failed: {str(e)}")
+            return response
+        finally:
+            _request_unit.reset(token)
+            if unit.session is not None:
+                await unit.session.close()
+            if unit.read_session is not None:
+                await unit.read_session.close()
+
+
+async def get_db_session() -> AsyncSession:
+    """FastAPI dependency returning the session bound to the current request"""
+    session = current_request_session()
+    if session is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database session not available"
+        )
+    return session
@@ -0,0 +1,88 @@
+"""
+Per-user access-token versions
+Every access and refresh token carries the user's token_version at issue
+time as its ``ver`` claim. Revoking a user's tokens bumps users.token_version,
+and a token is accepted only while its ``ver`` is at least the current
+version. Only users whose version was ever bumped are held in memory, so the
+per-request check is a dict lookup. Workers learn about bumps from other
+processes by polling for recently changed rows every
+TOKEN_VERSION_SYNC_SECONDS. A worker that missed more than the polling window
+reloads every version.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TOKEN_VERSION_SYNC_SECONDS = float(os.getenv("TOKEN_VERSION_SYNC_SECONDS", "5"))
+# Each poll re-reads changes from this far back, so late commits are not missed
+TOKEN_VERSION_SYNC_WINDOW_SECONDS = 60
+
+SyncFn = Callable[[bool], Awaitable[Iterable[Tuple[Any, int]]]]
+
+
+class TokenVersions:
+    """In-memory map of user ID -> current token version (users never bumped are absent)"""
+
+    def __init__(self, interval: float = TOKEN_VERSION_SYNC_SECONDS):
+        self.interval = interval
+        self._versions: Dict[str, int] = {}
+        self._synced_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def current(self, user_id: Any) -> int:
+        return self._versions.get(str(user_id), 0)
+
+    def is_current(self, user_id: Any, version: Any) -> bool:
+        """Whether a token issued at ``version`` for ``user_id`` is still valid"""
+        if user_id is None:
+            return True
+        return (version if isinstance(version, int) else 0) >= self._versions.get(str(user_id), 0)
+
+    def set(self, user_id: Any, version: int) -> None:
+        """Record a version; versions only move forward"""
+        key = str(user_id)
+        if version > self._versions.get(key, 0):
+            self._versions[key] = version
+
+    def update(self, rows: Iterable[Tuple[Any, int]]) -> None:
+        for user_id, version in rows:
+            self.set(user_id, version)
+
+    async def start(self, sync: SyncFn) -> None:
+        """Load every version, then keep polling for changes in the background"""
+        await self._sync(sync)
+        self._task = asyncio.create_task(self._poll(sync))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tracked_users": len(self._versions),
+            "seconds_since_sync": round(time.monotonic() - self._synced_at, 1) if self._synced_at else None,
+        }
+
+    async def _sync(self, sync: SyncFn) -> None:
+        started = time.monotonic()
+        full = self._synced_at is None or started - self._synced_at > TOKEN_VERSION_SYNC_WINDOW_SECONDS / 2
+        self.update(await sync(full))
+        self._synced_at = started
+
+    async def _poll(self, sync: SyncFn) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self._sync(sync)
+            except Exception as e:
+                logger.warning(f"Token version sync failed: {str(e)}")
+
+
+token_versions = TokenVersions()
@@ -46,7 +46,8 @@ async def http_exception_handler(request: Request, exc: HTTPException) -> JSONRe
     if isinstance(exc.detail, dict) and "error" in exc.detail:
         return JSONResponse(
             status_code=exc.status_code,
-            content=exc.detail
+            content=exc.detail,
+            headers=getattr(exc, "headers", None)
         )
     
     # Otherwise, wrap in our standard format
@@ -59,7 +60,8 @@ async def http_exception_handler(request: Request, exc: HTTPException) -> JSONRe
     
     return JSONResponse(
         status_code=exc.status_code,
-        content=error_response
+        content=error_response,
+        headers=getattr(exc, "headers", None)
     )
 
 
@@ -183,3 +183,19 @@ def create_payment_error(message: str, details: Dict[str, Any] = None) -> HTTPEx
         status_code=status.HTTP_400_BAD_REQUEST,
         detail=error_response
     )
+
+
+def create_service_unavailable_error(message: str = "Service temporarily overloaded", retry_after: int = 1) -> HTTPException:
+    """Create a standardized overload error asking the client to retry"""
+    error_response = {
+        "error": True,
+        "message": message,
+        "error_code": "SERVICE_UNAVAILABLE",
+        "details": {"retry_after": retry_after}
+    }
+    
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=error_response,
+        headers={"Retry-After": str(retry_after)}
+    )
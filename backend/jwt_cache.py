@@ -0,0 +1,92 @@
+"""
+Verified-JWT cache
+A client reuses the same long-lived access token for every request, so the
+HMAC check in jwt.decode is repeated thousands of times for one token.
+decode_token() remembers the payload of each token it has verified, keyed by
+a SHA-256 of the token, until the token's exp. Invalid tokens are never
+cached. Callers run their own checks (token type, revocation) on the returned
+payload, so those apply on cache hits too. The cache only skips the signature
+check. Revoking a user's tokens also drops their entries through
+invalidate_user().
+"""
+
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import jwt
+
+JWT_CACHE_MAX_ENTRIES = int(os.getenv("JWT_CACHE_MAX_ENTRIES", "10000"))
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of verified token payloads, each kept until its exp"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        # token digest -> (exp, (key, algorithms), payload)
+        self._entries: "OrderedDict[bytes, Tuple[float, Tuple[str, Tuple[str, ...]], Dict[str, Any]]]" = OrderedDict()
+        self._counters = {"hits": 0, "misses": 0, "expired": 0, "invalidated": 0}
+
+    def decode(self, token: str, key: str, algorithms: Sequence[str]) -> Dict[str, Any]:
+        """
+        jwt.decode with a cache of verified payloads
+        Raises the same jwt exceptions as jwt.decode, including
+        ExpiredSignatureError for a cached token that has since expired.
+        """
+        digest = hashlib.sha256(token.encode()).digest()
+        verifier = (key, tuple(algorithms))
+        entry = self._entries.get(digest)
+        if entry is not None and entry[1] == verifier:
+            if time.time() >= entry[0]:
+                del self._entries[digest]
+                self._counters["expired"] += 1
+                raise jwt.ExpiredSignatureError("Signature has expired")
+            self._entries.move_to_end(digest)
+            self._counters["hits"] += 1
+            return dict(entry[2])
+
+        self._counters["misses"] += 1
+        payload = jwt.decode(token, key, algorithms=list(algorithms))
+        exp = payload.get("exp")
+        # Tokens without an exp are verified every time rather than cached forever
+        if self.max_entries > 0 and isinstance(exp, (int, float)):
+            self._entries[digest] = (float(exp), verifier, payload)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return dict(payload)
+
+    def invalidate_user(self, user_id: Optional[str] = None, email: Optional[str] = None) -> int:
+        """Drop cached tokens whose user_id or sub matches; returns how many were dropped"""
+        digests = [
+            digest for digest, (_, _, payload) in self._entries.items()
+            if (user_id and str(payload.get("user_id")) == str(user_id))
+            or (email and payload.get("sub") == email)
+        ]
+        for digest in digests:
+            del self._entries[digest]
+        self._counters["invalidated"] += len(digests)
+        return len(digests)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._counters["hits"] + self._counters["misses"] + self._counters["expired"]
+        return {
+            **self._counters,
+            "entries": len(self._entries),
+            "hit_ratio": round(self._counters["hits"] / lookups, 4) if lookups else 0.0,
+            "max_entries": self.max_entries,
+        }
+
+
+verified_tokens = VerifiedTokenCache(JWT_CACHE_MAX_ENTRIES)
+
+
+def decode_token(token: str, key: str, algorithms: Sequence[str]) -> Dict[str, Any]:
+    """Verify and decode a JWT through the shared verified-token cache"""
+    return verified_tokens.decode(token, key, algorithms)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, field_validator
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 from enum import Enum
 from uuid import UUID
@@ -152,6 +152,14 @@ class DashboardStats(BaseModel):
     totalEarnings: int
     successfulReferrals: int
 
+class DashboardSummary(BaseModel):
+    # Sections left out of the ``fields`` selection are omitted
+    stats: Optional[DashboardStats] = None
+    recentActivity: Optional[List[Dict[str, Any]]] = None
+    progress: Optional[List[Dict[str, Any]]] = None
+    referralStats: Optional[Dict[str, Any]] = None
+    enrollments: Optional[List[Dict[str, Any]]] = None
+
 class TokenResponse(BaseModel):
     access_token: str
     refresh_token: str
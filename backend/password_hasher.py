@@ -0,0 +1,139 @@
+"""
+Password hashing off the event loop
+Passwords are stored as PBKDF2-SHA256 ("pbkdf2_sha256$<iterations>$<salt>$<hash>").
+Hashing and verifying them runs on a dedicated thread pool of
+PASSWORD_HASH_WORKERS threads; hashlib releases the GIL while deriving the
+key, so a login burst does not stall other requests. At most
+PASSWORD_HASH_MAX_QUEUE jobs may wait for a thread. Beyond that a request
+is rejected with 503 instead of queueing without bound. Legacy unsalted and
+static-salt SHA-256 hashes still verify, and are flagged for rehashing.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import os
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple
+
+from exceptions import create_service_unavailable_error
+
+PASSWORD_HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", "100000"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+SCHEME = "pbkdf2_sha256"
+# Static salt of the legacy SecureAuth SHA-256 hashes
+LEGACY_SALT = "elevate_skill_salt_2024"
+
+
+def _derive(password: str, salt: str, iterations: int) -> str:
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt.encode("utf-8"), iterations).hex()
+
+
+def hash_password(password: str, iterations: int = PASSWORD_HASH_ITERATIONS) -> str:
+    """Hash a password synchronously (scripts and tests; handlers use password_hasher.hash)"""
+    salt = secrets.token_hex(16)
+    return f"{SCHEME}${iterations}${salt}${_derive(password, salt, iterations)}"
+
+
+def _verify_legacy(password: str, stored: str) -> bool:
+    candidates = (
+        hashlib.sha256(password.encode()).hexdigest(),
+        hashlib.sha256((password + LEGACY_SALT).encode()).hexdigest(),
+    )
+    return any(hmac.compare_digest(candidate, stored) for candidate in candidates)
+
+
+def _verify_pbkdf2(password: str, stored: str) -> Tuple[bool, int]:
+    try:
+        _, iterations, salt, expected = stored.split("$")
+        iterations = int(iterations)
+    except ValueError:
+        return False, 0
+    return hmac.compare_digest(_derive(password, salt, iterations), expected), iterations
+
+
+def verify_password(password: str, stored: str) -> bool:
+    """Check a password against any supported hash format, synchronously"""
+    if not stored:
+        return False
+    if stored.startswith(SCHEME + "$"):
+        return _verify_pbkdf2(password, stored)[0]
+    return _verify_legacy(password, stored)
+
+
+def _timed(fn: Callable, args: tuple, submitted: float) -> Tuple[Any, float, float]:
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, started - submitted, time.perf_counter() - started
+
+
+class PasswordHasher:
+    """Bounded thread pool for password hashing with admission control"""
+
+    def __init__(self, workers: int, max_queue: int, iterations: int):
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.iterations = iterations
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        self._in_flight = 0
+        self._counters = {"completed": 0, "rejected": 0, "legacy_verified": 0}
+        self._wait_seconds = 0.0
+        self._run_seconds = 0.0
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(hash_password, password, self.iterations)
+
+    async def verify(self, password: str, stored: str) -> Tuple[bool, bool]:
+        """
+        Verify a password; returns (valid, needs_rehash)
+        needs_rehash is set for legacy SHA-256 hashes and PBKDF2 hashes
+        made with fewer than the configured iterations.
+        """
+        if not stored:
+            return False, False
+        if stored.startswith(SCHEME + "$"):
+            valid, iterations = await self._submit(_verify_pbkdf2, password, stored)
+            return valid, valid and iterations < self.iterations
+        # Legacy hashes are a single SHA-256; not worth a trip to the pool
+        self._counters["legacy_verified"] += 1
+        valid = _verify_legacy(password, stored)
+        return valid, valid
+
+    async def _submit(self, fn: Callable, *args: Any) -> Any:
+        if self._in_flight >= self.workers + self.max_queue:
+            self._counters["rejected"] += 1
+            raise create_service_unavailable_error("Too many sign-in requests in progress, please retry shortly")
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result, waited, ran = await loop.run_in_executor(
+                self._executor, _timed, fn, args, time.perf_counter()
+            )
+        finally:
+            self._in_flight -= 1
+        self._counters["completed"] += 1
+        self._wait_seconds += waited
+        self._run_seconds += ran
+        return result
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        completed = self._counters["completed"]
+        return {
+            **self._counters,
+            "workers": self.workers,
+            "running": min(self._in_flight, self.workers),
+            "queued": max(0, self._in_flight - self.workers),
+            "max_queue": self.max_queue,
+            "avg_wait_ms": round(self._wait_seconds / completed * 1000, 2) if completed else 0.0,
+            "avg_run_ms": round(self._run_seconds / completed * 1000, 2) if completed else 0.0,
+        }
+
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE, PASSWORD_HASH_ITERATIONS)
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Rebuild the user_dashboard_stats read model
+Recomputes every user's dashboard numbers from enrollments, courses, referrals
+and earnings. Run after deploying the table, or to repair drift.
+"""
+
+import asyncio
+from database.connection import disconnect_db
+from database.operations import db_ops
+
+
+async def main():
+    try:
+        rows = await db_ops.rebuild_dashboard_stats()
+        print(f"✅ Rebuilt dashboard stats for {rows} users")
+    finally:
+        await disconnect_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
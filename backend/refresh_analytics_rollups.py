@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Refresh the daily analytics rollups
+Recomputes analytics_daily_users and analytics_daily_courses for recent days
+from the source tables. Schedule it (e.g. nightly cron) to repair drift, or
+pass --all to rebuild every day.
+
+Usage: python refresh_analytics_rollups.py [--days N | --all]
+"""
+
+import argparse
+import asyncio
+from database.connection import disconnect_db
+from database.operations import db_ops
+
+
+async def main(days):
+    try:
+        await db_ops.refresh_analytics_rollups(days)
+        scope = "all days" if days is None else f"the last {days} days"
+        print(f"✅ Refreshed analytics rollups for {scope}")
+    finally:
+        await disconnect_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--days", type=int, default=2, help="days back to recompute (default 2)")
+    group.add_argument("--all", action="store_true", help="rebuild the full history")
+    args = parser.parse_args()
+    asyncio.run(main(None if args.all else args.days))
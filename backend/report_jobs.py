@@ -0,0 +1,198 @@
+"""
+Background report jobs
+Long-range reports are queued and run by a small pool of in-process asyncio
+workers, so the request that asks for one returns immediately and at most
+REPORT_JOB_CONCURRENCY reports hold a database connection at a time. Each
+finished job leaves <id>.json, <id>.csv and an <id>.meta.json status record
+under REPORT_JOBS_DIR (the system temp directory by default). Submitting a
+report that is already queued or running returns the existing job.
+"""
+
+import asyncio
+import csv
+import io
+import logging
+import os
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+
+from database.operations import db_ops, normalize_report_dates
+from database.session import detached_session_context
+
+logger = logging.getLogger(__name__)
+
+REPORT_JOBS_DIR = Path(os.getenv("REPORT_JOBS_DIR", os.path.join(tempfile.gettempdir(), "elevate-report-jobs")))
+REPORT_JOB_CONCURRENCY = int(os.getenv("REPORT_JOB_CONCURRENCY", "2"))
+# Finished job files older than this are removed
+REPORT_JOB_RETENTION_SECONDS = float(os.getenv("REPORT_JOB_RETENTION_SECONDS", "86400"))
+
+# Report type -> (db_ops method, key of the rows written to the CSV)
+REPORT_TYPES = {
+    "financial": ("get_financial_report", "course_revenue"),
+    "users": ("get_user_report", "daily_activity"),
+    "courses": ("get_course_report", "course_performance"),
+}
+
+RESULT_FORMATS = ("json", "csv")
+
+
+def _csv_text(rows: List[dict]) -> str:
+    buffer = io.StringIO()
+    if rows:
+        writer = csv.DictWriter(buffer, fieldnames=list(rows[0]), extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class ReportJob:
+    __slots__ = ("id", "report_type", "start_date", "end_date", "status", "error",
+                 "created_at", "started_at", "finished_at")
+
+    def __init__(self, report_type: str, start_date: Optional[str], end_date: Optional[str]):
+        self.id = str(uuid.uuid4())
+        self.report_type = report_type
+        self.start_date = start_date
+        self.end_date = end_date
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def key(self) -> Tuple[str, Optional[str], Optional[str]]:
+        return (self.report_type, self.start_date, self.end_date)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ReportJob":
+        job = cls.__new__(cls)
+        for slot in cls.__slots__:
+            setattr(job, slot, data.get(slot))
+        return job
+
+
+class ReportJobQueue:
+    """Bounded pool of report workers with per-report deduplication"""
+
+    def __init__(self, directory: Path, concurrency: int, retention: float):
+        self.directory = directory
+        self.concurrency = max(1, concurrency)
+        self.retention = retention
+        self._jobs: Dict[str, ReportJob] = {}
+        # Queued or running jobs by (type, start_date, end_date)
+        self._pending: Dict[Tuple[str, Optional[str], Optional[str]], ReportJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        await asyncio.to_thread(self._prune)
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, report_type: str, start_date: Optional[str] = None,
+               end_date: Optional[str] = None) -> ReportJob:
+        """Queue a report, or return the matching queued/running job; raises ValueError for bad dates"""
+        if self._queue is None:
+            raise RuntimeError("Report job queue is not running")
+        if report_type not in REPORT_TYPES:
+            raise ValueError(f"Unknown report type: {report_type}")
+        start_date, end_date = normalize_report_dates(start_date, end_date)
+
+        job = self._pending.get((report_type, start_date, end_date))
+        if job is not None:
+            return job
+        job = ReportJob(report_type, start_date, end_date)
+        self._jobs[job.id] = self._pending[job.key] = job
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[ReportJob]:
+        """Look a job up in memory, falling back to its status record on disk"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        try:
+            uuid.UUID(job_id)
+            return ReportJob.from_dict(orjson.loads(self._path(job_id, "meta.json").read_bytes()))
+        except (ValueError, OSError):
+            return None
+
+    def result_path(self, job: ReportJob, result_format: str) -> Optional[Path]:
+        """Path of a finished job's result file, or None if it is not available"""
+        if job.status != "completed" or result_format not in RESULT_FORMATS:
+            return None
+        path = self._path(job.id, result_format)
+        return path if path.exists() else None
+
+    def _path(self, job_id: str, suffix: str) -> Path:
+        return self.directory / f"{job_id}.{suffix}"
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._execute(job)
+            except Exception as e:
+                logger.error(f"Report job {job.id} could not be recorded: {str(e)}")
+            finally:
+                self._pending.pop(job.key, None)
+                self._jobs.pop(job.id, None)
+                self._queue.task_done()
+
+    async def _execute(self, job: ReportJob) -> None:
+        method, rows_key = REPORT_TYPES[job.report_type]
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            async with detached_session_context():
+                report = await getattr(db_ops, method)(job.start_date, job.end_date)
+            await asyncio.to_thread(self._write_results, job, report, rows_key)
+            job.status = "completed"
+        except Exception as e:
+            logger.error(f"Report job {job.id} ({job.report_type}) failed: {str(e)}")
+            job.status = "failed"
+            job.error = str(e)
+        job.finished_at = time.time()
+        await asyncio.to_thread(self._write_meta, job)
+
+    def _write_results(self, job: ReportJob, report: dict, rows_key: str) -> None:
+        _write_atomic(self._path(job.id, "json"), orjson.dumps(report))
+        _write_atomic(self._path(job.id, "csv"), _csv_text(report.get(rows_key) or []).encode())
+
+    def _write_meta(self, job: ReportJob) -> None:
+        _write_atomic(self._path(job.id, "meta.json"), orjson.dumps(job.to_dict()))
+        self._prune()
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention
+        for path in self.directory.iterdir():
+            try:
+                if path.is_file() and path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                pass
+
+
+report_jobs = ReportJobQueue(REPORT_JOBS_DIR, REPORT_JOB_CONCURRENCY, REPORT_JOB_RETENTION_SECONDS)
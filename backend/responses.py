@@ -0,0 +1,115 @@
+"""
+Fast JSON responses for the ElevateSkill API
+FastJSONResponse renders with orjson, which serializes UUID, datetime and
+Decimal values natively. fast_response() returns data the database layer has
+already shaped, skipping FastAPI's jsonable_encoder pass and response_model
+re-validation; set VALIDATE_RESPONSES=true to check those payloads against
+their models during development. export_response() streams chunked rows as
+CSV or NDJSON.
+"""
+
+import csv
+import io
+import logging
+import os
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, List
+
+import orjson
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+
+logger = logging.getLogger(__name__)
+
+VALIDATE_RESPONSES = os.getenv("VALIDATE_RESPONSES", "false").lower() == "true"
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+_adapters: Dict[Any, TypeAdapter] = {}
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+
+
+def _validate(content: Any, model: Any) -> None:
+    adapter = _adapters.get(model)
+    if adapter is None:
+        adapter = _adapters[model] = TypeAdapter(model)
+    try:
+        adapter.validate_python(content)
+    except ValidationError as e:
+        logger.error(f"Response does not match {model}: {e}")
+        raise
+
+
+def fast_response(content: Any, model: Any = None, status_code: int = 200) -> FastJSONResponse:
+    """
+    Serialize trusted data straight to a FastJSONResponse
+
+    ``model`` is the route's response model; it is only checked when
+    VALIDATE_RESPONSES is enabled. Keep ``response_model`` on the route so
+    the OpenAPI schema still documents the payload.
+    """
+    if VALIDATE_RESPONSES and model is not None:
+        _validate(content, model)
+    return FastJSONResponse(content, status_code=status_code)
+
+
+def page_response(page: Dict[str, Any], model: Any = None) -> FastJSONResponse:
+    """
+    Return the items of a db_ops page as a plain list
+
+    The total goes in ``X-Total-Count`` and the cursor for the next page in
+    ``X-Next-Cursor`` (absent on the last page), so list endpoints keep their
+    response shape while paging.
+    """
+    response = fast_response(page["items"], model)
+    response.headers["X-Total-Count"] = str(page["total"])
+    if page["nextCursor"]:
+        response.headers["X-Next-Cursor"] = page["nextCursor"]
+    return response
+
+
+async def _csv_lines(chunks: AsyncIterator[List[dict]]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = None
+    async for rows in chunks:
+        if writer is None and rows:
+            writer = csv.DictWriter(buffer, fieldnames=list(rows[0]), extrasaction="ignore")
+            writer.writeheader()
+        if writer is not None:
+            writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+async def _ndjson_lines(chunks: AsyncIterator[List[dict]]) -> AsyncIterator[bytes]:
+    async for rows in chunks:
+        yield b"".join(
+            orjson.dumps(row, default=_default, option=_ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+            for row in rows
+        )
+
+
+def export_response(chunks: AsyncIterator[List[dict]], export_format: str, filename: str) -> StreamingResponse:
+    """Stream chunks of rows as a CSV or NDJSON download, one chunk per write"""
+    if export_format == "csv":
+        body, media_type = _csv_lines(chunks), "text/csv"
+    else:
+        body, media_type = _ndjson_lines(chunks), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
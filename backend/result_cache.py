@@ -0,0 +1,136 @@
+"""
+In-process result cache for expensive read endpoints
+Results are cached per key for ANALYTICS_CACHE_TTL_SECONDS. After that they
+are served stale for up to ANALYTICS_CACHE_STALE_SECONDS more while a single
+background task recomputes them, and concurrent misses on the same key
+share one computation. Computations run detached from the request session so
+they outlive the request that started them.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+from database.session import detached_session_context
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_CACHE_TTL_SECONDS = float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "60"))
+ANALYTICS_CACHE_STALE_SECONDS = float(os.getenv("ANALYTICS_CACHE_STALE_SECONDS", "300"))
+ANALYTICS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYTICS_CACHE_MAX_ENTRIES", "512"))
+
+Compute = Callable[[], Awaitable[Any]]
+
+
+class _Entry:
+    __slots__ = ("value", "fresh_until", "stale_until")
+
+    def __init__(self, value: Any, fresh_until: float, stale_until: float):
+        self.value = value
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+class ResultCache:
+    """TTL cache with stale-while-revalidate and request coalescing"""
+
+    def __init__(self, ttl: float, stale_ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._background: Set[asyncio.Task] = set()
+        self._counters = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "refreshes": 0, "errors": 0}
+
+    async def get_or_compute(self, key: Hashable, compute: Compute) -> Any:
+        """Return the cached result for ``key``, computing it with ``compute`` when needed"""
+        if self.ttl <= 0:
+            return await compute()
+
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now < entry.fresh_until:
+            self._counters["hits"] += 1
+            return entry.value
+        if entry is not None and now < entry.stale_until:
+            self._counters["stale_hits"] += 1
+            if key not in self._inflight:
+                self._counters["refreshes"] += 1
+                task = self._start(key, compute)
+                self._background.add(task)
+                task.add_done_callback(self._background_done)
+            return entry.value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._counters["coalesced"] += 1
+        else:
+            self._counters["misses"] += 1
+            task = self._start(key, compute)
+        # Shielded so a cancelled request does not cancel the shared computation
+        return await asyncio.shield(task)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one key, or every entry when ``key`` is None"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._counters["hits"] + self._counters["stale_hits"] + self._counters["misses"] + self._counters["coalesced"]
+        served = self._counters["hits"] + self._counters["stale_hits"] + self._counters["coalesced"]
+        return {
+            **self._counters,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hit_ratio": round(served / lookups, 4) if lookups else 0.0,
+            "ttl_seconds": self.ttl,
+            "stale_seconds": self.stale_ttl,
+        }
+
+    def _background_done(self, task: asyncio.Task) -> None:
+        self._background.discard(task)
+        # Failures are logged in _run; retrieve them so asyncio does not warn
+        if not task.cancelled():
+            task.exception()
+
+    def _start(self, key: Hashable, compute: Compute) -> asyncio.Task:
+        task = asyncio.create_task(self._run(key, compute))
+        self._inflight[key] = task
+        return task
+
+    async def _run(self, key: Hashable, compute: Compute) -> Any:
+        try:
+            async with detached_session_context():
+                value = await compute()
+        except Exception as e:
+            self._counters["errors"] += 1
+            logger.warning(f"Cached computation for {key!r} failed: {str(e)}")
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        now = time.monotonic()
+        self._entries.pop(key, None)
+        self._entries[key] = _Entry(value, now + self.ttl, now + self.ttl + self.stale_ttl)
+        if len(self._entries) > self.max_entries:
+            self._evict(now)
+        return value
+
+    def _evict(self, now: float) -> None:
+        for key in [k for k, e in self._entries.items() if e.stale_until <= now]:
+            del self._entries[key]
+        # Entries are kept in insertion order; drop the oldest beyond the limit
+        while len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
+
+
+analytics_cache = ResultCache(
+    ANALYTICS_CACHE_TTL_SECONDS,
+    ANALYTICS_CACHE_STALE_SECONDS,
+    ANALYTICS_CACHE_MAX_ENTRIES,
+)
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi.responses import FileResponse
+from typing import List, Literal, Optional
 from models import (
     AdminLogin, 
     AdminUserResponse, 
@@ -7,9 +8,21 @@ from models import (
     PaymentApprovalRequest,
     TokenResponse
 )
-from auth import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, get_current_user
-from secure_auth import secure_auth
-from database.operations import db_ops
+from auth import (
+    create_access_token,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    get_admin_principal,
+    get_current_user,
+    verify_account_password
+)
+from database.operations import db_ops, normalize_report_dates
+from database.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from database.principals import principal_cache
+from database.token_versions import token_versions
+from jwt_cache import verified_tokens
+from responses import export_response, page_response
+from result_cache import analytics_cache
+from report_jobs import report_jobs
 from datetime import timedelta
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
@@ -24,7 +37,7 @@ async def get_current_admin(current_user: dict = Depends(get_current_user)):
             detail="Admin access required"
         )
     
-    admin = await db_ops.get_admin_by_email(current_user["email"])
+    admin = await get_admin_principal(current_user["email"])
     if not admin:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -33,6 +46,25 @@ async def get_current_admin(current_user: dict = Depends(get_current_user)):
     
     return admin
 
+def _active_filter(status_filter: Optional[str]) -> Optional[bool]:
+    """Map an active/inactive status filter to is_active; anything else means no filter"""
+    if status_filter == "active":
+        return True
+    if status_filter == "inactive":
+        return False
+    return None
+
+def _pagination(result: dict, page: int, limit: int) -> dict:
+    total = result["total"]
+    return {
+        "page": page,
+        "limit": limit,
+        "total": total,
+        "pages": (total + limit - 1) // limit,
+        "nextCursor": result["nextCursor"],
+        "hasMore": result["nextCursor"] is not None
+    }
+
 @router.post("/login", response_model=TokenResponse)
 async def admin_login(admin: AdminLogin):
     """Admin login"""
@@ -44,8 +76,8 @@ async def admin_login(admin: AdminLogin):
             detail="Invalid admin credentials"
         )
     
-    # Verify password using secure_auth
-    if not secure_auth.verify_password(admin.password, admin_user["password"]):
+    # Verify password on the hashing pool, upgrading legacy hashes
+    if not await verify_account_password("admin_users", admin_user, admin.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid admin credentials"
@@ -64,7 +96,7 @@ async def admin_login(admin: AdminLogin):
         'permissions': ['admin']
     }
     
-    access_token, refresh_token, token_info = token_manager.create_token_pair(user_data)
+    access_token, refresh_token, token_info = await token_manager.create_token_pair(user_data)
     
     return {
         "access_token": access_token,
@@ -100,39 +132,22 @@ async def get_admin_profile(current_admin: dict = Depends(get_current_admin)):
 # Payment management
 @router.get("/payments", response_model=List[PaymentRequestResponse])
 async def get_payment_requests(
-    status: str = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     current_admin: dict = Depends(get_current_admin)
 ):
-    """Get all payment requests"""
-    requests = await db_ops.get_payment_requests(status)
-    
-    # Convert to response format - All UUIDs already converted to strings in database layer
-    response = []
-    for req in requests:
-        response.append({
-            "id": req["id"],
-            "userId": req["user_id"],
-            "courseId": req["course_id"],
-            "paymentAccountId": req["payment_account_id"],
-            "amount": float(req["amount"]),
-            "transactionScreenshotUrl": req.get("transaction_screenshot_url", ""),
-            "transactionReference": req.get("transaction_reference"),
-            "status": req["status"],
-            "adminNotes": req.get("admin_notes"),
-            "createdAt": req["created_at"],
-            "updatedAt": req.get("updated_at", req["created_at"]).isoformat() if req.get("updated_at") else req["created_at"].isoformat(),  # Convert to string
-            "approvedAt": req["approved_at"] if req["approved_at"] else None,
-            "approvedBy": req.get("approved_by"),
-            "rejectionReason": req.get("rejection_reason"),
-            # Additional info
-            "userName": req["full_name"],
-            "userEmail": req["email"],
-            "courseTitle": req["course_title"],
-            "paymentAccountName": req.get("payment_type", ""),
-            "paymentAccountType": req.get("payment_type", "")
-        })
+    """Get payment requests, newest first; the next page's cursor is in X-Next-Cursor"""
+    try:
+        page = await db_ops.get_payment_requests_page(limit, cursor=cursor, status=status_filter)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
-    return response
+    # Already in response format from the database layer
+    return page_response(page, List[PaymentRequestResponse])
 
 @router.post("/payments/{request_id}/approve")
 async def approve_payment_request(
@@ -190,70 +205,47 @@ async def reject_payment_request(
 @router.get("/stats")
 async def get_admin_stats(current_admin: dict = Depends(get_current_admin)):
     """Get admin dashboard statistics"""
-    # Get pending payments count
-    pending_payments = await db_ops.get_payment_requests("pending")
-    
-    # Get approved payments count
-    approved_payments = await db_ops.get_payment_requests("approved")
-    
-    # Get rejected payments count
-    rejected_payments = await db_ops.get_payment_requests("rejected")
-    
-    # Get user statistics
-    all_users = await db_ops.get_all_users()
-    active_users = [user for user in all_users if user.get("is_active", True)]
-    
-    return {
-        "pendingPayments": len(pending_payments),
-        "approvedPayments": len(approved_payments),
-        "rejectedPayments": len(rejected_payments),
-        "totalPayments": len(pending_payments) + len(approved_payments) + len(rejected_payments),
-        "totalUsers": len(all_users),
-        "activeUsers": len(active_users),
-        "inactiveUsers": len(all_users) - len(active_users)
-    }
+    return await db_ops.get_admin_stats()
 
 # User management endpoints
 @router.get("/users")
 async def get_all_users_admin(
-    page: int = 1,
-    limit: int = 20,
+    page: int = Query(1, ge=1),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     search: str = None,
-    status: str = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    cursor: Optional[str] = None,
     current_admin: dict = Depends(get_current_admin)
 ):
-    """Get all users with pagination and filtering"""
-    users = await db_ops.get_all_users()
-    
-    # Apply search filter
-    if search:
-        search_lower = search.lower()
-        users = [
-            user for user in users 
-            if (search_lower in user.get("full_name", "").lower() or 
-                search_lower in user.get("email", "").lower())
-        ]
-    
-    # Apply status filter
-    if status == "active":
-        users = [user for user in users if user.get("is_active", True)]
-    elif status == "inactive":
-        users = [user for user in users if not user.get("is_active", True)]
-    
-    # Pagination
-    total = len(users)
-    start = (page - 1) * limit
-    end = start + limit
-    paginated_users = users[start:end]
+    """
+    Get users with pagination and filtering; pass ``cursor`` from the previous page to page by keyset.
+    With ``search``, pages through the name/email matches, best first.
+    """
+    try:
+        if search and search.strip():
+            result = await db_ops.search_users(
+                search,
+                limit,
+                cursor=cursor,
+                offset=(page - 1) * limit,
+                is_active=_active_filter(status_filter),
+            )
+        else:
+            result = await db_ops.get_users_page(
+                limit,
+                cursor=cursor,
+                offset=(page - 1) * limit,
+                is_active=_active_filter(status_filter),
+            )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
     return {
-        "users": paginated_users,
-        "pagination": {
-            "page": page,
-            "limit": limit,
-            "total": total,
-            "pages": (total + limit - 1) // limit
-        }
+        "users": result["items"],
+        "pagination": _pagination(result, page, limit)
     }
 
 @router.get("/users/{user_id}")
@@ -319,50 +311,34 @@ async def get_user_referrals_admin(
 # Course management endpoints
 @router.get("/courses")
 async def get_all_courses_admin(
-    page: int = 1,
-    limit: int = 20,
+    page: int = Query(1, ge=1),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     search: str = None,
     category: str = None,
-    status: str = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    cursor: Optional[str] = None,
     current_admin: dict = Depends(get_current_admin)
 ):
-    """Get all courses with pagination and filtering"""
-    courses = await db_ops.get_all_courses()
-    
-    # Apply search filter
-    if search:
-        search_lower = search.lower()
-        courses = [
-            course for course in courses 
-            if (search_lower in course.get("title", "").lower() or 
-                search_lower in course.get("description", "").lower() or
-                search_lower in course.get("instructor", "").lower())
-        ]
-    
-    # Apply category filter (using level as category for now)
-    if category:
-        courses = [course for course in courses if course.get("level", "").lower() == category.lower()]
-    
-    # Apply status filter (all courses are considered active for now)
-    if status == "active":
-        courses = [course for course in courses if True]  # All courses are active
-    elif status == "inactive":
-        courses = []  # No inactive courses for now
-    
-    # Pagination
-    total = len(courses)
-    start = (page - 1) * limit
-    end = start + limit
-    paginated_courses = courses[start:end]
+    """Get courses with pagination and filtering; pass ``cursor`` from the previous page to page by keyset"""
+    try:
+        # Level doubles as the category for now
+        result = await db_ops.get_courses_page(
+            limit,
+            cursor=cursor,
+            offset=(page - 1) * limit,
+            search=search,
+            level=category,
+            is_active=_active_filter(status_filter),
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
     return {
-        "courses": paginated_courses,
-        "pagination": {
-            "page": page,
-            "limit": limit,
-            "total": total,
-            "pages": (total + limit - 1) // limit
-        }
+        "courses": result["items"],
+        "pagination": _pagination(result, page, limit)
     }
 
 @router.get("/courses/{course_id}")
@@ -412,7 +388,13 @@ async def update_course(
     current_admin: dict = Depends(get_current_admin)
 ):
     """Update a course"""
-    success = await db_ops.update_course(course_id, course_data)
+    try:
+        success = await db_ops.update_course(course_id, course_data)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -471,12 +453,42 @@ async def get_course_enrollments_admin(
     return {"enrollments": enrollments}
 
 # Analytics and Reports endpoints
+# Data exports
+@router.get("/exports/{dataset}")
+async def export_dataset(
+    dataset: Literal["users", "payments", "withdrawals"],
+    format: Literal["csv", "ndjson"] = "csv",
+    status_filter: Optional[str] = Query(None, alias="status"),
+    cursor: Optional[str] = None,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """
+    Stream a full dataset, newest first, as CSV or NDJSON
+    Each row includes a ``cursor``; pass the last one received to resume an interrupted export.
+    """
+    if dataset == "users":
+        filters = {"is_active": _active_filter(status_filter)}
+    else:
+        filters = {"status": status_filter}
+    
+    try:
+        chunks = db_ops.export_chunks(dataset, filters, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return export_response(chunks, format, f"{dataset}-export")
+
 @router.get("/analytics/overview")
 async def get_analytics_overview(
     current_admin: dict = Depends(get_current_admin)
 ):
     """Get comprehensive analytics overview"""
-    overview = await db_ops.get_analytics_overview()
+    overview = await analytics_cache.get_or_compute(
+        ("analytics.overview",), db_ops.get_analytics_overview
+    )
     return overview
 
 @router.get("/analytics/revenue")
@@ -485,7 +497,9 @@ async def get_revenue_analytics(
     current_admin: dict = Depends(get_current_admin)
 ):
     """Get revenue analytics for specified period"""
-    revenue_data = await db_ops.get_revenue_analytics(period)
+    revenue_data = await analytics_cache.get_or_compute(
+        ("analytics.revenue", period), lambda: db_ops.get_revenue_analytics(period)
+    )
     return revenue_data
 
 @router.get("/analytics/users")
@@ -494,7 +508,9 @@ async def get_user_analytics(
     current_admin: dict = Depends(get_current_admin)
 ):
     """Get user growth and engagement analytics"""
-    user_data = await db_ops.get_user_analytics(period)
+    user_data = await analytics_cache.get_or_compute(
+        ("analytics.users", period), lambda: db_ops.get_user_analytics(period)
+    )
     return user_data
 
 @router.get("/analytics/courses")
@@ -502,7 +518,9 @@ async def get_course_analytics(
     current_admin: dict = Depends(get_current_admin)
 ):
     """Get course performance analytics"""
-    course_data = await db_ops.get_course_analytics()
+    course_data = await analytics_cache.get_or_compute(
+        ("analytics.courses",), db_ops.get_course_analytics
+    )
     return course_data
 
 @router.get("/analytics/enrollments")
@@ -511,7 +529,9 @@ async def get_enrollment_analytics(
     current_admin: dict = Depends(get_current_admin)
 ):
     """Get enrollment trends and analytics"""
-    enrollment_data = await db_ops.get_enrollment_analytics(period)
+    enrollment_data = await analytics_cache.get_or_compute(
+        ("analytics.enrollments", period), lambda: db_ops.get_enrollment_analytics(period)
+    )
     return enrollment_data
 
 @router.get("/analytics/referrals")
@@ -519,7 +539,9 @@ async def get_referral_analytics(
     current_admin: dict = Depends(get_current_admin)
 ):
     """Get referral program analytics"""
-    referral_data = await db_ops.get_referral_analytics()
+    referral_data = await analytics_cache.get_or_compute(
+        ("analytics.referrals",), db_ops.get_referral_analytics
+    )
     return referral_data
 
 @router.get("/reports/financial")
@@ -529,7 +551,18 @@ async def get_financial_report(
     current_admin: dict = Depends(get_current_admin)
 ):
     """Generate financial report"""
-    report = await db_ops.get_financial_report(start_date, end_date)
+    try:
+        # Key on the normalized range so equivalent dates share one entry
+        start_date, end_date = normalize_report_dates(start_date, end_date)
+        report = await analytics_cache.get_or_compute(
+            ("reports.financial", start_date, end_date),
+            lambda: db_ops.get_financial_report(start_date, end_date)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid report date: {str(e)}"
+        )
     return report
 
 @router.get("/reports/users")
@@ -539,7 +572,18 @@ async def get_user_report(
     current_admin: dict = Depends(get_current_admin)
 ):
     """Generate user activity report"""
-    report = await db_ops.get_user_report(start_date, end_date)
+    try:
+        # Key on the normalized range so equivalent dates share one entry
+        start_date, end_date = normalize_report_dates(start_date, end_date)
+        report = await analytics_cache.get_or_compute(
+            ("reports.users", start_date, end_date),
+            lambda: db_ops.get_user_report(start_date, end_date)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid report date: {str(e)}"
+        )
     return report
 
 @router.get("/reports/courses")
@@ -549,5 +593,84 @@ async def get_course_report(
     current_admin: dict = Depends(get_current_admin)
 ):
     """Generate course performance report"""
-    report = await db_ops.get_course_report(start_date, end_date)
+    try:
+        # Key on the normalized range so equivalent dates share one entry
+        start_date, end_date = normalize_report_dates(start_date, end_date)
+        report = await analytics_cache.get_or_compute(
+            ("reports.courses", start_date, end_date),
+            lambda: db_ops.get_course_report(start_date, end_date)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid report date: {str(e)}"
+        )
     return report
+
+@router.post("/reports/{report_type}/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def create_report_job(
+    report_type: Literal["financial", "users", "courses"],
+    start_date: str = None,
+    end_date: str = None,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """
+    Queue a report to be generated in the background
+    An identical report that is still queued or running is returned instead of a new job.
+    """
+    try:
+        job = report_jobs.submit(report_type, start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid report date: {str(e)}"
+        )
+    return job.to_dict()
+
+@router.get("/reports/jobs/{job_id}")
+async def get_report_job(
+    job_id: str,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Get the status of a report job"""
+    job = report_jobs.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Report job not found"
+        )
+    return job.to_dict()
+
+@router.get("/reports/jobs/{job_id}/result")
+async def get_report_job_result(
+    job_id: str,
+    format: Literal["json", "csv"] = "json",
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Download the result of a completed report job as JSON or CSV"""
+    job = report_jobs.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Report job not found"
+        )
+    path = report_jobs.result_path(job, format)
+    if not path:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Report job is {job.status}"
+        )
+    media_type = "application/json" if format == "json" else "text/csv"
+    return FileResponse(path, media_type=media_type, filename=f"{job.report_type}-report.{format}")
+
+@router.get("/cache/stats")
+async def get_cache_stats(
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Hit/miss counters for the in-process caches"""
+    return {
+        "analytics": analytics_cache.stats(),
+        "principals": principal_cache.stats(),
+        "tokens": verified_tokens.stats(),
+        "token_versions": token_versions.stats()
+    }
@@ -14,6 +14,7 @@ from exceptions import (
 )
 from validators import validate_user_registration, validate_user_login
 from secure_auth import secure_auth
+from password_hasher import password_hasher
 from token_manager import token_manager
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -48,8 +49,8 @@ async def register(user: UserRegister):
                 validated_data['password']
             )
         
-        # Hash password securely
-        hashed_password = secure_auth.hash_password(validated_data['password'])
+        # Hash password on the bounded hashing pool, off the event loop
+        hashed_password = await password_hasher.hash(validated_data['password'])
         
         # Create user
         user_data = {
@@ -83,7 +84,7 @@ async def register(user: UserRegister):
             'permissions': []
         }
         
-        access_token, refresh_token, token_info = token_manager.create_token_pair(user_data)
+        access_token, refresh_token, token_info = await token_manager.create_token_pair(user_data)
         
         return {
             "access_token": access_token,
@@ -114,10 +115,11 @@ async def login(user: UserLogin):
         'id': authenticated_user['id'],
         'email': authenticated_user['email'],
         'role': 'student',
-        'permissions': []
+        'permissions': [],
+        'token_version': authenticated_user.get('token_version', 0)
     }
     
-    access_token, refresh_token, token_info = token_manager.create_token_pair(user_data)
+    access_token, refresh_token, token_info = await token_manager.create_token_pair(user_data)
     
     return {
         "access_token": access_token,
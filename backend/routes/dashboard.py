@@ -1,60 +1,128 @@
-from fastapi import APIRouter, Depends
-from models import DashboardStats
+from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from models import DashboardStats, DashboardSummary
 from auth import get_current_user
 from database.operations import db_ops
+from responses import fast_response
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
+SUMMARY_SECTIONS = ("stats", "recentActivity", "progress", "referralStats", "enrollments")
+
 @router.get("/stats", response_model=DashboardStats)
 async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
     """Get dashboard statistics for the current user"""
-    user_enrollments = await db_ops.get_user_enrollments(current_user["id"])
-    user_referrals = await db_ops.get_user_referrals(current_user["id"])
-    
-    # Calculate completed courses
-    completed_courses = 0
-    total_hours = 0
-    
-    for enrollment in user_enrollments:
-        if enrollment.get("progress", 0) >= 100:
-            completed_courses += 1
-        
-        # Estimate hours based on course duration
-        course = await db_ops.get_course_by_id(enrollment.get("course_id"))
-        if course:
-            duration_str = course.get("duration", "0 weeks")
-            try:
-                weeks = int(duration_str.split()[0])
-                total_hours += weeks * 6  # Assume 6 hours per week
-            except:
-                total_hours += 24  # Default fallback
-    
-    successful_referrals = len([r for r in user_referrals if r["status"] == "completed"])
-    
-    # Get user's current earnings from database
-    user_profile = await db_ops.get_user_by_id(current_user["id"])
-    total_earnings = user_profile.get("total_earnings", 0) if user_profile else 0
+    stats = await db_ops.get_dashboard_stats(current_user["id"])
+    if not stats:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
     
     return {
-        "coursesEnrolled": len(user_enrollments),
-        "hoursLearned": total_hours,
-        "certificates": completed_courses,
+        "coursesEnrolled": stats["courses_enrolled"],
+        "hoursLearned": stats["hours_learned"],
+        "certificates": stats["certificates"],
         "currentStreak": 7,  # Mock data - implement streak tracking
-        "totalEarnings": total_earnings,
-        "successfulReferrals": successful_referrals
+        "totalEarnings": int(stats["total_earnings"]),
+        "successfulReferrals": stats["successful_referrals"]
     }
 
+@router.get("/summary", response_model=DashboardSummary)
+async def get_dashboard_summary(
+    fields: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get the whole student dashboard in one call
+    ``fields`` is a comma-separated subset of stats, recentActivity, progress,
+    referralStats and enrollments; sections left out are neither queried nor returned.
+    """
+    sections = set(SUMMARY_SECTIONS)
+    if fields:
+        sections = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = sections.difference(SUMMARY_SECTIONS)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown dashboard sections: {', '.join(sorted(unknown))}"
+            )
+    
+    data = await db_ops.get_dashboard_summary(
+        current_user["id"],
+        with_enrollments=bool(sections & {"recentActivity", "progress", "enrollments"}),
+        recent_referrals=3 if "recentActivity" in sections else 0
+    )
+    if data is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    enrollments = data["enrollments"]
+    referral_stats = data["referralStats"]
+    
+    summary = {}
+    if "stats" in sections:
+        summary["stats"] = {
+            "coursesEnrolled": data["coursesEnrolled"],
+            "hoursLearned": data["hoursLearned"],
+            "certificates": data["certificates"],
+            "currentStreak": 7,  # Mock data - implement streak tracking
+            "totalEarnings": int(data["totalEarnings"]),
+            "successfulReferrals": referral_stats["completedReferrals"]
+        }
+    if "recentActivity" in sections:
+        activities = [
+            {
+                "type": "enrollment",
+                "title": f"Enrolled in {e['courseTitle']}",
+                "date": e["enrolledAt"],
+                "icon": "book"
+            }
+            for e in enrollments[:5]  # Latest 5 enrollments
+        ]
+        activities.extend(
+            {
+                "type": "referral",
+                "title": f"Referred {r['name']} - Earned {r['rewardEarned']} Birr",
+                "date": r["dateReferred"],
+                "icon": "users"
+            }
+            for r in data["recentReferrals"]
+        )
+        activities.sort(key=lambda x: x["date"] or "", reverse=True)
+        summary["recentActivity"] = activities[:10]
+    if "progress" in sections:
+        summary["progress"] = [
+            {
+                "courseId": e["courseId"],
+                "courseTitle": e["courseTitle"],
+                "progress": e.get("progress", 0),
+                "status": e.get("status"),
+                "enrolledAt": e["enrolledAt"],
+                "instructor": e["courseInstructor"]
+            }
+            for e in enrollments
+        ]
+    if "referralStats" in sections:
+        summary["referralStats"] = referral_stats
+    if "enrollments" in sections:
+        summary["enrollments"] = enrollments
+    
+    return fast_response(summary, DashboardSummary)
+
 @router.get("/recent-activity")
 async def get_recent_activity(current_user: dict = Depends(get_current_user)):
     """Get recent user activity"""
     user_enrollments = await db_ops.get_user_enrollments(current_user["id"])
-    user_referrals = db.get_user_referrals(current_user["email"])
+    user_referrals = await db_ops.get_user_referrals(current_user["id"])
     
     activities = []
     
-    # Add enrollment activities
-    for enrollment in user_enrollments[-5:]:  # Last 5 enrollments
-        course = await db_ops.get_course_by_id(enrollment.get("course_id"))
+    # Add enrollment activities (both lists come newest first)
+    recent_enrollments = user_enrollments[:5]  # Latest 5 enrollments
+    courses = await db_ops.loaders().courses.load_many(e["courseId"] for e in recent_enrollments)
+    for enrollment, course in zip(recent_enrollments, courses):
         if course:
             activities.append({
                 "type": "enrollment",
@@ -64,27 +132,27 @@ async def get_recent_activity(current_user: dict = Depends(get_current_user)):
             })
     
     # Add referral activities
-    for referral in user_referrals[-3:]:  # Last 3 referrals
+    for referral in user_referrals[:3]:  # Latest 3 referrals
         activities.append({
             "type": "referral",
-            "title": f"Referred {referral['name']} - Earned {referral['rewardEarned']} Birr",
-            "date": referral["dateReferred"],
+            "title": f"Referred {referral['referredUserName']} - Earned {referral['rewardEarned']} Birr",
+            "date": referral.get("createdAt"),
             "icon": "users"
         })
     
     # Sort by date (most recent first)
-    activities.sort(key=lambda x: x["date"], reverse=True)
+    activities.sort(key=lambda x: x["date"] or "", reverse=True)
     
     return {"activities": activities[:10]}  # Return top 10 most recent
 
 @router.get("/progress-overview")
 async def get_progress_overview(current_user: dict = Depends(get_current_user)):
     """Get course progress overview"""
-    user_enrollments = db.get_user_enrollments(current_user["email"])
+    user_enrollments = await db_ops.get_user_enrollments(current_user["id"])
+    courses = await db_ops.loaders().courses.load_many(e["courseId"] for e in user_enrollments)
     
     progress_data = []
-    for enrollment in user_enrollments:
-        course = db.get_course_by_id(enrollment["courseId"])
+    for enrollment, course in zip(user_enrollments, courses):
         if course:
             progress_data.append({
                 "courseId": course["id"],
@@ -95,4 +163,4 @@ async def get_progress_overview(current_user: dict = Depends(get_current_user)):
                 "instructor": course["instructor"]
             })
     
-    return {"courses": progress_data}
\ No newline at end of file
+    return {"courses": progress_data}
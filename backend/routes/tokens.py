@@ -9,6 +9,7 @@ from pydantic import BaseModel
 
 from token_manager import token_manager
 from auth import get_current_user
+from database.operations import db_ops
 
 router = APIRouter(prefix="/tokens", tags=["Token Management"])
 
@@ -39,7 +40,7 @@ async def refresh_access_token(request: RefreshTokenRequest):
     The refresh token must be valid and not expired.
     """
     try:
-        new_access_token, token_info = token_manager.refresh_access_token(request.refresh_token)
+        new_access_token, token_info = await token_manager.refresh_access_token(request.refresh_token)
         
         return TokenRefreshResponse(
             access_token=new_access_token,
@@ -68,7 +69,7 @@ async def revoke_refresh_token(
     effectively logging out from that device/session.
     """
     try:
-        success = token_manager.revoke_refresh_token(request.refresh_token)
+        success = await token_manager.revoke_refresh_token(request.refresh_token)
         
         if success:
             return {
@@ -98,7 +99,9 @@ async def revoke_all_tokens(current_user: dict = Depends(get_current_user)):
     """
     try:
         user_id = current_user.get('id')
-        revoked_count = token_manager.revoke_all_user_tokens(user_id)
+        revoked_count = await token_manager.revoke_all_user_tokens(user_id)
+        # Outstanding access tokens are invalidated too
+        await db_ops.revoke_user_tokens(user_id)
         
         return {
             "success": True,
@@ -147,7 +150,7 @@ async def get_active_tokens(current_user: dict = Depends(get_current_user)):
     """
     try:
         user_id = current_user.get('id')
-        active_tokens = token_manager.get_user_active_tokens(user_id)
+        active_tokens = await token_manager.get_user_active_tokens(user_id)
         
         return {
             "success": True,
@@ -169,7 +172,7 @@ async def cleanup_expired_tokens(current_user: dict = Depends(get_current_user))
     This endpoint removes expired refresh tokens from the system.
     """
     try:
-        cleaned_count = token_manager.cleanup_expired_tokens()
+        cleaned_count = await token_manager.cleanup_expired_tokens()
         
         return {
             "success": True,
@@ -18,9 +18,9 @@ async def get_user_profile(current_user: dict = Depends(get_current_user)):
     user_enrollments = await db_ops.get_user_enrollments(current_user["id"])
     
     # Get enrolled courses with progress
+    courses = await db_ops.loaders().courses.load_many(e["courseId"] for e in user_enrollments)
     enrolled_courses = []
-    for enrollment in user_enrollments:
-        course = await db_ops.get_course_by_id(enrollment.get("course_id"))
+    for enrollment, course in zip(user_enrollments, courses):
         if course:
             enrolled_courses.append({
                 **course,
@@ -32,19 +32,18 @@ async def get_user_profile(current_user: dict = Depends(get_current_user)):
     # Calculate stats
     completed_courses = len([c for c in enrolled_courses if c.get("progress", 0) >= 100])
     
-    # Get user's current earnings from database
-    user_profile = await db_ops.get_user_by_id(current_user["id"])
-    total_earnings = user_profile.get("total_earnings", 0) if user_profile else 0
+    # Earnings and hours learned come from the dashboard read model
+    stats = await db_ops.get_dashboard_stats(current_user["id"])
     
     return {
         "user": create_user_response(current_user),
         "enrolledCourses": enrolled_courses,
         "stats": {
             "coursesEnrolled": len(enrolled_courses),
-            "hoursLearned": len(enrolled_courses) * 24,  # Estimated
+            "hoursLearned": stats["hours_learned"] if stats else 0,
             "certificates": completed_courses,
             "currentStreak": 7,  # Mock data
-            "totalEarnings": total_earnings
+            "totalEarnings": stats["total_earnings"] if stats else 0
         }
     }
 
@@ -108,8 +107,8 @@ async def get_user_enrollments(current_user: dict = Depends(get_current_user)):
     enrollments = await db_ops.get_user_enrollments(current_user["id"])
     
     # Add course details to each enrollment
-    for enrollment in enrollments:
-        course = await db_ops.get_course_by_id(enrollment.get("course_id"))
+    courses = await db_ops.loaders().courses.load_many(e["courseId"] for e in enrollments)
+    for enrollment, course in zip(enrollments, courses):
         if course:
             enrollment["course"] = course
     
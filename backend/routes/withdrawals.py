@@ -1,9 +1,11 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from typing import List, Optional
 from models import WithdrawalRequest, WithdrawalResponse
 from auth import get_current_user
 from routes.admin import get_current_admin
 from database.operations import db_ops
+from database.pagination import MAX_PAGE_SIZE
+from responses import fast_response, page_response
 
 router = APIRouter(prefix="/withdrawals", tags=["Withdrawals"])
 
@@ -50,24 +52,8 @@ async def create_withdrawal_request(
                 detail="Failed to create withdrawal request"
             )
         
-        # Map database fields to API response fields
-        mapped_withdrawal = {
-            "id": withdrawal["id"],
-            "userId": withdrawal["user_id"],
-            "amount": withdrawal["amount"],
-            "accountType": withdrawal["account_type"],
-            "accountNumber": withdrawal["account_number"],
-            "accountHolderName": withdrawal["account_holder_name"],
-            "phoneNumber": withdrawal.get("phone_number"),
-            "status": withdrawal["status"],
-            "adminNotes": withdrawal.get("admin_notes"),
-            "rejectionReason": withdrawal.get("rejection_reason"),
-            "createdAt": withdrawal["created_at"],
-            "processedAt": withdrawal.get("processed_at"),
-            "processedBy": withdrawal.get("processed_by")
-        }
-        
-        return WithdrawalResponse(**mapped_withdrawal)
+        # Already in API response shape from the database layer
+        return fast_response(withdrawal, WithdrawalResponse)
         
     except HTTPException:
         raise
@@ -84,26 +70,8 @@ async def get_my_withdrawal_requests(
     """Get user's withdrawal requests"""
     try:
         withdrawals = await db_ops.get_user_withdrawal_requests(current_user["id"])
-        # Map database fields to API response fields
-        mapped_withdrawals = []
-        for withdrawal in withdrawals:
-            mapped_withdrawal = {
-                "id": withdrawal["id"],
-                "userId": withdrawal["user_id"],
-                "amount": withdrawal["amount"],
-                "accountType": withdrawal["account_type"],
-                "accountNumber": withdrawal["account_number"],
-                "accountHolderName": withdrawal["account_holder_name"],
-                "phoneNumber": withdrawal.get("phone_number"),
-                "status": withdrawal["status"],
-                "adminNotes": withdrawal.get("admin_notes"),
-                "rejectionReason": withdrawal.get("rejection_reason"),
-                "createdAt": withdrawal["created_at"],
-                "processedAt": withdrawal.get("processed_at"),
-                "processedBy": withdrawal.get("processed_by")
-            }
-            mapped_withdrawals.append(WithdrawalResponse(**mapped_withdrawal))
-        return mapped_withdrawals
+        # Already in API response shape from the database layer
+        return fast_response(withdrawals, List[WithdrawalResponse])
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -112,32 +80,21 @@ async def get_my_withdrawal_requests(
 
 @router.get("/", response_model=List[WithdrawalResponse])
 async def get_all_withdrawal_requests(
-    status: str = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     current_admin: dict = Depends(get_current_admin)
 ):
-    """Get all withdrawal requests (admin only)"""
+    """Get withdrawal requests, newest first (admin only); the next page's cursor is in X-Next-Cursor"""
     try:
-        withdrawals = await db_ops.get_all_withdrawal_requests(status)
-        # Map database fields to API response fields
-        mapped_withdrawals = []
-        for withdrawal in withdrawals:
-            mapped_withdrawal = {
-                "id": withdrawal["id"],
-                "userId": withdrawal["user_id"],
-                "amount": withdrawal["amount"],
-                "accountType": withdrawal["account_type"],
-                "accountNumber": withdrawal["account_number"],
-                "accountHolderName": withdrawal["account_holder_name"],
-                "phoneNumber": withdrawal.get("phone_number"),
-                "status": withdrawal["status"],
-                "adminNotes": withdrawal.get("admin_notes"),
-                "rejectionReason": withdrawal.get("rejection_reason"),
-                "createdAt": withdrawal["created_at"],
-                "processedAt": withdrawal.get("processed_at"),
-                "processedBy": withdrawal.get("processed_by")
-            }
-            mapped_withdrawals.append(WithdrawalResponse(**mapped_withdrawal))
-        return mapped_withdrawals
+        page = await db_ops.get_withdrawal_requests_page(limit, cursor=cursor, status=status_filter)
+        # Already in API response shape from the database layer
+        return page_response(page, List[WithdrawalResponse])
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -14,6 +14,8 @@ import logging
 
 from security import password_validator, login_tracker, input_sanitizer
 from exceptions import create_authentication_error, create_authorization_error
+from jwt_cache import decode_token
+from password_hasher import hash_password, verify_password
 
 logger = logging.getLogger(__name__)
 
@@ -23,27 +25,19 @@ JWT_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_DAYS = 30  # 30 days for better user experience
 REFRESH_TOKEN_EXPIRE_DAYS = 90  # 90 days for long-term sessions
 
-# Password hashing - use SHA256 for now due to bcrypt compatibility issues
-import hashlib
 
 class SecureAuth:
     """Secure authentication utilities"""
     
     @staticmethod
     def hash_password(password: str) -> str:
-        """Hash password using SHA256 with salt"""
-        # Add salt for better security
-        salt = "elevate_skill_salt_2024"
-        salted_password = password + salt
-        return hashlib.sha256(salted_password.encode()).hexdigest()
+        """Hash password with salted PBKDF2 (blocking; request handlers use password_hasher.hash)"""
+        return hash_password(password)
     
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
-        """Verify password against hash"""
-        # Hash the plain password with salt and compare
-        salt = "elevate_skill_salt_2024"
-        salted_password = plain_password + salt
-        return hashlib.sha256(salted_password.encode()).hexdigest() == hashed_password
+        """Verify password against a PBKDF2 or legacy SHA256 hash (blocking)"""
+        return verify_password(plain_password, hashed_password)
     
     @staticmethod
     def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
@@ -73,7 +67,7 @@ class SecureAuth:
     def verify_token(token: str, token_type: str = "access") -> Dict[str, Any]:
         """Verify and decode JWT token"""
         try:
-            payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+            payload = decode_token(token, JWT_SECRET_KEY, [JWT_ALGORITHM])
             
             # Check token type
             if payload.get("type") != token_type:
@@ -89,7 +83,7 @@ class SecureAuth:
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Token has expired"
             )
-        except jwt.JWTError:
+        except jwt.PyJWTError:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid token"
@@ -8,7 +8,7 @@ import asyncio
 import uuid
 from datetime import datetime, timedelta
 from database.connection import get_async_session
-from database.operations import db_ops
+from database.operations import db_ops, duration_hours
 from sqlalchemy import text
 
 # Real course data from frontend
@@ -123,8 +123,8 @@ async def seed_courses():
     for course_data in COURSES_DATA:
         course_id = str(uuid.uuid4())
         query = """
-        INSERT INTO courses (id, title, description, image, price, duration, students, rating, level, instructor, created_at)
-        VALUES (:id, :title, :description, :image, :price, :duration, :students, :rating, :level, :instructor, :created_at)
+        INSERT INTO courses (id, title, description, image, price, duration, duration_hours, students, rating, level, instructor, created_at)
+        VALUES (:id, :title, :description, :image, :price, :duration, :duration_hours, :students, :rating, :level, :instructor, :created_at)
         """
         
         values = {
@@ -134,6 +134,7 @@ async def seed_courses():
             "image": course_data["image"],
             "price": course_data["price"],
             "duration": course_data["duration"],
+            "duration_hours": duration_hours(course_data["duration"]),
             "students": course_data["students"],
             "rating": course_data["rating"],
             "level": course_data["level"],
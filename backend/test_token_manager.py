@@ -3,29 +3,32 @@
 Test token manager directly
 """
 
+import asyncio
 import sys
 import os
+import uuid
 
 # Add the backend directory to the path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from database.connection import disconnect_db
 from token_manager import token_manager
 
-def test_token_manager():
+async def test_token_manager():
     """Test token manager"""
     print("=== TESTING TOKEN MANAGER ===")
     
     try:
         # Test user data
         user_data = {
-            'id': 'test-user-id',
+            'id': str(uuid.uuid4()),
             'email': 'test@example.com',
             'role': 'student',
             'permissions': []
         }
         
         print("Creating token pair...")
-        access_token, refresh_token, token_info = token_manager.create_token_pair(user_data)
+        access_token, refresh_token, token_info = await token_manager.create_token_pair(user_data)
         
         print("Token pair created successfully!")
         print(f"Access token length: {len(access_token)}")
@@ -42,6 +45,8 @@ def test_token_manager():
         print(f"Token manager test failed: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        await disconnect_db()
 
 if __name__ == "__main__":
-    test_token_manager()
+    asyncio.run(test_token_manager())
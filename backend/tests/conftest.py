@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Import application modules the way the app does, from the backend directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
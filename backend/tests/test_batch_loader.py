@@ -0,0 +1,48 @@
+import asyncio
+
+from database.loaders import BatchLoader
+
+
+def _batch_fn(calls):
+    async def load(keys):
+        calls.append(list(keys))
+        return {key: key.upper() for key in keys if key != "gone"}
+    return load
+
+
+def test_keys_requested_together_share_one_batch():
+    async def run():
+        calls = []
+        loader = BatchLoader(_batch_fn(calls))
+        values = await loader.load_many(["a", "b", "a", "gone", None])
+        again = await loader.load("b")
+        await asyncio.sleep(0)
+        return calls, values, again, loader._pending
+
+    calls, values, again, pending = asyncio.run(run())
+    assert calls == [["a", "b", "gone"]]
+    assert values == ["A", "B", "A", None, None]
+    assert again == "B"
+    assert not pending
+
+
+def test_in_flight_batch_is_held_until_done():
+    async def run():
+        release = asyncio.Event()
+
+        async def slow(keys):
+            await release.wait()
+            return {key: key for key in keys}
+
+        loader = BatchLoader(slow)
+        pending = asyncio.ensure_future(loader.load("a"))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        held = len(loader._pending)
+        release.set()
+        value = await pending
+        # The task's done callback runs on the next loop iteration
+        await asyncio.sleep(0)
+        return held, value, len(loader._pending)
+
+    assert asyncio.run(run()) == (1, "a", 0)
@@ -0,0 +1,20 @@
+import pytest
+
+from database.operations import DEFAULT_COURSE_HOURS, HOURS_PER_WEEK, duration_hours
+
+
+@pytest.mark.parametrize("duration, hours", [
+    ("8 weeks", 8 * HOURS_PER_WEEK),
+    ("1 week", HOURS_PER_WEEK),
+    ("  12 Weeks ", 12 * HOURS_PER_WEEK),
+    ("40 hours", 40),
+    ("1 hour", 1),
+    ("10 hrs", 10),
+])
+def test_duration_units(duration, hours):
+    assert duration_hours(duration) == hours
+
+
+@pytest.mark.parametrize("duration", ["3 months", "12", "self-paced", "8 weeks approx", "", None])
+def test_unknown_durations_use_default(duration):
+    assert duration_hours(duration) == DEFAULT_COURSE_HOURS
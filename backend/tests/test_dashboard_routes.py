@@ -0,0 +1,74 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from auth import get_current_user
+from database.operations import db_ops
+from routes.dashboard import router
+
+USER = {"id": "u1", "email": "a@example.com", "role": "student"}
+
+ENROLLMENTS = [
+    {"courseId": "c2", "enrolledAt": "2024-03-01T00:00:00", "progress": 50, "status": "active"},
+    {"courseId": "c1", "enrolledAt": "2024-02-01T00:00:00", "progress": 100, "status": "completed"},
+    {"courseId": "gone", "enrolledAt": "2024-01-01T00:00:00", "progress": 0, "status": "active"},
+]
+REFERRALS = [
+    {"referredUserName": "Bea", "rewardEarned": 100, "createdAt": "2024-02-15T00:00:00"},
+]
+COURSES = {
+    "c1": {"id": "c1", "title": "Python", "instructor": "Ann"},
+    "c2": {"id": "c2", "title": "SQL", "instructor": "Bo"},
+}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    batches = []
+
+    async def get_user_enrollments(user_id):
+        assert user_id == USER["id"]
+        return ENROLLMENTS
+
+    async def get_user_referrals(user_id):
+        assert user_id == USER["id"]
+        return REFERRALS
+
+    async def get_courses_by_ids(ids):
+        batches.append(list(ids))
+        return {course_id: COURSES[course_id] for course_id in ids if course_id in COURSES}
+
+    monkeypatch.setattr(db_ops, "get_user_enrollments", get_user_enrollments)
+    monkeypatch.setattr(db_ops, "get_user_referrals", get_user_referrals)
+    monkeypatch.setattr(db_ops, "get_courses_by_ids", get_courses_by_ids)
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_current_user] = lambda: USER
+    test_client = TestClient(app)
+    test_client.batches = batches
+    return test_client
+
+
+def test_recent_activity(client):
+    response = client.get("/dashboard/recent-activity")
+    assert response.status_code == 200
+    assert [a["title"] for a in response.json()["activities"]] == [
+        "Enrolled in SQL",
+        "Referred Bea - Earned 100 Birr",
+        "Enrolled in Python",
+    ]
+    # Every course was fetched in a single batch
+    assert client.batches == [["c2", "c1", "gone"]]
+
+
+def test_progress_overview(client):
+    response = client.get("/dashboard/progress-overview")
+    assert response.status_code == 200
+    assert response.json()["courses"] == [
+        {"courseId": "c2", "courseTitle": "SQL", "progress": 50, "status": "active",
+         "enrolledAt": "2024-03-01T00:00:00", "instructor": "Bo"},
+        {"courseId": "c1", "courseTitle": "Python", "progress": 100, "status": "completed",
+         "enrolledAt": "2024-02-01T00:00:00", "instructor": "Ann"},
+    ]
+    assert client.batches == [["c2", "c1", "gone"]]
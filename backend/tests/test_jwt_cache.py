@@ -0,0 +1,74 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import jwt
+import pytest
+
+from jwt_cache import VerifiedTokenCache
+
+KEY = "test-secret"
+ALGORITHMS = ["HS256"]
+
+
+def _token(user_id="u1", email="a@example.com", seconds=3600, key=KEY):
+    payload = {
+        "sub": email,
+        "user_id": user_id,
+        "type": "access",
+        "exp": datetime.now(timezone.utc) + timedelta(seconds=seconds),
+    }
+    return jwt.encode(payload, key, algorithm=ALGORITHMS[0])
+
+
+def test_second_decode_is_a_hit():
+    cache = VerifiedTokenCache(max_entries=10)
+    token = _token()
+    assert cache.decode(token, KEY, ALGORITHMS)["user_id"] == "u1"
+    payload = cache.decode(token, KEY, ALGORITHMS)
+    payload["user_id"] = "tampered"
+    assert cache.decode(token, KEY, ALGORITHMS)["user_id"] == "u1"
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+
+def test_invalid_tokens_are_not_cached():
+    cache = VerifiedTokenCache(max_entries=10)
+    token = _token(key="other-secret")
+    for _ in range(2):
+        with pytest.raises(jwt.InvalidSignatureError):
+            cache.decode(token, KEY, ALGORITHMS)
+    assert cache.stats()["entries"] == 0
+
+
+def test_entry_for_another_key_is_not_reused():
+    cache = VerifiedTokenCache(max_entries=10)
+    token = _token()
+    cache.decode(token, KEY, ALGORITHMS)
+    with pytest.raises(jwt.InvalidSignatureError):
+        cache.decode(token, "rotated-secret", ALGORITHMS)
+
+
+def test_cached_token_expires():
+    cache = VerifiedTokenCache(max_entries=10)
+    token = _token(seconds=1)
+    cache.decode(token, KEY, ALGORITHMS)
+    time.sleep(1.1)
+    with pytest.raises(jwt.ExpiredSignatureError):
+        cache.decode(token, KEY, ALGORITHMS)
+    assert cache.stats()["entries"] == 0
+
+
+def test_invalidate_user_by_id_and_email():
+    cache = VerifiedTokenCache(max_entries=10)
+    cache.decode(_token("u1", "a@example.com"), KEY, ALGORITHMS)
+    cache.decode(_token("u2", "b@example.com"), KEY, ALGORITHMS)
+    cache.decode(_token("u3", "c@example.com"), KEY, ALGORITHMS)
+    assert cache.invalidate_user(user_id="u1") == 1
+    assert cache.invalidate_user(email="b@example.com") == 1
+    assert cache.stats()["entries"] == 1
+
+
+def test_lru_is_bounded():
+    cache = VerifiedTokenCache(max_entries=2)
+    for i in range(3):
+        cache.decode(_token(str(i)), KEY, ALGORITHMS)
+    assert cache.stats()["entries"] == 2
@@ -0,0 +1,50 @@
+import pytest
+
+from database.queries import QUERIES, count_query, export_query, page_query
+
+
+def _sql(statement):
+    return " ".join(str(statement).split())
+
+
+@pytest.mark.parametrize("name, alias", [
+    ("users.page", "u"),
+    ("courses.page", "c"),
+    ("payment_requests.page", "pr"),
+    ("withdrawals.page", "wr"),
+])
+def test_undated_rows_sort_last_and_stay_pageable(name, alias):
+    sql = _sql(page_query(name, after_cursor=True))
+    key = f"COALESCE({alias}.created_at, '-infinity')"
+    assert sql.endswith(f"ORDER BY {key} DESC, {alias}.id DESC LIMIT :limit")
+    assert f"({key}, {alias}.id) < (COALESCE(CAST(:cursor_created_at AS timestamptz), '-infinity'), :cursor_id)" in sql
+    assert f"ORDER BY {key} DESC" in _sql(export_query(name))
+
+
+def test_unknown_filter_is_rejected():
+    with pytest.raises(ValueError):
+        page_query("users.page", ["nope"])
+    with pytest.raises(ValueError):
+        count_query("users.page", ["nope"])
+
+
+@pytest.mark.parametrize("name, filters", [
+    ("payment_requests.page", []),
+    ("payment_requests.page", ["status"]),
+    ("withdrawals.page", ["status"]),
+])
+def test_count_uses_the_listing_joins(name, filters):
+    page = _sql(page_query(name, filters))
+    count = _sql(count_query(name, filters))
+    source = page[page.index(" FROM "):page.index(" ORDER BY ")]
+    assert count == f"SELECT count(*){source}"
+
+
+@pytest.mark.parametrize("name", ["users.search", "users.search_prefix"])
+def test_search_count_matches_the_search_predicate(name):
+    search = _sql(QUERIES[name])
+    count = _sql(QUERIES[f"{name}_count"])
+    where = count[count.index(" WHERE "):]
+    assert where in search
+    assert search.endswith("ORDER BY exact DESC, rank DESC, u.id DESC LIMIT :limit OFFSET :offset")
+    assert "cursor" not in count
@@ -0,0 +1,55 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+
+from database.pagination import (
+    decode_cursor,
+    decode_rank_cursor,
+    encode_cursor,
+    encode_rank_cursor,
+    like_pattern,
+    prefix_pattern,
+)
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    row_id = uuid4()
+    assert decode_cursor(encode_cursor(created_at, row_id)) == (created_at, row_id)
+
+
+def test_cursor_is_url_safe_without_padding():
+    cursor = encode_cursor(datetime(2024, 1, 1), uuid4())
+    assert "=" not in cursor
+    assert "+" not in cursor and "/" not in cursor
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "bm9waXBl", encode_cursor(datetime(2024, 1, 1), uuid4())[:-4]])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_like_patterns_escape_wildcards():
+    assert like_pattern("50%_off") == "%50\\%\\_off%"
+    assert prefix_pattern("Ab_") == "ab\\_%"
+    assert like_pattern("") is None and prefix_pattern(None) is None
+
+
+def test_undated_row_cursor_round_trip():
+    row_id = uuid4()
+    assert decode_cursor(encode_cursor(None, row_id)) == (None, row_id)
+
+
+def test_rank_cursor_round_trip():
+    row_id = uuid4()
+    rank = 0.2857142984867096
+    assert decode_rank_cursor(encode_rank_cursor(True, rank, row_id)) == (True, rank, row_id)
+    assert decode_rank_cursor(encode_rank_cursor(False, 0, row_id)) == (False, 0.0, row_id)
+
+
+@pytest.mark.parametrize("cursor", ["", "bm9waXBl", encode_cursor(datetime(2024, 1, 1), uuid4())])
+def test_malformed_rank_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_rank_cursor(cursor)
@@ -0,0 +1,74 @@
+import asyncio
+import hashlib
+
+import pytest
+from fastapi import HTTPException
+
+from password_hasher import LEGACY_SALT, PasswordHasher, hash_password, verify_password
+
+ITERATIONS = 1000
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_sync_hash_round_trip():
+    stored = hash_password("MyPass12", iterations=ITERATIONS)
+    assert stored.startswith(f"pbkdf2_sha256${ITERATIONS}$")
+    assert verify_password("MyPass12", stored)
+    assert not verify_password("wrong", stored)
+    assert hash_password("MyPass12", iterations=ITERATIONS) != stored
+
+
+def test_verify_on_pool():
+    hasher = PasswordHasher(workers=2, max_queue=4, iterations=ITERATIONS)
+    try:
+        stored = _run(hasher.hash("MyPass12"))
+        assert _run(hasher.verify("MyPass12", stored)) == (True, False)
+        assert _run(hasher.verify("wrong", stored)) == (False, False)
+        assert _run(hasher.verify("MyPass12", "")) == (False, False)
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.parametrize("legacy", [
+    hashlib.sha256(b"MyPass12").hexdigest(),
+    hashlib.sha256(("MyPass12" + LEGACY_SALT).encode()).hexdigest(),
+])
+def test_legacy_hashes_verify_and_need_rehash(legacy):
+    hasher = PasswordHasher(workers=1, max_queue=1, iterations=ITERATIONS)
+    try:
+        assert _run(hasher.verify("MyPass12", legacy)) == (True, True)
+        assert _run(hasher.verify("wrong", legacy)) == (False, False)
+    finally:
+        hasher.shutdown()
+
+
+def test_weaker_pbkdf2_hash_needs_rehash():
+    hasher = PasswordHasher(workers=1, max_queue=1, iterations=ITERATIONS)
+    try:
+        weak = hash_password("MyPass12", iterations=ITERATIONS // 2)
+        assert _run(hasher.verify("MyPass12", weak)) == (True, True)
+    finally:
+        hasher.shutdown()
+
+
+def test_saturated_pool_rejects_with_503():
+    hasher = PasswordHasher(workers=1, max_queue=1, iterations=ITERATIONS)
+
+    async def burst():
+        # All three are admitted or rejected before any of them completes
+        return await asyncio.gather(*(hasher.hash("MyPass12") for _ in range(3)), return_exceptions=True)
+
+    try:
+        results = _run(burst())
+    finally:
+        hasher.shutdown()
+    rejected = [r for r in results if isinstance(r, HTTPException)]
+    assert len(rejected) == 1
+    assert rejected[0].status_code == 503
+    assert rejected[0].headers["Retry-After"] == "1"
+    stats = hasher.stats()
+    assert stats["rejected"] == 1 and stats["completed"] == 2
+    assert stats["running"] == 0 and stats["queued"] == 0
@@ -0,0 +1,79 @@
+import asyncio
+
+from database.principals import USER_FIELDS, PrincipalCache, project
+
+
+def _loader(calls, row):
+    async def load():
+        calls.append(1)
+        return row
+    return load
+
+
+def _user(email="a@example.com", user_id="u1", **fields):
+    return project({"id": user_id, "email": email, "password": "hash", **fields}, USER_FIELDS)
+
+
+def test_project_drops_unlisted_fields():
+    principal = _user()
+    assert "password" not in principal
+    assert principal["id"] == "u1"
+
+
+def test_hit_after_load_and_copies_returned():
+    async def run():
+        cache = PrincipalCache(ttl=60, max_entries=10)
+        calls = []
+        first = await cache.get_or_load("user", "a@example.com", _loader(calls, _user()))
+        first["email"] = "changed"
+        second = await cache.get_or_load("user", "a@example.com", _loader(calls, _user()))
+        return calls, second, cache.stats()
+
+    calls, second, stats = asyncio.run(run())
+    assert len(calls) == 1
+    assert second["email"] == "a@example.com"
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_invalidate_by_email_and_by_id():
+    async def run():
+        cache = PrincipalCache(ttl=60, max_entries=10)
+        calls = []
+        await cache.get_or_load("user", "a@example.com", _loader(calls, _user()))
+        await cache.get_or_load("admin", "b@example.com", _loader(calls, _user("b@example.com", "u2")))
+        cache.invalidate(email="a@example.com")
+        cache.invalidate(user_id="u2")
+        await cache.get_or_load("user", "a@example.com", _loader(calls, _user()))
+        await cache.get_or_load("admin", "b@example.com", _loader(calls, _user("b@example.com", "u2")))
+        return calls
+
+    assert len(asyncio.run(run())) == 4
+
+
+def test_load_racing_an_invalidation_is_not_cached():
+    async def run():
+        cache = PrincipalCache(ttl=60, max_entries=10)
+        calls = []
+
+        async def stale_load():
+            calls.append(1)
+            cache.invalidate(email="a@example.com")
+            return _user()
+
+        await cache.get_or_load("user", "a@example.com", stale_load)
+        await cache.get_or_load("user", "a@example.com", _loader(calls, _user()))
+        return calls
+
+    assert len(asyncio.run(run())) == 2
+
+
+def test_missing_principal_is_not_cached_and_lru_is_bounded():
+    async def run():
+        cache = PrincipalCache(ttl=60, max_entries=2)
+        calls = []
+        assert await cache.get_or_load("user", "gone@example.com", _loader(calls, None)) is None
+        for i in range(3):
+            await cache.get_or_load("user", f"{i}@example.com", _loader(calls, _user(f"{i}@example.com", str(i))))
+        return cache.stats()
+
+    assert asyncio.run(run())["entries"] == 2
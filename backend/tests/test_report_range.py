@@ -0,0 +1,43 @@
+from datetime import date
+
+import pytest
+
+from database.operations import _report_range, normalize_report_dates
+
+
+def test_bounded_range():
+    assert _report_range("2024-01-01", "2024-01-31") == {
+        "start_date": date(2024, 1, 1),
+        "end_date": date(2024, 1, 31),
+        "undated": False,
+    }
+
+
+def test_time_part_is_dropped():
+    assert _report_range("2024-01-01T15:30", "2024-01-02T00:00:00Z")["start_date"] == date(2024, 1, 1)
+
+
+def test_open_ends():
+    assert _report_range(None, "2024-01-31")["start_date"] == date.min
+    assert _report_range("2024-01-01", None)["end_date"] == date.max
+    assert _report_range(None, "2024-01-31")["undated"] is False
+
+
+def test_unbounded_range_keeps_undated_rows():
+    assert _report_range(None, "") == {"start_date": date.min, "end_date": date.max, "undated": True}
+
+
+@pytest.mark.parametrize("start, end", [
+    ("2024-01-01garbage", None),
+    ("01/02/2024", None),
+    (None, "2024-13-01"),
+    ("2024-02-01", "2024-01-31"),
+])
+def test_invalid_ranges_raise_value_error(start, end):
+    with pytest.raises(ValueError):
+        _report_range(start, end)
+
+
+def test_normalized_dates_share_a_key():
+    assert normalize_report_dates("2024-01-01", None) == normalize_report_dates("2024-01-01T00:00", "")
+    assert normalize_report_dates("2024-01-01T08:00", "2024-01-31") == ("2024-01-01", "2024-01-31")
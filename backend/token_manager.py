@@ -1,26 +1,59 @@
 """
 Advanced JWT Token Management System
 Provides comprehensive token handling with refresh capabilities
+Refresh tokens are recorded in the refresh_tokens table, so they survive
+restarts and are shared by every worker. Lookups go through a short-lived
+local cache. A token revoked on another worker can still refresh here for up
+to REFRESH_TOKEN_CACHE_TTL_SECONDS. Revoking all of a user's tokens also
+bumps their token version, which reaches every worker within seconds.
 """
 
 import jwt
+import os
 import secrets
-from datetime import datetime, timedelta
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 from typing import Dict, Any, Optional, Tuple
 from fastapi import HTTPException, status
 import logging
 
 from secure_auth import JWT_SECRET_KEY, JWT_ALGORITHM, ACCESS_TOKEN_EXPIRE_DAYS, REFRESH_TOKEN_EXPIRE_DAYS
+from jwt_cache import decode_token, verified_tokens
+from database.operations import db_ops
+from database.token_versions import token_versions
 
 logger = logging.getLogger(__name__)
 
+REFRESH_TOKEN_CACHE_TTL_SECONDS = float(os.getenv("REFRESH_TOKEN_CACHE_TTL_SECONDS", "30"))
+REFRESH_TOKEN_CACHE_MAX_ENTRIES = 10000
+# last_used is written back at most this often per token
+REFRESH_TOKEN_TOUCH_SECONDS = 300
+REFRESH_TOKEN_CLEANUP_BATCH_SIZE = 1000
+
 class TokenManager:
     """Advanced token management with refresh capabilities"""
     
     def __init__(self):
-        self.refresh_tokens: Dict[str, Dict[str, Any]] = {}  # In production, use Redis
+        # token_id -> (cached until, refresh token record)
+        self._records: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+    
+    async def _get_record(self, token_id: str) -> Optional[Dict[str, Any]]:
+        cached = self._records.get(token_id)
+        if cached is not None and time.monotonic() < cached[0]:
+            self._records.move_to_end(token_id)
+            return cached[1]
+        record = await db_ops.get_refresh_token(token_id)
+        if record is None:
+            self._records.pop(token_id, None)
+            return None
+        self._records[token_id] = (time.monotonic() + REFRESH_TOKEN_CACHE_TTL_SECONDS, record)
+        self._records.move_to_end(token_id)
+        while len(self._records) > REFRESH_TOKEN_CACHE_MAX_ENTRIES:
+            self._records.popitem(last=False)
+        return record
     
-    def create_token_pair(self, user_data: Dict[str, Any]) -> Tuple[str, str, Dict[str, Any]]:
+    async def create_token_pair(self, user_data: Dict[str, Any]) -> Tuple[str, str, Dict[str, Any]]:
         """
         Create both access and refresh tokens
         
@@ -36,6 +69,7 @@ class TokenManager:
             'user_id': user_id,
             'role': user_data.get('role', 'student'),
             'permissions': user_data.get('permissions', []),
+            'ver': user_data.get('token_version', 0),
             'iat': datetime.utcnow()
         }
         
@@ -47,19 +81,14 @@ class TokenManager:
             'sub': email,
             'user_id': user_id,
             'token_id': refresh_token_id,
+            'ver': user_data.get('token_version', 0),
             'iat': datetime.utcnow()
         }
         
         refresh_token = self._create_refresh_token(refresh_token_data)
         
         # Store refresh token info
-        self.refresh_tokens[refresh_token_id] = {
-            'user_id': user_id,
-            'email': email,
-            'created_at': datetime.utcnow(),
-            'last_used': datetime.utcnow(),
-            'is_revoked': False
-        }
+        await db_ops.create_refresh_token(refresh_token_id, user_id, email, refresh_token_data['exp'])
         
         # Token info for client
         token_info = {
@@ -74,7 +103,7 @@ class TokenManager:
         
         return access_token, refresh_token, token_info
     
-    def refresh_access_token(self, refresh_token: str) -> Tuple[str, Dict[str, Any]]:
+    async def refresh_access_token(self, refresh_token: str) -> Tuple[str, Dict[str, Any]]:
         """
         Create new access token using refresh token
         
@@ -92,22 +121,26 @@ class TokenManager:
                 )
             
             token_id = payload.get('token_id')
-            if not token_id or token_id not in self.refresh_tokens:
+            token_info = await self._get_record(token_id) if token_id else None
+            if token_info is None:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Invalid refresh token"
                 )
             
             # Check if token is revoked
-            token_info = self.refresh_tokens[token_id]
-            if token_info['is_revoked']:
+            if token_info['revoked_at'] or not token_versions.is_current(payload.get('user_id'), payload.get('ver')):
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Refresh token has been revoked"
                 )
             
             # Update last used time
-            token_info['last_used'] = datetime.utcnow()
+            now = datetime.now(timezone.utc)
+            last_used = token_info['last_used']
+            if last_used is None or (now - last_used).total_seconds() > REFRESH_TOKEN_TOUCH_SECONDS:
+                token_info['last_used'] = now
+                await db_ops.touch_refresh_token(token_id, now)
             
             # Create new access token
             access_token_data = {
@@ -115,6 +148,7 @@ class TokenManager:
                 'user_id': payload['user_id'],
                 'role': payload.get('role', 'student'),
                 'permissions': payload.get('permissions', []),
+                'ver': payload.get('ver', 0),
                 'iat': datetime.utcnow()
             }
             
@@ -135,68 +169,50 @@ class TokenManager:
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Refresh token has expired"
             )
-        except jwt.JWTError:
+        except jwt.PyJWTError:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid refresh token"
             )
     
-    def revoke_refresh_token(self, refresh_token: str) -> bool:
+    async def revoke_refresh_token(self, refresh_token: str) -> bool:
         """Revoke a refresh token"""
         try:
             payload = jwt.decode(refresh_token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-            token_id = payload.get('token_id')
-            
-            if token_id and token_id in self.refresh_tokens:
-                self.refresh_tokens[token_id]['is_revoked'] = True
-                return True
-            
+        except jwt.PyJWTError:
             return False
-            
-        except jwt.JWTError:
+        
+        token_id = payload.get('token_id')
+        if not token_id:
             return False
+        
+        self._records.pop(token_id, None)
+        return await db_ops.revoke_refresh_token(token_id)
     
-    def revoke_all_user_tokens(self, user_id: str) -> int:
+    async def revoke_all_user_tokens(self, user_id: str) -> int:
         """Revoke all refresh tokens for a user"""
-        revoked_count = 0
+        revoked = await db_ops.revoke_user_refresh_tokens(user_id)
+        for token_id in revoked:
+            self._records.pop(token_id, None)
         
-        for token_id, token_info in self.refresh_tokens.items():
-            if token_info['user_id'] == user_id and not token_info['is_revoked']:
-                token_info['is_revoked'] = True
-                revoked_count += 1
-        
-        return revoked_count
+        # Cached access-token payloads for the user must not outlive the revocation
+        verified_tokens.invalidate_user(user_id=user_id)
+        return len(revoked)
     
-    def cleanup_expired_tokens(self) -> int:
-        """Clean up expired refresh tokens"""
-        current_time = datetime.utcnow()
-        expired_tokens = []
-        
-        for token_id, token_info in self.refresh_tokens.items():
-            # Check if token is older than refresh token expiry
-            if (current_time - token_info['created_at']).days > REFRESH_TOKEN_EXPIRE_DAYS:
-                expired_tokens.append(token_id)
-        
-        for token_id in expired_tokens:
-            del self.refresh_tokens[token_id]
-        
-        return len(expired_tokens)
+    async def cleanup_expired_tokens(self) -> int:
+        """Delete expired refresh tokens, in batches of REFRESH_TOKEN_CLEANUP_BATCH_SIZE"""
+        return await db_ops.delete_expired_refresh_tokens(REFRESH_TOKEN_CLEANUP_BATCH_SIZE)
     
-    def get_user_active_tokens(self, user_id: str) -> list:
+    async def get_user_active_tokens(self, user_id: str) -> list:
         """Get all active tokens for a user"""
-        active_tokens = []
-        
-        for token_id, token_info in self.refresh_tokens.items():
-            if (token_info['user_id'] == user_id and 
-                not token_info['is_revoked'] and
-                (datetime.utcnow() - token_info['created_at']).days <= REFRESH_TOKEN_EXPIRE_DAYS):
-                active_tokens.append({
-                    'token_id': token_id,
-                    'created_at': token_info['created_at'].isoformat(),
-                    'last_used': token_info['last_used'].isoformat()
-                })
-        
-        return active_tokens
+        return [
+            {
+                'token_id': token['token_id'],
+                'created_at': token['created_at'].isoformat(),
+                'last_used': token['last_used'].isoformat() if token['last_used'] else None
+            }
+            for token in await db_ops.get_active_refresh_tokens(user_id)
+        ]
     
     def _create_access_token(self, data: Dict[str, Any]) -> str:
         """Create access token"""
@@ -213,7 +229,7 @@ class TokenManager:
     def verify_access_token(self, token: str) -> Dict[str, Any]:
         """Verify and decode access token"""
         try:
-            payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+            payload = decode_token(token, JWT_SECRET_KEY, [JWT_ALGORITHM])
             
             if payload.get('type') != 'access':
                 raise HTTPException(
@@ -221,6 +237,12 @@ class TokenManager:
                     detail="Invalid token type"
                 )
             
+            if not token_versions.is_current(payload.get('user_id'), payload.get('ver')):
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Access token has been revoked"
+                )
+            
             return payload
             
         except jwt.ExpiredSignatureError:
@@ -228,7 +250,7 @@ class TokenManager:
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Access token has expired"
             )
-        except jwt.JWTError:
+        except jwt.PyJWTError:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid access token"
@@ -114,9 +114,25 @@ export interface UsersResponse {
     limit: number;
     total: number;
     pages: number;
+    nextCursor?: string | null;
+    hasMore?: boolean;
   };
 }
 
+export type ReportType = 'financial' | 'users' | 'courses';
+
+export interface ReportJob {
+  id: string;
+  report_type: ReportType;
+  start_date: string | null;
+  end_date: string | null;
+  status: 'queued' | 'running' | 'completed' | 'failed';
+  error: string | null;
+  created_at: number;
+  started_at: number | null;
+  finished_at: number | null;
+}
+
 export interface Course {
   id: string;
   title: string;
@@ -150,6 +166,8 @@ export interface CoursesResponse {
     limit: number;
     total: number;
     pages: number;
+    nextCursor?: string | null;
+    hasMore?: boolean;
   };
 }
 
@@ -177,9 +195,15 @@ export const adminService = {
 
   // Payment management
   async getPaymentRequests(status?: string): Promise<PaymentRequest[]> {
-    const url = status ? `/payments?status=${status}` : '/payments';
-    const response = await adminApi.get(url);
-    return response.data;
+    // The list is paged; follow X-Next-Cursor until the last page
+    const requests: PaymentRequest[] = [];
+    let cursor: string | undefined;
+    do {
+      const response = await adminApi.get('/payments', { params: { status, cursor } });
+      requests.push(...response.data);
+      cursor = response.headers['x-next-cursor'];
+    } while (cursor);
+    return requests;
   },
 
   async approvePaymentRequest(requestId: string, approval: PaymentApprovalRequest): Promise<void> {
@@ -332,6 +356,28 @@ export const adminService = {
     const response = await adminApi.get(`/reports/courses?${params.toString()}`);
     return response.data;
   },
+
+  // Background report jobs
+  async createReportJob(reportType: ReportType, startDate?: string, endDate?: string): Promise<ReportJob> {
+    const params = new URLSearchParams();
+    if (startDate) params.append('start_date', startDate);
+    if (endDate) params.append('end_date', endDate);
+    
+    const response = await adminApi.post(`/reports/${reportType}/jobs?${params.toString()}`);
+    return response.data;
+  },
+
+  async getReportJob(jobId: string): Promise<ReportJob> {
+    const response = await adminApi.get(`/reports/jobs/${jobId}`);
+    return response.data;
+  },
+
+  async getReportJobResult(jobId: string, format: 'json' | 'csv' = 'json'): Promise<any> {
+    const response = await adminApi.get(`/reports/jobs/${jobId}/result?format=${format}`, {
+      responseType: format === 'csv' ? 'blob' : 'json',
+    });
+    return response.data;
+  },
 };
 
 export default adminService;
@@ -27,7 +27,35 @@ export interface ProgressOverview {
   lastAccessed: string;
 }
 
+export type DashboardSection = 'stats' | 'recentActivity' | 'progress' | 'referralStats' | 'enrollments';
+
+export interface DashboardSummary {
+  stats?: DashboardStats;
+  recentActivity?: Array<{ type: string; title: string; date: string; icon: string }>;
+  progress?: Array<{ courseId: string; courseTitle: string; progress: number; status: string; enrolledAt: string; instructor: string }>;
+  referralStats?: {
+    totalReferrals: number;
+    completedReferrals: number;
+    pendingReferrals: number;
+    totalEarnings: number;
+    referralCode: string;
+  };
+  enrollments?: any[];
+}
+
 class DashboardService {
+  // Get the whole dashboard in one request; pass sections to fetch only those
+  async getDashboardSummary(sections?: DashboardSection[]): Promise<DashboardSummary> {
+    try {
+      const params = sections?.length ? { fields: sections.join(',') } : undefined;
+      const response = await api.get<DashboardSummary>('/dashboard/summary', { params });
+      return response.data;
+    } catch (error) {
+      throw new Error(handleApiError(error));
+    }
+  }
+
+
   // Get dashboard statistics
   async getDashboardStats(): Promise<DashboardStats> {
     try {
@@ -100,11 +100,18 @@ class WithdrawalsService {
 
   async getAllWithdrawals(): Promise<WithdrawalResponse[]> {
     try {
-      const response = await axios.get(
-        `${API_BASE_URL}/withdrawals/`,
-        { headers: this.getAuthHeaders() }
-      );
-      return response.data;
+      // The list is paged; follow X-Next-Cursor until the last page
+      const withdrawals: WithdrawalResponse[] = [];
+      let cursor: string | undefined;
+      do {
+        const response = await axios.get(
+          `${API_BASE_URL}/withdrawals/`,
+          { headers: this.getAuthHeaders(), params: { cursor } }
+        );
+        withdrawals.push(...response.data);
+        cursor = response.headers['x-next-cursor'];
+      } while (cursor);
+      return withdrawals;
     } catch (error: any) {
       throw new Error(error.response?.data?.message || 'Failed to fetch all withdrawal requests');
     }
@@ -0,0 +1,16 @@
+-- Keyset pagination for admin listings
+-- Listings page by (created_at DESC, id DESC); these indexes let each page
+-- be read as an index range scan instead of sorting the whole table.
+
+-- Status filters used by the admin user and course listings
+ALTER TABLE users ADD COLUMN IF NOT EXISTS is_active BOOLEAN DEFAULT TRUE;
+ALTER TABLE courses ADD COLUMN IF NOT EXISTS is_active BOOLEAN DEFAULT TRUE;
+
+CREATE INDEX IF NOT EXISTS idx_users_created_at_id ON users(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_courses_created_at_id ON courses(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_payment_requests_created_at_id ON payment_requests(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_withdrawal_requests_created_at_id ON withdrawal_requests(created_at DESC, id DESC);
+
+-- Filtered listings page within a status
+CREATE INDEX IF NOT EXISTS idx_payment_requests_status_created_at_id ON payment_requests(status, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_withdrawal_requests_status_created_at_id ON withdrawal_requests(status, created_at DESC, id DESC);
@@ -0,0 +1,11 @@
+-- Indexed admin user search
+-- Trigram indexes serve substring ILIKE matches and similarity ranking on
+-- name and email; the lower() pattern indexes serve short prefix lookups.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_users_full_name_trgm ON users USING gin (full_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_users_email_trgm ON users USING gin (email gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_users_full_name_prefix ON users (lower(full_name) text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_users_email_prefix ON users (lower(email) text_pattern_ops);
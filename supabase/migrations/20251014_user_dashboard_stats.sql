@@ -0,0 +1,14 @@
+-- Per-user dashboard read model
+-- One row per user with the numbers shown on the student dashboard. Rows are
+-- refreshed in the same transaction as the writes that change them; run
+-- backend/rebuild_dashboard_stats.py to (re)build every row from source tables.
+
+CREATE TABLE IF NOT EXISTS user_dashboard_stats (
+    user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    courses_enrolled INTEGER NOT NULL DEFAULT 0,
+    hours_learned INTEGER NOT NULL DEFAULT 0,
+    certificates INTEGER NOT NULL DEFAULT 0,
+    total_earnings DECIMAL(12,2) NOT NULL DEFAULT 0,
+    successful_referrals INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
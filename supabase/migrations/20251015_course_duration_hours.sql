@@ -0,0 +1,23 @@
+-- Numeric course duration
+-- duration stays the display text ("8 weeks"); duration_hours is derived from
+-- it on create/update (6 hours per week, 24 when it does not parse) so
+-- hours-learned can be summed in SQL.
+
+ALTER TABLE courses ADD COLUMN IF NOT EXISTS duration_hours INTEGER;
+
+UPDATE courses
+SET duration_hours = COALESCE(substring(duration from '^\s*(\d+)(?:\s|$)')::int * 6, 24)
+WHERE duration_hours IS NULL;
+
+ALTER TABLE courses ALTER COLUMN duration_hours SET DEFAULT 24;
+ALTER TABLE courses ALTER COLUMN duration_hours SET NOT NULL;
+
+-- Read model rows were computed from the parsed text; refresh them from the new column
+UPDATE user_dashboard_stats uds
+SET hours_learned = COALESCE((
+        SELECT SUM(c.duration_hours)
+        FROM enrollments e
+        JOIN courses c ON c.id = e.course_id
+        WHERE e.user_id = uds.user_id
+    ), 0),
+    updated_at = NOW();
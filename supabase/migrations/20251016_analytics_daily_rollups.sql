@@ -0,0 +1,51 @@
+-- Daily analytics rollups
+-- Analytics charts and the financial report read these instead of scanning
+-- users/enrollments. Rows are bumped by the registration and enrollment
+-- write paths; backend/refresh_analytics_rollups.py recomputes recent days.
+
+CREATE TABLE IF NOT EXISTS analytics_daily_users (
+    day DATE PRIMARY KEY,
+    new_users INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS analytics_daily_courses (
+    day DATE NOT NULL,
+    course_id UUID NOT NULL REFERENCES courses(id) ON DELETE CASCADE,
+    enrollments INTEGER NOT NULL DEFAULT 0,
+    approved_enrollments INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(12,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, course_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_analytics_daily_courses_course ON analytics_daily_courses(course_id, day);
+
+-- Enrollments created by payment approval were left with the default
+-- payment_status; mark those backed by an approved payment request
+UPDATE enrollments e
+SET payment_status = 'approved'
+WHERE e.payment_status = 'pending'
+AND EXISTS (
+    SELECT 1 FROM payment_requests pr
+    WHERE pr.user_id = e.user_id AND pr.course_id = e.course_id AND pr.status = 'approved'
+);
+
+-- Backfill from the source tables
+INSERT INTO analytics_daily_users (day, new_users)
+SELECT DATE(created_at), COUNT(*)
+FROM users
+WHERE created_at IS NOT NULL
+GROUP BY DATE(created_at)
+ON CONFLICT (day) DO UPDATE SET new_users = EXCLUDED.new_users;
+
+INSERT INTO analytics_daily_courses (day, course_id, enrollments, approved_enrollments, revenue)
+SELECT DATE(e.enrolled_at), e.course_id, COUNT(*),
+       COUNT(*) FILTER (WHERE e.payment_status = 'approved'),
+       COALESCE(SUM(c.price) FILTER (WHERE e.payment_status = 'approved'), 0)
+FROM enrollments e
+JOIN courses c ON e.course_id = c.id
+WHERE e.enrolled_at IS NOT NULL
+GROUP BY DATE(e.enrolled_at), e.course_id
+ON CONFLICT (day, course_id) DO UPDATE SET
+    enrollments = EXCLUDED.enrollments,
+    approved_enrollments = EXCLUDED.approved_enrollments,
+    revenue = EXCLUDED.revenue;
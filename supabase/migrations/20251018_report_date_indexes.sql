@@ -0,0 +1,6 @@
+-- Date-range indexes for admin reports
+-- The user report scans users by created_at, covered by
+-- idx_users_created_at_id. The course report joins each course to its
+-- enrollments within an enrolled_at range.
+
+CREATE INDEX IF NOT EXISTS idx_enrollments_course_enrolled_at ON enrollments(course_id, enrolled_at);
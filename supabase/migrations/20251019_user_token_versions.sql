@@ -0,0 +1,12 @@
+-- Access-token revocation by version stamp
+-- Tokens carry the token_version current when they were issued; bumping it
+-- invalidates every outstanding token for the user. Workers poll for
+-- recently changed versions and load the full set (only users ever bumped)
+-- at startup.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version_changed_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS idx_users_token_version_changed_at
+    ON users(token_version_changed_at)
+    WHERE token_version > 0;
@@ -0,0 +1,20 @@
+-- Refresh token store
+-- Replaces the per-process dict in TokenManager so refresh tokens survive
+-- restarts and are shared by every worker. Per-user operations read the
+-- user's live tokens through idx_refresh_tokens_user_live; cleanup deletes
+-- expired rows in batches through idx_refresh_tokens_expires_at.
+
+CREATE TABLE IF NOT EXISTS refresh_tokens (
+  token_id TEXT PRIMARY KEY,
+  user_id UUID NOT NULL,
+  email TEXT NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  last_used TIMESTAMPTZ,
+  expires_at TIMESTAMPTZ NOT NULL,
+  revoked_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_refresh_tokens_user_live
+    ON refresh_tokens(user_id, created_at DESC)
+    WHERE revoked_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_refresh_tokens_expires_at ON refresh_tokens(expires_at);
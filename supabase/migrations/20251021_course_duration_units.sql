@@ -0,0 +1,24 @@
+-- Course duration units
+-- The 20251015 backfill read the leading number of any duration as weeks, so
+-- "40 hours" became 240 and "3 months" became 18. Re-derive duration_hours the
+-- way the application does: weeks at 6 hours each, hours as-is, and 24 for
+-- any other unit or text that does not parse.
+
+UPDATE courses
+SET duration_hours = CASE
+        WHEN duration ~* '^\s*\d+\s*weeks?\s*$'
+            THEN substring(duration from '(\d+)')::int * 6
+        WHEN duration ~* '^\s*\d+\s*(hours?|hrs?)\s*$'
+            THEN substring(duration from '(\d+)')::int
+        ELSE 24
+    END;
+
+-- Refresh the read model from the corrected hours
+UPDATE user_dashboard_stats uds
+SET hours_learned = COALESCE((
+        SELECT SUM(c.duration_hours)
+        FROM enrollments e
+        JOIN courses c ON c.id = e.course_id
+        WHERE e.user_id = uds.user_id
+    ), 0),
+    updated_at = NOW();
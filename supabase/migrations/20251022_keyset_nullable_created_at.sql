@@ -0,0 +1,19 @@
+-- Keyset pagination over nullable created_at
+-- created_at has a default but no NOT NULL, so listings sort on
+-- COALESCE(created_at, '-infinity'): undated rows come last and the keyset
+-- predicate can still step past them. These expression indexes replace the
+-- plain (created_at, id) ones from 20251012, except idx_users_created_at_id,
+-- which the user report's created_at range still uses.
+
+CREATE INDEX IF NOT EXISTS idx_users_keyset ON users((COALESCE(created_at, '-infinity'::timestamptz)) DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_courses_keyset ON courses((COALESCE(created_at, '-infinity'::timestamptz)) DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_payment_requests_keyset ON payment_requests((COALESCE(created_at, '-infinity'::timestamptz)) DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_withdrawal_requests_keyset ON withdrawal_requests((COALESCE(created_at, '-infinity'::timestamptz)) DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_payment_requests_status_keyset ON payment_requests(status, (COALESCE(created_at, '-infinity'::timestamptz)) DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_withdrawal_requests_status_keyset ON withdrawal_requests(status, (COALESCE(created_at, '-infinity'::timestamptz)) DESC, id DESC);
+
+DROP INDEX IF EXISTS idx_courses_created_at_id;
+DROP INDEX IF EXISTS idx_payment_requests_created_at_id;
+DROP INDEX IF EXISTS idx_withdrawal_requests_created_at_id;
+DROP INDEX IF EXISTS idx_payment_requests_status_created_at_id;
+DROP INDEX IF EXISTS idx_withdrawal_requests_status_created_at_id;